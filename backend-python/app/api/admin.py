@@ -1,12 +1,12 @@
-import math
 from datetime import datetime, timezone
 from typing import Optional
 
 from beanie import PydanticObjectId
 from fastapi import APIRouter, HTTPException, Query, status
 
-from app.core.security import hash_password
-from app.models import Project, User
+from app.core.search import build_text_query, normalize_name
+from app.core.security import get_token_cache_stats, hash_password
+from app.models import Project, ProjectContentIndex, User
 from app.schemas.admin import (
     AdminProjectItem,
     PaginatedProjects,
@@ -17,9 +17,25 @@ from app.schemas.admin import (
     UserListItem,
     UserUpdate,
 )
+from app.services import (
+    get_revocation_stats,
+    get_share_cache_stats,
+    get_user_cache_stats,
+    invalidate_cached_content,
+    invalidate_cached_user,
+)
 from app.services.project import delete_project_data
 
 from .deps import AdminUser
+from .pagination import (
+    count_documents,
+    decode_cursor,
+    encode_cursor,
+    keyset_query,
+    keyset_sort,
+    text_score_sort,
+    total_pages,
+)
 
 router = APIRouter()
 
@@ -30,22 +46,52 @@ async def list_users(
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(10, ge=1, le=100, description="每页数量"),
     search: Optional[str] = Query(None, description="搜索用户名"),
+    cursor: Optional[str] = Query(None, description="下一页游标，优先于 page"),
+    include_total: bool = Query(True, description="是否返回总数"),
 ):
-    """获取用户列表（分页、搜索）"""
-    query = {}
-    if search:
-        query["username"] = {"$regex": search, "$options": "i"}
-
-    total = await User.find(query).count()
-    total_pages = math.ceil(total / page_size) if total > 0 else 1
-
-    users = (
-        await User.find(query)
-        .sort(-User.created_at)
-        .skip((page - 1) * page_size)
-        .limit(page_size)
-        .to_list()
-    )
+    """获取用户列表（分页、搜索）
+
+    传入上一页返回的 nextCursor 时按游标翻页，不需要 skip。
+    搜索时按相关度排序，只支持 page 翻页。
+    """
+    text_query = build_text_query(search) if search else None
+    if _unsearchable(search, text_query):
+        return PaginatedUsers(
+            items=[],
+            total=0 if include_total else None,
+            page=page,
+            pageSize=page_size,
+            totalPages=total_pages(0 if include_total else None, page_size),
+        )
+    query = {"$text": {"$search": text_query}} if text_query else {}
+
+    total = await count_documents(User, query) if include_total else None
+
+    if text_query:
+        # 搜索结果按相关度排序
+        users = (
+            await User.find(query)
+            .sort(text_score_sort() + keyset_sort("created_at", "desc"))
+            .skip((page - 1) * page_size)
+            .limit(page_size)
+            .to_list()
+        )
+        next_cursor = None
+    else:
+        find_query = {}
+        if cursor:
+            value, last_id = decode_cursor(cursor, "created_at", "desc")
+            find_query = keyset_query("created_at", "desc", value, last_id)
+
+        find = User.find(find_query).sort(keyset_sort("created_at", "desc"))
+        if not cursor:
+            find = find.skip((page - 1) * page_size)
+        # 多取一条判断是否还有下一页
+        users = await find.limit(page_size + 1).to_list()
+        next_cursor = None
+        if len(users) > page_size:
+            users = users[:page_size]
+            next_cursor = encode_cursor("created_at", "desc", users[-1])
 
     items = [
         UserListItem(
@@ -64,10 +110,16 @@ async def list_users(
         total=total,
         page=page,
         pageSize=page_size,
-        totalPages=total_pages,
+        totalPages=total_pages(total, page_size),
+        nextCursor=next_cursor,
     )
 
 
+def _unsearchable(search: Optional[str], text_query: Optional[str]) -> bool:
+    """搜索词非空但只有标点等不可搜索的字符（没有生成查询），结果应为空而不是不过滤"""
+    return bool(search and search.strip()) and text_query is None
+
+
 @router.post("/users", response_model=UserListItem, status_code=status.HTTP_201_CREATED)
 async def create_user(_: AdminUser, data: UserCreate):
     """创建新用户"""
@@ -80,7 +132,7 @@ async def create_user(_: AdminUser, data: UserCreate):
 
     user = User(
         username=data.username,
-        password_hash=hash_password(data.password),
+        password_hash=await hash_password(data.password),
         role=data.role,
         is_active=data.is_active,
     )
@@ -159,10 +211,14 @@ async def update_user(_: AdminUser, user_id: str, data: UserUpdate):
         user.role = data.role
 
     if data.is_active is not None:
+        if user.is_active and not data.is_active:
+            # 禁用账号时吊销已签发的 token
+            user.revoke_tokens()
         user.is_active = data.is_active
 
     user.updated_at = datetime.now(timezone.utc)
     await user.save()
+    await invalidate_cached_user(user.id)
 
     return UserListItem(
         _id=str(user.id),
@@ -199,11 +255,15 @@ async def delete_user(admin: AdminUser, user_id: str):
             detail="不能删除自己",
         )
 
-    # 删除用户的所有项目
-    await Project.find(Project.owner.id == user.id).delete()
+    # 逐个删除用户的项目：MinIO 中的数据、内容索引和分享缓存都要清理
+    async for project in Project.find(Project.owner.id == user.id):
+        await delete_project_data(project)
+        await project.delete()
+        await invalidate_cached_content(project)
 
-    # 删除用户
+    # 删除用户（用户不存在后其 token 自然失效）
     await user.delete()
+    await invalidate_cached_user(user.id)
 
     return None
 
@@ -226,9 +286,11 @@ async def reset_password(_: AdminUser, user_id: str, data: PasswordReset):
             detail="用户不存在",
         )
 
-    user.password_hash = hash_password(data.new_password)
+    user.password_hash = await hash_password(data.new_password)
+    user.revoke_tokens()
     user.updated_at = datetime.now(timezone.utc)
     await user.save()
+    await invalidate_cached_user(user.id)
 
     return None
 
@@ -241,67 +303,201 @@ async def list_projects(
     _: AdminUser,
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(10, ge=1, le=100, description="每页数量"),
-    search: Optional[str] = Query(None, description="搜索项目标题"),
-    sort_by: str = Query("updatedAt", description="排序字段"),
+    search: Optional[str] = Query(None, description="搜索项目标题和描述"),
+    owner: Optional[str] = Query(None, description="按作者用户名搜索"),
+    extension: Optional[str] = Query(None, description="按使用的扩展筛选，如 pen"),
+    min_blocks: Optional[int] = Query(None, ge=0, description="最少积木数"),
+    max_blocks: Optional[int] = Query(None, ge=0, description="最多积木数"),
+    sort_by: str = Query("updatedAt", description="排序字段，搜索时可用 relevance 按相关度排序"),
     sort_order: str = Query("desc", pattern="^(asc|desc)$", description="排序顺序"),
+    cursor: Optional[str] = Query(None, description="下一页游标，优先于 page"),
+    include_total: bool = Query(True, description="是否返回总数"),
 ):
-    """获取所有项目列表（分页、搜索、排序）"""
+    """获取所有项目列表（分页、搜索、排序）
+
+    传入上一页返回的 nextCursor 时按 (排序字段, _id) 游标翻页，不需要 skip。
+    按相关度排序时只支持 page 翻页。
+    """
     query = {}
-    if search:
-        query["title"] = {"$regex": search, "$options": "i"}
-
-    total = await Project.find(query).count()
-    total_pages = math.ceil(total / page_size) if total > 0 else 1
-
-    # 排序字段映射
-    sort_field_map = {
-        "title": Project.title,
-        "fileSize": Project.file_size,
-        "createdAt": Project.created_at,
-        "updatedAt": Project.updated_at,
-        "viewCount": Project.view_count,
-    }
-    sort_field = sort_field_map.get(sort_by, Project.updated_at)
-    if sort_order == "desc":
-        sort_field = -sort_field
+    text_query = build_text_query(search) if search else None
+    owner_query = build_text_query(owner) if owner else None
+    if _unsearchable(search, text_query) or _unsearchable(owner, owner_query):
+        return PaginatedProjects(
+            items=[],
+            total=0 if include_total else None,
+            page=page,
+            pageSize=page_size,
+            totalPages=total_pages(0 if include_total else None, page_size),
+        )
+    if text_query:
+        query["$text"] = {"$search": text_query}
+    if owner_query:
+        owner_ids = await User.get_motor_collection().distinct(
+            "_id", {"$text": {"$search": owner_query}}
+        )
+        query["owner.$id"] = {"$in": owner_ids}
+    if extension:
+        query["extensions"] = normalize_name(extension)
+    if min_blocks is not None or max_blocks is not None:
+        block_range = {}
+        if min_blocks is not None:
+            block_range["$gte"] = min_blocks
+        if max_blocks is not None:
+            block_range["$lte"] = max_blocks
+        query["block_count"] = block_range
+
+    total = await count_documents(Project, query) if include_total else None
+
+    if text_query and sort_by == "relevance":
+        projects = (
+            await Project.find(query)
+            .sort(text_score_sort() + keyset_sort("updated_at", "desc"))
+            .skip((page - 1) * page_size)
+            .limit(page_size)
+            .to_list()
+        )
+        next_cursor = None
+    else:
+        # 排序字段映射（每个字段都有对应的 (字段, _id) 复合索引）
+        sort_field_map = {
+            "title": "title",
+            "fileSize": "file_size",
+            "createdAt": "created_at",
+            "updatedAt": "updated_at",
+            "viewCount": "view_count",
+            "spriteCount": "sprite_count",
+            "blockCount": "block_count",
+            "costumeCount": "costume_count",
+            "soundCount": "sound_count",
+            "assetBytes": "asset_bytes",
+        }
+        sort_field = sort_field_map.get(sort_by, "updated_at")
+
+        find_query = query
+        if cursor:
+            value, last_id = decode_cursor(cursor, sort_field, sort_order)
+            find_query = {"$and": [query, keyset_query(sort_field, sort_order, value, last_id)]}
+
+        find = Project.find(find_query).sort(keyset_sort(sort_field, sort_order))
+        if not cursor:
+            find = find.skip((page - 1) * page_size)
+        # 多取一条判断是否还有下一页
+        projects = await find.limit(page_size + 1).to_list()
+        next_cursor = None
+        if len(projects) > page_size:
+            projects = projects[:page_size]
+            next_cursor = encode_cursor(sort_field, sort_order, projects[-1])
+
+    return PaginatedProjects(
+        items=await _build_project_items(projects),
+        total=total,
+        page=page,
+        pageSize=page_size,
+        totalPages=total_pages(total, page_size),
+        nextCursor=next_cursor,
+    )
 
-    projects = (
-        await Project.find(query)
-        .sort(sort_field)
+
+@router.get("/projects/content-search", response_model=PaginatedProjects)
+async def search_project_content(
+    _: AdminUser,
+    page: int = Query(1, ge=1, description="页码"),
+    page_size: int = Query(10, ge=1, le=100, description="每页数量"),
+    sprite: Optional[str] = Query(None, description="角色或舞台名"),
+    variable: Optional[str] = Query(None, description="变量名"),
+    list_name: Optional[str] = Query(None, alias="list", description="列表名"),
+    extension: Optional[str] = Query(None, description="扩展 id，如 pen"),
+    opcode: Optional[str] = Query(None, description="积木 opcode，如 pen_penDown"),
+    include_total: bool = Query(True, description="是否返回总数"),
+):
+    """按项目内容搜索（名称完全匹配，不区分大小写；多个条件同时满足）
+
+    查询保存时生成的内容索引，不需要读取 MinIO 中的项目文件。
+    """
+    query = {}
+    for field, value in (
+        ("targets", sprite),
+        ("variables", variable),
+        ("lists", list_name),
+        ("extensions", extension),
+    ):
+        if value:
+            query[field] = normalize_name(value)
+    if opcode:
+        query["opcode_names"] = opcode
+
+    if not query:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="请至少指定一个搜索条件",
+        )
+
+    collection = ProjectContentIndex.get_motor_collection()
+    total = await collection.count_documents(query) if include_total else None
+
+    cursor = (
+        collection.find(query, projection={"project_id": 1})
+        .sort("project_id", -1)
         .skip((page - 1) * page_size)
         .limit(page_size)
-        .to_list()
+    )
+    project_ids = [doc["project_id"] async for doc in cursor]
+
+    projects = await Project.find({"_id": {"$in": project_ids}}).to_list()
+    order = {project_id: i for i, project_id in enumerate(project_ids)}
+    projects.sort(key=lambda project: order[project.id])
+
+    return PaginatedProjects(
+        items=await _build_project_items(projects),
+        total=total,
+        page=page,
+        pageSize=page_size,
+        totalPages=total_pages(total, page_size),
     )
 
-    # 批量获取用户信息
+
+async def _build_project_items(projects: list[Project]) -> list[AdminProjectItem]:
+    """构建管理后台项目列表项"""
+    # 一次查询批量获取作者用户名
+    owner_names = await _get_usernames({project.owner_id for project in projects})
+
     items = []
     for project in projects:
-        await project.fetch_link(Project.owner)
-        owner_name = project.owner.username if project.owner else "未知用户"
-        owner_id = str(project.owner.id) if project.owner else ""
+        owner_id = project.owner_id
         items.append(
             AdminProjectItem(
                 _id=str(project.id),
                 title=project.title,
                 description=project.description,
-                thumbnail=project.thumbnail,
+                thumbnail=project.get_thumbnail_url("sm"),
                 fileSize=project.file_size,
                 isPublic=project.is_public,
                 viewCount=project.view_count,
-                ownerId=owner_id,
-                ownerName=owner_name,
+                spriteCount=project.sprite_count,
+                blockCount=project.block_count,
+                costumeCount=project.costume_count,
+                soundCount=project.sound_count,
+                assetBytes=project.asset_bytes,
+                extensions=project.extensions,
+                ownerId=str(owner_id) if owner_id else "",
+                ownerName=owner_names.get(owner_id, "未知用户"),
                 createdAt=project.created_at,
                 updatedAt=project.updated_at,
             )
         )
+    return items
 
-    return PaginatedProjects(
-        items=items,
-        total=total,
-        page=page,
-        pageSize=page_size,
-        totalPages=total_pages,
+
+async def _get_usernames(user_ids: set[PydanticObjectId]) -> dict[PydanticObjectId, str]:
+    """批量查询用户名，只取 username 字段"""
+    user_ids.discard(None)
+    if not user_ids:
+        return {}
+    cursor = User.get_motor_collection().find(
+        {"_id": {"$in": list(user_ids)}},
+        projection={"username": 1},
     )
+    return {doc["_id"]: doc["username"] async for doc in cursor}
 
 
 @router.delete("/projects/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -327,5 +523,20 @@ async def delete_project(_: AdminUser, project_id: str):
 
     # 删除项目记录
     await project.delete()
+    await invalidate_cached_content(project)
 
     return None
+
+
+# ===== 运行状态 =====
+
+
+@router.get("/stats/cache")
+async def get_cache_stats(_: AdminUser):
+    """获取缓存命中统计"""
+    return {
+        "share": get_share_cache_stats(),
+        "user": get_user_cache_stats(),
+        "token": get_token_cache_stats(),
+        "revocation": get_revocation_stats(),
+    }
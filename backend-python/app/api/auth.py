@@ -3,8 +3,9 @@ from fastapi import APIRouter, HTTPException, status
 from app.core.security import create_access_token, hash_password, verify_password
 from app.models import User
 from app.schemas import UserRegister, UserLogin, AuthResponse
+from app.services import revoke_token
 
-from .deps import CurrentUser
+from .deps import Claims, CurrentUser
 
 router = APIRouter()
 
@@ -23,12 +24,12 @@ async def register(data: UserRegister):
     # 创建用户
     user = User(
         username=data.username,
-        password_hash=hash_password(data.password),
+        password_hash=await hash_password(data.password),
     )
     await user.insert()
 
     # 生成 token
-    token = create_access_token(str(user.id))
+    token = create_access_token(str(user.id), version=user.token_version)
 
     return AuthResponse(
         user=user.to_response(),
@@ -48,14 +49,20 @@ async def login(data: UserLogin):
         )
 
     # 验证密码
-    if not verify_password(data.password, user.password_hash):
+    if not await verify_password(data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="用户名或密码错误",
         )
 
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="账号已被禁用",
+        )
+
     # 生成 token
-    token = create_access_token(str(user.id))
+    token = create_access_token(str(user.id), version=user.token_version)
 
     return AuthResponse(
         user=user.to_response(),
@@ -70,8 +77,7 @@ async def get_me(current_user: CurrentUser):
 
 
 @router.post("/logout")
-async def logout(current_user: CurrentUser):
-    """退出登录"""
-    # JWT 是无状态的，客户端删除 token 即可
-    # 如需实现 token 黑名单，可使用 Redis
+async def logout(current_user: CurrentUser, claims: Claims):
+    """退出登录，吊销当前 token"""
+    await revoke_token(claims)
     return {"message": "退出登录成功"}
@@ -0,0 +1,198 @@
+"""项目 sb3 文件下载响应与条件请求
+
+项目详情和分享页共用，支持 Content-Length、单段 Range 请求，
+以及 ETag / Last-Modified 条件请求（304 不需要访问 MinIO）。
+"""
+
+import hashlib
+import re
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Awaitable, Callable, Optional
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from app.models import Project
+from app.services import ProjectContent, open_project_content
+
+SB3_MEDIA_TYPE = "application/x.scratch.sb3"
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def content_etag(project: Project) -> Optional[str]:
+    """sb3 内容的强 ETag，由保存时计算的内容哈希得到"""
+    version = project.get_content_version()
+    return f'"{version}"' if version else None
+
+
+def metadata_etag(project: Project, include_data: bool) -> str:
+    """项目 JSON 响应的弱 ETag：内容或元数据变化时改变
+
+    浏览次数不参与计算，因此是弱 ETag。include_data 不同的响应体不同，ETag 也不同。
+    """
+    parts = [
+        project.get_content_version() or "",
+        _as_utc(project.updated_at).isoformat(),
+        project.share_token or "",
+        str(project.is_public),
+        str(include_data),
+    ]
+    digest = hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+
+def validator_headers(etag: Optional[str], last_modified: datetime, public: bool) -> dict[str, str]:
+    """条件请求相关的响应头"""
+    headers = {
+        "Last-Modified": format_datetime(_as_utc(last_modified), usegmt=True),
+        "Cache-Control": "public, no-cache" if public else "private, no-cache",
+    }
+    if etag:
+        headers["ETag"] = etag
+    return headers
+
+
+def is_not_modified(request: Request, etag: Optional[str], last_modified: datetime) -> bool:
+    """判断条件请求是否可以返回 304
+
+    If-None-Match 存在时优先使用（弱比较），否则比较 If-Modified-Since。
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if etag is None:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        candidates = {_strip_weak(tag) for tag in if_none_match.split(",")}
+        return _strip_weak(etag) in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # HTTP 日期精度为秒
+        return _as_utc(last_modified).replace(microsecond=0) <= since
+    return False
+
+
+def not_modified_response(headers: dict[str, str]) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+
+def _strip_weak(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def _as_utc(value: datetime) -> datetime:
+    # MongoDB 返回的时间不带时区，实际为 UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _parse_range(range_header: str, size: int) -> Optional[tuple[int, int]]:
+    """解析单段 Range 请求头，返回 [start, end] 闭区间
+
+    多段 Range 或格式不正确时返回 None（按完整内容响应）。
+
+    Raises:
+        HTTPException 416: 请求范围超出文件大小
+    """
+    match = _RANGE_RE.match(range_header.strip())
+    if match is None:
+        return None
+
+    start_str, end_str = match.groups()
+    if not start_str and not end_str:
+        return None
+
+    if not start_str:
+        # bytes=-N：最后 N 个字节
+        suffix = int(end_str)
+        if suffix == 0:
+            _raise_unsatisfiable(size)
+        start, end = max(size - suffix, 0), size - 1
+    else:
+        start = int(start_str)
+        end = min(int(end_str), size - 1) if end_str else size - 1
+        if start > end:
+            _raise_unsatisfiable(size)
+
+    if start >= size:
+        _raise_unsatisfiable(size)
+    return start, end
+
+
+def _raise_unsatisfiable(size: int) -> None:
+    raise HTTPException(
+        status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+        detail="请求范围无效",
+        headers={"Content-Range": f"bytes */{size}"},
+    )
+
+
+async def project_content_response(
+    project: Project,
+    request: Request,
+    open_content: Callable[[Project], Awaitable[Optional[ProjectContent]]] = open_project_content,
+    public: bool = False,
+) -> Response:
+    """构建 sb3 文件流式响应
+
+    数据按 upload_chunk_size 分块输出，内存占用与项目大小无关。
+    open_content 可替换为带缓存的读取方式（如分享页）。
+    内容未变化时直接返回 304，不访问 MinIO。
+    """
+    etag = content_etag(project)
+    headers = validator_headers(etag, project.updated_at, public)
+    if is_not_modified(request, etag, project.updated_at):
+        return not_modified_response(headers)
+
+    content = await open_content(project)
+    if content is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="项目数据不存在",
+        )
+
+    size = content.size
+    headers["Accept-Ranges"] = "bytes"
+    try:
+        byte_range = None
+        range_header = request.headers.get("range")
+        # If-Range 不匹配时说明客户端持有的是旧版本，返回完整内容
+        if_range = request.headers.get("if-range")
+        if range_header and size > 0 and (if_range is None or if_range.strip() == etag):
+            byte_range = _parse_range(range_header, size)
+    except HTTPException:
+        content.close()
+        raise
+
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(
+            content.iter_range(),
+            media_type=SB3_MEDIA_TYPE,
+            headers=headers,
+            background=BackgroundTask(content.close),
+        )
+
+    start, end = byte_range
+    length = end - start + 1
+    headers["Content-Length"] = str(length)
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return StreamingResponse(
+        content.iter_range(offset=start, length=length),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=SB3_MEDIA_TYPE,
+        headers=headers,
+        background=BackgroundTask(content.close),
+    )
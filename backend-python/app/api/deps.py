@@ -1,30 +1,73 @@
+import asyncio
 from typing import Annotated, Callable, TypeVar
 
 from beanie import PydanticObjectId
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
-from app.core.security import decode_access_token
+from app.core.loader import DocumentLoader
+from app.core.security import TokenClaims, decode_token
 from app.models import User, Project
+from app.services import get_cached_user, is_token_revoked, set_cached_user
 
 security = HTTPBearer()
+Credentials = Annotated[HTTPAuthorizationCredentials, Depends(security)]
 
 
-async def get_current_user(
-    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)]
-) -> User:
-    """获取当前登录用户"""
-    token = credentials.credentials
-    user_id = decode_access_token(token)
+def get_loader(request: Request) -> DocumentLoader:
+    """获取当前请求的文档加载器（请求内共享）"""
+    loader = getattr(request.state, "loader", None)
+    if loader is None:
+        loader = request.state.loader = DocumentLoader()
+    return loader
 
-    if user_id is None:
+
+Loader = Annotated[DocumentLoader, Depends(get_loader)]
+
+
+async def get_token_claims(credentials: Credentials) -> TokenClaims:
+    """校验 Bearer token，返回 token 声明
+
+    Raises:
+        HTTPException 401: token 无效、已过期或已吊销
+    """
+    claims = decode_token(credentials.credentials)
+
+    if claims is None or not PydanticObjectId.is_valid(claims.user_id):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="无效的认证凭据",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = await User.get(user_id)
+    if await is_token_revoked(claims):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="登录已失效，请重新登录",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return claims
+
+
+Claims = Annotated[TokenClaims, Depends(get_token_claims)]
+
+
+async def get_current_user(claims: Claims, loader: Loader) -> User:
+    """获取当前登录用户
+
+    优先读取用户缓存；已禁用的账号返回 403，token_version 不一致的 token 返回 401。
+    """
+    obj_id = PydanticObjectId(claims.user_id)
+
+    user = await get_cached_user(obj_id)
+    if user is not None:
+        loader.prime(user)
+    else:
+        user = await loader.load(User, obj_id)
+        if user is not None:
+            await set_cached_user(user)
+
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -32,6 +75,19 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="账号已被禁用",
+        )
+
+    if claims.version != user.token_version:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="登录已失效，请重新登录",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
     return user
 
 
@@ -53,16 +109,43 @@ AdminUser = Annotated[User, Depends(get_admin_user)]
 
 async def get_project_with_ownership(
     project_id: str,
-    current_user: CurrentUser,
+    claims: Claims,
+    loader: Loader,
 ) -> Project:
     """获取项目并验证所有权
 
     统一的项目权限检查依赖，消除重复代码。
+    当前用户和项目并发加载；所有权只比较 owner 的 DBRef id，不加载作者文档。
 
     Raises:
+        HTTPException 401: 认证失败（优先于其他错误）
         HTTPException 404: 项目 ID 无效或项目不存在
         HTTPException 403: 当前用户无权访问该项目
     """
+    current_user, project = await asyncio.gather(
+        get_current_user(claims, loader),
+        _load_project(loader, project_id),
+        return_exceptions=True,
+    )
+    if isinstance(current_user, BaseException):
+        raise current_user
+    if isinstance(project, BaseException):
+        raise project
+
+    # 检查权限：管理员可以访问任意项目
+    if current_user.role == "admin":
+        return project
+    # 普通用户只能访问自己的项目
+    if project.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="无权访问该项目",
+        )
+
+    return project
+
+
+async def _load_project(loader: DocumentLoader, project_id: str) -> Project:
     try:
         obj_id = PydanticObjectId(project_id)
     except Exception:
@@ -71,27 +154,13 @@ async def get_project_with_ownership(
             detail="无效的项目 ID",
         )
 
-    project = await Project.get(obj_id)
+    project = await loader.load(Project, obj_id)
 
     if project is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="项目不存在",
         )
-
-    # 加载 owner 关联
-    await project.fetch_link(Project.owner)
-
-    # 检查权限：管理员可以访问任意项目
-    if current_user.role == "admin":
-        return project
-    # 普通用户只能访问自己的项目
-    if project.owner.id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="无权访问该项目",
-        )
-
     return project
 
 
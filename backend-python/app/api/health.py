@@ -0,0 +1,73 @@
+"""存活与就绪检查
+
+- /health/live：进程存活、事件循环可以响应，不检查依赖（用于重启判断）
+- /health/ready：已完成初始化、不在 draining 中，且 MongoDB 和 MinIO 可用（用于摘除流量）
+"""
+
+import asyncio
+
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+
+from app.core.config import get_settings
+from app.core.health import DependencyProbe
+from app.core.readiness import readiness
+from app.core.redis import get_redis
+from app.models import User
+from app.services import get_storage_service
+
+router = APIRouter()
+
+
+async def _check_mongodb() -> None:
+    await User.get_motor_collection().database.command("ping")
+
+
+async def _check_storage() -> None:
+    storage = get_storage_service()
+    if not await storage.ping():
+        raise RuntimeError(f'Bucket "{storage.bucket}" does not exist')
+
+
+async def _check_redis() -> None:
+    redis = get_redis()
+    if redis is None:
+        raise RuntimeError("Redis is not configured or temporarily disabled")
+    await redis.ping()
+
+
+PROBES = [
+    DependencyProbe("mongodb", _check_mongodb),
+    DependencyProbe("storage", _check_storage),
+    # Redis 只做缓存，不可用时服务降级运行
+    DependencyProbe("redis", _check_redis, required=False),
+]
+
+
+@router.get("/live")
+async def liveness():
+    """存活检查"""
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def readiness_check():
+    """就绪检查：报告各依赖的状态和延迟，任一必需依赖不可用时返回 503"""
+    if not readiness.is_ready:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content=readiness.to_dict(),
+        )
+
+    settings = get_settings()
+    results = await asyncio.gather(
+        *(probe.run(settings.health_check_ttl, settings.health_check_timeout) for probe in PROBES)
+    )
+    ready = all(result.ok for probe, result in zip(PROBES, results) if probe.required)
+    content = {
+        "status": "ready" if ready else "not_ready",
+        "checks": {probe.name: result.to_dict(probe.required) for probe, result in zip(PROBES, results)},
+    }
+    if not ready:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=content)
+    return content
@@ -0,0 +1,85 @@
+"""基于游标（keyset）的分页
+
+按 (排序字段, _id) 定位下一页，查询可以直接走复合索引，
+翻到很深的页也不需要 skip 扫描前面的文档。
+游标是不透明的 base64 字符串，其中记录了排序方式，排序变化后旧游标失效。
+"""
+
+import base64
+import binascii
+import json
+import math
+from datetime import datetime
+from typing import Any, Optional, Type
+
+from beanie import Document, PydanticObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException, status
+
+
+def encode_cursor(field: str, sort_order: str, document: Document) -> str:
+    """根据本页最后一条文档生成下一页游标"""
+    value = getattr(document, field)
+    if isinstance(value, datetime):
+        value = {"$date": value.isoformat()}
+    payload = {"s": field, "o": sort_order, "v": value, "id": str(document.id)}
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, field: str, sort_order: str) -> tuple[Any, PydanticObjectId]:
+    """解析游标，返回 (排序字段值, _id)
+
+    Raises:
+        HTTPException: 游标无效或与当前排序方式不一致
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if payload["s"] != field or payload["o"] != sort_order:
+            raise ValueError("sort mismatch")
+        value = payload["v"]
+        if isinstance(value, dict):
+            value = datetime.fromisoformat(value["$date"])
+        return value, PydanticObjectId(payload["id"])
+    except (binascii.Error, InvalidId, ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="无效的分页游标",
+        )
+
+
+def keyset_query(field: str, sort_order: str, value: Any, last_id: PydanticObjectId) -> dict:
+    """生成“排在游标之后”的查询条件"""
+    op = "$lt" if sort_order == "desc" else "$gt"
+    return {
+        "$or": [
+            {field: {op: value}},
+            {field: value, "_id": {op: last_id}},
+        ]
+    }
+
+
+def keyset_sort(field: str, sort_order: str) -> list[tuple[str, int]]:
+    """排序条件，_id 作为相同值时的次序"""
+    direction = -1 if sort_order == "desc" else 1
+    return [(field, direction), ("_id", direction)]
+
+
+def text_score_sort() -> list[tuple[str, dict]]:
+    """按 $text 查询的相关度降序排序"""
+    return [("score", {"$meta": "textScore"})]
+
+
+async def count_documents(model: Type[Document], query: dict) -> int:
+    """统计总数：无过滤条件时使用集合元数据中的估计值，避免全量计数"""
+    if not query:
+        return await model.get_motor_collection().estimated_document_count()
+    return await model.find(query).count()
+
+
+def total_pages(total: Optional[int], page_size: int) -> Optional[int]:
+    if total is None:
+        return None
+    return math.ceil(total / page_size) if total > 0 else 1
+
@@ -1,8 +1,13 @@
+import tempfile
 from datetime import datetime, timezone
-from typing import List
+from typing import BinaryIO, List, Optional
 
-from fastapi import APIRouter, status
+from beanie import PydanticObjectId
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from starlette.datastructures import UploadFile
 
+from app.core.config import get_settings
+from app.core.tracing import span
 from app.models import Project
 from app.schemas import (
     ProjectCreate,
@@ -10,12 +15,41 @@ from app.schemas import (
     ProjectResponse,
     ProjectListResponse,
     ShareResponse,
+    MissingAssetsRequest,
+    MissingAssetsResponse,
+)
+from app.services import (
+    InvalidProjectData,
+    decode_project_data,
+    save_project_data,
+    save_project_stream,
+    commit_project_json,
+    find_missing_assets,
+    store_named_asset,
+    invalidate_cached_content,
+    InvalidThumbnail,
+    decode_data_url,
+    save_thumbnail,
+    load_thumbnail,
+    load_project_data,
+    delete_project_data,
+    on_project_saved,
 )
-from app.services import save_project_data, load_project_data, delete_project_data
 
+from .content import (
+    is_not_modified,
+    metadata_etag,
+    not_modified_response,
+    project_content_response,
+    validator_headers,
+)
 from .deps import CurrentUser, OwnedProject
 
 router = APIRouter()
+settings = get_settings()
+
+# sb3 是 zip 文件，以本地文件头签名开始
+SB3_MAGIC = b"PK\x03\x04"
 
 
 @router.get("", response_model=List[ProjectListResponse])
@@ -39,46 +73,268 @@ async def check_project_name(title: str, current_user: CurrentUser):
 
 
 @router.post("", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
-async def create_project(data: ProjectCreate, current_user: CurrentUser):
-    """创建新项目"""
+async def create_project(
+    data: ProjectCreate,
+    current_user: CurrentUser,
+    include_data: bool = Query(False, description="响应中是否包含 projectJson"),
+):
+    """创建新项目
+
+    项目数据先校验并存入 MinIO，成功后才插入文档，无效的 sb3 不会留下空项目。
+    """
     project = Project(
+        id=PydanticObjectId(),
         title=data.title,
         description=data.description,
         owner=current_user,
     )
-    await project.insert()
 
     # 保存项目数据到 MinIO
     if data.projectJson:
-        await save_project_data(project, data.projectJson)
-        await project.save()
+        try:
+            await save_project_data(project, decode_project_data(data.projectJson))
+        except InvalidProjectData:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="无效的 sb3 文件",
+            )
+
+    await project.insert()
+    on_project_saved(project)
 
-    return await _build_project_response(project)
+    return await _build_project_response(project, include_data)
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
-async def get_project(project: OwnedProject):
-    """获取项目详情"""
-    return await _build_project_response(project)
+async def get_project(
+    project: OwnedProject,
+    request: Request,
+    response: Response,
+    include_data: bool = Query(True, description="响应中是否包含 projectJson"),
+):
+    """获取项目详情
+
+    只需要元数据时传 include_data=false，避免从 MinIO 下载项目文件。
+    支持 If-None-Match / If-Modified-Since，未变化时返回 304。
+    """
+    headers = validator_headers(metadata_etag(project, include_data), project.updated_at, public=False)
+    if is_not_modified(request, headers["ETag"], project.updated_at):
+        return not_modified_response(headers)
+
+    response.headers.update(headers)
+    return await _build_project_response(project, include_data)
+
+
+@router.get("/{project_id}/content")
+async def download_project_content(project: OwnedProject, request: Request):
+    """下载项目 sb3 文件（流式，支持 Range）"""
+    return await project_content_response(project, request)
+
+
+@router.get("/{project_id}/thumbnail/{thumbnail_hash}")
+async def get_project_thumbnail(
+    project_id: str,
+    thumbnail_hash: str,
+    size: Optional[str] = Query(None, pattern="^(sm|md)$", description="缩小的变体"),
+):
+    """获取项目缩略图
+
+    公开接口，不查询 MongoDB：URL 中的内容哈希只有能看到项目信息的客户端才知道。
+    内容变化时哈希随之改变，因此响应可以永久缓存。
+    """
+    thumbnail = await load_thumbnail(project_id, thumbnail_hash, size)
+    if thumbnail is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="缩略图不存在",
+        )
+
+    data, media_type = thumbnail
+    return Response(
+        content=data,
+        media_type=media_type,
+        headers={
+            "Cache-Control": "public, max-age=31536000, immutable",
+            "X-Content-Type-Options": "nosniff",
+        },
+    )
 
 
 @router.put("/{project_id}", response_model=ProjectResponse)
-async def update_project(project: OwnedProject, data: ProjectUpdate):
-    """更新项目"""
+async def update_project(
+    project: OwnedProject,
+    data: ProjectUpdate,
+    include_data: bool = Query(False, description="响应中是否包含 projectJson"),
+):
+    """更新项目
+
+    先解码、校验所有输入，再写入 MinIO；新写入的对象都按内容版本化，
+    保存元数据时才切换，请求失败不会改变客户端看到的项目内容。
+    """
     update_data = data.model_dump(exclude_unset=True)
+    has_project_json = "projectJson" in update_data
+    has_thumbnail = "thumbnail" in update_data
+
+    try:
+        sb3 = decode_project_data(update_data.pop("projectJson", None))
+    except InvalidProjectData:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="无效的 sb3 文件",
+        )
+    thumbnail_url = update_data.pop("thumbnail", None)
+    try:
+        thumbnail = decode_data_url(thumbnail_url) if thumbnail_url else None
+    except InvalidThumbnail:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="无效的缩略图",
+        )
 
     # 保存项目数据到 MinIO
-    if "projectJson" in update_data:
-        await save_project_data(project, update_data.pop("projectJson"))
+    if has_project_json:
+        try:
+            await save_project_data(project, sb3)
+        except InvalidProjectData:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="无效的 sb3 文件",
+            )
+
+    # 缩略图存入 MinIO
+    if has_thumbnail:
+        await save_thumbnail(project, thumbnail)
 
     # 更新其他字段
     for field, value in update_data.items():
         setattr(project, field, value)
 
     project.updated_at = datetime.now(timezone.utc)
-    await project.save()
+    await project.save_changes()
+    on_project_saved(project)
+    await invalidate_cached_content(project)
+
+    return await _build_project_response(project, include_data)
+
 
-    return await _build_project_response(project)
+@router.put("/{project_id}/content", response_model=ProjectResponse)
+async def upload_project_content(project: OwnedProject, request: Request):
+    """上传项目 sb3 文件
+
+    请求体为 application/x.scratch.sb3 原始二进制，或 multipart/form-data 的 file 字段。
+    数据按块缓冲到临时文件后流式上传到 MinIO，单个请求的内存占用有界。
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form(max_files=1, max_fields=0)
+        upload = form.get("file")
+        # request.form() 返回的是 starlette 的 UploadFile（fastapi.UploadFile 是其子类）
+        if not isinstance(upload, UploadFile):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="缺少 file 字段",
+            )
+        stream, length = upload.file, upload.size or 0
+    else:
+        stream, length = await _spool_request_body(request)
+
+    try:
+        if length > settings.project_max_size:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="项目文件过大",
+            )
+        if stream.read(len(SB3_MAGIC)) != SB3_MAGIC:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="无效的 sb3 文件",
+            )
+        stream.seek(0)
+
+        try:
+            await save_project_stream(project, stream, length)
+        except InvalidProjectData:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="无效的 sb3 文件",
+            )
+    finally:
+        stream.close()
+
+    project.updated_at = datetime.now(timezone.utc)
+    await project.save_changes()
+    on_project_saved(project)
+    await invalidate_cached_content(project)
+
+    return project.to_response()
+
+
+@router.post("/{project_id}/assets/missing", response_model=MissingAssetsResponse)
+async def check_missing_assets(project: OwnedProject, data: MissingAssetsRequest):
+    """增量保存第一步：查询资源库中缺失的资源"""
+    try:
+        missing = await find_missing_assets(project, data.assets)
+    except InvalidProjectData:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="无效的资源名",
+        )
+    return MissingAssetsResponse(missing=missing)
+
+
+@router.put("/{project_id}/assets/{md5ext}", status_code=status.HTTP_204_NO_CONTENT)
+async def upload_project_asset(project: OwnedProject, md5ext: str, request: Request):
+    """增量保存第二步：上传单个缺失的资源（原始二进制请求体）
+
+    资源按内容存储，md5 必须与名称一致。
+    """
+    stream, _ = await _spool_request_body(request)
+    try:
+        data = stream.read()
+    finally:
+        stream.close()
+
+    try:
+        await store_named_asset(md5ext, data)
+    except InvalidProjectData:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="资源内容与名称不匹配",
+        )
+
+
+@router.put("/{project_id}/project-json", response_model=ProjectResponse)
+async def commit_project(project: OwnedProject, request: Request):
+    """增量保存第三步：提交 project.json（原始 JSON 请求体）
+
+    project.json 引用的资源须已在资源库中；有缺失时返回 409 和缺失列表，
+    项目保持不变。提交成功后项目原子地切换到新版本。
+    """
+    stream, _ = await _spool_request_body(request)
+    try:
+        project_json = stream.read()
+    finally:
+        stream.close()
+
+    try:
+        missing = await commit_project_json(project, project_json)
+    except InvalidProjectData:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="无效的 project.json",
+        )
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "缺少资源，请先上传", "missing": missing},
+        )
+
+    project.updated_at = datetime.now(timezone.utc)
+    await project.save_changes()
+    on_project_saved(project)
+    await invalidate_cached_content(project)
+
+    return project.to_response()
 
 
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -86,6 +342,7 @@ async def delete_project(project: OwnedProject):
     """删除项目"""
     await delete_project_data(project)
     await project.delete()
+    await invalidate_cached_content(project)
 
 
 @router.post("/{project_id}/share", response_model=ShareResponse)
@@ -93,7 +350,7 @@ async def share_project(project: OwnedProject):
     """生成分享链接"""
     if not project.share_token:
         project.generate_share_token()
-        await project.save()
+        await project.save_changes()
 
     return ShareResponse(
         shareToken=project.share_token,
@@ -107,11 +364,51 @@ async def unshare_project(project: OwnedProject):
     project.share_token = None
     project.is_public = False
     project.updated_at = datetime.now(timezone.utc)
-    await project.save()
+    await project.save_changes()
+    await invalidate_cached_content(project)
+
+
+async def _spool_request_body(request: Request) -> tuple[BinaryIO, int]:
+    """把请求体按块写入临时文件
+
+    小文件留在内存中，超过 upload_spool_max_memory 后自动落盘。
+
+    Raises:
+        HTTPException 413: 请求体超过 project_max_size
+    """
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > settings.project_max_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="项目文件过大",
+        )
+
+    spool = tempfile.SpooledTemporaryFile(max_size=settings.upload_spool_max_memory)
+    length = 0
+    try:
+        async for chunk in request.stream():
+            length += len(chunk)
+            if length > settings.project_max_size:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail="项目文件过大",
+                )
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+
+    spool.seek(0)
+    return spool, length
+
 
+async def _build_project_response(project: Project, include_data: bool = True) -> dict:
+    """构建项目响应
 
-async def _build_project_response(project: Project) -> dict:
-    """构建项目响应，从 MinIO 加载项目数据"""
-    response = project.to_response()
-    response["projectJson"] = await load_project_data(project)
+    include_data 为 True 时从 MinIO 加载项目数据，否则 projectJson 为空。
+    """
+    with span("project.build_response", include_data=include_data):
+        response = project.to_response()
+        if include_data:
+            response["projectJson"] = await load_project_data(project)
     return response
@@ -1,19 +1,25 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
 
 from app.models import Project
 from app.schemas import ProjectResponse
-from app.services import load_project_data
+from app.services import open_shared_content, sb3_data_url, view_counter
+
+from .content import (
+    is_not_modified,
+    metadata_etag,
+    not_modified_response,
+    project_content_response,
+    validator_headers,
+)
 
 router = APIRouter()
 
 
-@router.get("/{token}", response_model=ProjectResponse)
-async def get_shared_project(token: str):
-    """通过分享 token 获取项目（公开接口，无需登录）"""
+async def _get_shared_project_or_404(token: str) -> Project:
+    """通过分享 token 查找公开项目（不加载 owner 关联）"""
     project = await Project.find_one(
         Project.share_token == token,
         Project.is_public == True,
-        fetch_links=True,
     )
 
     if project is None:
@@ -21,12 +27,53 @@ async def get_shared_project(token: str):
             status_code=status.HTTP_404_NOT_FOUND,
             detail="分享链接不存在或已失效",
         )
+    return project
+
+
+def _visitor_key(request: Request) -> str:
+    """访客标识（IP + User-Agent），用于短时间内的重复浏览去重"""
+    ip = request.headers.get("x-real-ip") or (request.client.host if request.client else "")
+    return f"{ip}|{request.headers.get('user-agent', '')}"
+
+
+@router.get("/{token}", response_model=ProjectResponse)
+async def get_shared_project(
+    token: str,
+    request: Request,
+    response: Response,
+    include_data: bool = Query(True, description="响应中是否包含 projectJson"),
+):
+    """通过分享 token 获取项目（公开接口，无需登录）
+
+    支持 If-None-Match / If-Modified-Since，未变化时返回 304，不访问 MinIO。
+    """
+    project = await _get_shared_project_or_404(token)
+
+    # 增加浏览次数（缓冲后批量落库）
+    view_counter.record(project.id, _visitor_key(request))
 
-    # 增加浏览次数
-    project.view_count += 1
-    await project.save()
+    headers = validator_headers(metadata_etag(project, include_data), project.updated_at, public=True)
+    if is_not_modified(request, headers["ETag"], project.updated_at):
+        return not_modified_response(headers)
+    response.headers.update(headers)
 
-    # 构建响应，从 MinIO 加载项目数据
-    response = project.to_response()
-    response["projectJson"] = await load_project_data(project)
-    return response
+    # 构建响应，优先从缓存加载项目数据
+    data = project.to_response()
+    data["viewCount"] += view_counter.pending(project.id)
+    if include_data:
+        content = await open_shared_content(project)
+        if content is not None:
+            try:
+                data["projectJson"] = sb3_data_url(await content.read_all())
+            finally:
+                content.close()
+    return data
+
+
+@router.get("/{token}/content")
+async def get_shared_project_content(token: str, request: Request):
+    """通过分享 token 下载项目 sb3 文件（流式，支持 Range）"""
+    project = await _get_shared_project_or_404(token)
+    return await project_content_response(
+        project, request, open_shared_content, public=True
+    )
@@ -0,0 +1,111 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """进程内 LRU 缓存
+
+    可同时按条目数、总字节数和 TTL 限制。只在事件循环线程中使用，不加锁。
+    """
+
+    def __init__(
+        self,
+        max_items: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        sizeof: Optional[Callable[[V], int]] = None,
+    ):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._sizeof = sizeof or (lambda value: 1)
+        # key -> (value, size, expires_at)
+        self._entries: OrderedDict[K, tuple[V, int, Optional[float]]] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: K) -> bool:
+        return self._lookup(key) is not None
+
+    def get(self, key: K, validate: Optional[Callable[[V], bool]] = None) -> Optional[V]:
+        """获取缓存值，不存在或已过期时返回 None
+
+        validate 返回 False 的值视为过期，删除并计为未命中。
+        """
+        entry = self._lookup(key)
+        if entry is not None and validate is not None and not validate(entry[0]):
+            self.delete(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        """写入缓存，超出上限时淘汰最久未使用的条目
+
+        单个值超过 max_bytes 时不缓存。
+        """
+        size = self._sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            self.delete(key)
+            return
+
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+
+        self.delete(key)
+        self._entries[key] = (value, size, expires_at)
+        self._bytes += size
+        self._evict()
+
+    def delete(self, key: K) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        """命中统计"""
+        total = self.hits + self.misses
+        return {
+            "items": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+    def _lookup(self, key: K) -> Optional[tuple[V, int, Optional[float]]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[2] is not None and entry[2] <= time.monotonic():
+            self.delete(key)
+            return None
+        return entry
+
+    def _evict(self) -> None:
+        while self._entries and (
+            (self.max_items is not None and len(self._entries) > self.max_items)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            _, (_, size, _) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
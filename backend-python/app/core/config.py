@@ -6,7 +6,20 @@ class Settings(BaseSettings):
     # Server
     host: str = "0.0.0.0"
     port: int = 3001
-    debug: bool = True
+    debug: bool = False  # 开发模式：单进程 + 热重载，并开启慢查询报告
+    workers: int = 0  # 生产模式的工作进程数，0 表示 CPU 核数
+    backlog: int = 2048  # 等待 accept 的连接队列长度
+    keep_alive_timeout: int = 75  # 秒，需大于 nginx upstream 的 keepalive_timeout（60）
+    run_startup_tasks: bool = True  # 启动时创建 bucket、初始化管理员；多进程模式下由 run.py 主进程执行
+    startup_lock_ttl: int = 60  # 启动任务锁的过期时间（秒），持有者崩溃后自动释放
+    shutdown_drain_seconds: float = 5.0  # 收到 SIGTERM 后继续处理请求、就绪检查失败的秒数
+    health_check_ttl: float = 2.0  # 就绪检查结果的缓存时间（秒）
+    health_check_timeout: float = 2.0  # 单个依赖检查的超时（秒）
+    metrics_enabled: bool = True  # 导出 /metrics（Prometheus），nginx 不对外代理此路径
+    slow_query_ms: int = 100  # 调试模式下超过此耗时的查询记录警告
+    tracing_sample_rate: float = 0.0  # 记录 span 树的请求比例（0 ~ 1），0 表示关闭追踪
+    tracing_exporter: str = "file"  # file：写 OTLP/JSON 文件；memory：保存在内存中（测试用）
+    tracing_export_path: str = "traces-{pid}.jsonl"  # {pid} 替换为进程号，多进程时各写各的文件
 
     # MongoDB
     mongodb_url: str = "mongodb://localhost:27017"
@@ -14,11 +27,21 @@ class Settings(BaseSettings):
 
     # Redis
     redis_url: str = "redis://localhost:6379"
+    redis_timeout: float = 0.5  # 秒，Redis 只做缓存，宁可降级也不要拖慢请求
+    redis_retry_interval: int = 30  # 出错后暂停使用 Redis 的秒数
 
     # JWT
     jwt_secret: str = "your-super-secret-jwt-key-change-in-production"
     jwt_algorithm: str = "HS256"
     jwt_expire_days: int = 7
+    token_cache_max_items: int = 10_000  # 已校验 token 的缓存条目数
+    token_revocation_cache_ttl: int = 30  # 确认“未吊销”的结果在进程内缓存的秒数
+
+    # 密码哈希
+    bcrypt_rounds: int = 12  # bcrypt cost，每加 1 计算时间翻倍；已有哈希不受影响
+    password_hash_workers: int = 4  # bcrypt 线程数
+    password_hash_queue_size: int = 64  # 超过 workers + queue_size 个请求时返回 503
+    password_hash_retry_after: int = 2  # 503 响应的 Retry-After（秒）
 
     # MinIO
     minio_endpoint: str = "localhost:9000"
@@ -26,6 +49,32 @@ class Settings(BaseSettings):
     minio_secret_key: str = "minioadmin"
     minio_bucket: str = "scratch-assets"
     minio_secure: bool = False
+    minio_pool_size: int = 16  # urllib3 连接池大小
+    minio_timeout: int = 300  # 连接/读取超时（秒）
+    storage_max_concurrency: int = 16  # 同时进行的 MinIO 请求数（线程池大小）
+
+    # 分享项目缓存
+    share_cache_enabled: bool = True
+    share_cache_max_bytes: int = 256 * 1024 * 1024  # 进程内缓存总大小
+    share_cache_max_entry_bytes: int = 20 * 1024 * 1024  # 超过此大小的项目不缓存
+    share_cache_ttl: int = 3600  # 秒
+
+    # 登录用户缓存
+    user_cache_enabled: bool = True
+    user_cache_ttl: int = 30  # 秒，禁用或删除账号后最长在此时间内失效
+    user_cache_max_items: int = 10_000
+
+    # 分享浏览计数
+    view_flush_interval: float = 10.0  # 批量落库间隔（秒）
+    view_dedup_window: float = 30.0  # 同一访客重复刷新不计数的窗口（秒）
+    view_dedup_max_entries: int = 100_000
+
+    # 项目上传
+    project_max_size: int = 50 * 1024 * 1024  # 与 nginx client_max_body_size 保持一致
+    project_max_unpacked_size: int = 200 * 1024 * 1024  # sb3 解压后的大小上限
+    upload_chunk_size: int = 1024 * 1024  # 流式读写的分块大小
+    upload_spool_max_memory: int = 1024 * 1024  # 超过后缓冲到临时文件
+    replaced_object_grace_seconds: int = 60  # 保存后旧版本 project.json / sb3 保留的秒数，正在读取旧版本的请求不受影响
 
     class Config:
         env_file = ".env"
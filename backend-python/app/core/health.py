@@ -0,0 +1,80 @@
+"""依赖健康检查
+
+就绪检查需要确认 MongoDB、MinIO 等依赖可用。每个依赖的检查结果缓存 ttl 秒，
+同时到达的探测请求共享同一次检查，频繁的探测不会给依赖增加负载。
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+
+@dataclass
+class ProbeResult:
+    """一次依赖检查的结果"""
+
+    ok: bool
+    latency_ms: float
+    checked_at: float
+    error: Optional[str] = None
+
+    def to_dict(self, required: bool) -> dict:
+        result = {
+            "ok": self.ok,
+            "required": required,
+            "latencyMs": round(self.latency_ms, 1),
+            "ageMs": round((time.monotonic() - self.checked_at) * 1000),
+        }
+        if self.error:
+            result["error"] = self.error
+        return result
+
+
+class DependencyProbe:
+    """带缓存的依赖检查
+
+    check 正常返回表示可用，抛出异常或超时表示不可用。
+    required=False 的依赖（如只做缓存的 Redis）只报告状态，不影响就绪。
+    超时只是不再等待，在线程中执行的检查不会被中止，check 自身需要有相近的超时。
+    """
+
+    def __init__(self, name: str, check: Callable[[], Awaitable[None]], required: bool = True):
+        self.name = name
+        self.required = required
+        self._check = check
+        self._result: Optional[ProbeResult] = None
+        self._pending: Optional[asyncio.Task] = None
+
+    async def run(self, ttl: float, timeout: float) -> ProbeResult:
+        """返回 ttl 秒内的缓存结果，否则执行一次检查"""
+        result = self._result
+        if result is not None and time.monotonic() - result.checked_at < ttl:
+            return result
+
+        if self._pending is None:
+            self._pending = asyncio.create_task(self._probe(timeout))
+            self._pending.add_done_callback(self._clear_pending)
+        # 一个探测请求被取消时不影响共享同一检查的其他请求
+        return await asyncio.shield(self._pending)
+
+    def _clear_pending(self, task: asyncio.Task) -> None:
+        self._pending = None
+
+    async def _probe(self, timeout: float) -> ProbeResult:
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(self._check(), timeout)
+            error = None
+        except asyncio.TimeoutError:
+            error = f"timed out after {timeout}s"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        now = time.monotonic()
+        self._result = ProbeResult(
+            ok=error is None,
+            latency_ms=(now - start) * 1000,
+            checked_at=now,
+            error=error,
+        )
+        return self._result
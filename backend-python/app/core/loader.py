@@ -0,0 +1,72 @@
+"""请求范围内的文档加载器
+
+同一个请求中的多个依赖经常需要同一份文档（例如当前用户和项目作者）。
+DocumentLoader 为每个请求维护一份 identity map：
+- 同一 (模型, id) 只查询一次，之后直接返回同一个实例
+- 同一轮事件循环中发起的加载合并成一次 {_id: {$in: [...]}} 查询
+"""
+
+import asyncio
+from typing import Optional, Type, TypeVar
+
+from beanie import Document, PydanticObjectId
+
+D = TypeVar("D", bound=Document)
+
+
+class DocumentLoader:
+    """按 id 去重、批量加载 Beanie 文档"""
+
+    def __init__(self):
+        self._documents: dict[tuple[type, PydanticObjectId], Optional[Document]] = {}
+        self._futures: dict[tuple[type, PydanticObjectId], asyncio.Future] = {}
+        self._batches: dict[type, set[PydanticObjectId]] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def prime(self, document: Document) -> None:
+        """把已经加载的文档放入 identity map"""
+        self._documents[(type(document), document.id)] = document
+
+    async def load(self, model: Type[D], doc_id: PydanticObjectId) -> Optional[D]:
+        """加载单个文档，不存在时返回 None"""
+        key = (model, doc_id)
+        if key in self._documents:
+            return self._documents[key]
+
+        future = self._futures.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._futures[key] = future
+            batch = self._batches.setdefault(model, set())
+            if not batch:
+                # 本轮事件循环结束后统一查询
+                task = asyncio.create_task(self._dispatch(model))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            batch.add(doc_id)
+
+        # 一个调用方被取消时不影响等待同一文档的其他调用方
+        return await asyncio.shield(future)
+
+    async def load_many(self, model: Type[D], doc_ids: list[PydanticObjectId]) -> list[Optional[D]]:
+        """批量加载文档，按 doc_ids 的顺序返回"""
+        return list(await asyncio.gather(*(self.load(model, doc_id) for doc_id in doc_ids)))
+
+    async def _dispatch(self, model: type) -> None:
+        doc_ids = self._batches.pop(model, set())
+        try:
+            documents = await model.find({"_id": {"$in": list(doc_ids)}}).to_list()
+        except Exception as e:
+            for doc_id in doc_ids:
+                future = self._futures.pop((model, doc_id))
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        found = {document.id: document for document in documents}
+        for doc_id in doc_ids:
+            document = found.get(doc_id)
+            self._documents[(model, doc_id)] = document
+            future = self._futures.pop((model, doc_id))
+            if not future.done():
+                future.set_result(document)
@@ -0,0 +1,60 @@
+"""基于 MongoDB 的跨进程锁
+
+多进程、多实例部署时，保证启动任务等操作同一时间只在一个进程中执行。
+锁是 locks 集合中以锁名为 _id 的文档；持有者崩溃时锁在 ttl 秒后过期，可被其他进程获取。
+"""
+
+import asyncio
+import os
+import socket
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+
+LOCK_COLLECTION = "locks"
+
+
+class LockTimeout(Exception):
+    """等待锁超时"""
+
+
+@asynccontextmanager
+async def mongo_lock(
+    database: AsyncIOMotorDatabase,
+    name: str,
+    ttl: float,
+    timeout: float,
+    poll_interval: float = 0.5,
+) -> AsyncIterator[None]:
+    """获取名为 name 的锁，最多等待 timeout 秒
+
+    Raises:
+        LockTimeout: 锁一直被其他进程持有
+    """
+    collection = database[LOCK_COLLECTION]
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    deadline = time.monotonic() + timeout
+
+    while True:
+        now = datetime.now(timezone.utc)
+        try:
+            # 锁不存在或已过期时获取；否则 upsert 插入同一 _id 失败
+            await collection.update_one(
+                {"_id": name, "expires_at": {"$lt": now}},
+                {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=ttl)}},
+                upsert=True,
+            )
+            break
+        except DuplicateKeyError:
+            if time.monotonic() >= deadline:
+                raise LockTimeout(f"Lock {name!r} is held by another process")
+            await asyncio.sleep(poll_interval)
+
+    try:
+        yield
+    finally:
+        await collection.delete_one({"_id": name, "owner": owner})
@@ -0,0 +1,194 @@
+"""Prometheus 指标
+
+/metrics 以 Prometheus 文本格式导出：
+- HTTP 请求耗时、请求 / 响应大小（按路由模板，如 /api/projects/{project_id}）和进行中的请求数
+- MinIO 每种操作的耗时（StorageService._run）
+- MongoDB 每种命令的耗时（CommandListener）
+- 保存项目时的 sb3 大小分布
+
+多进程模式下（run.py 设置 PROMETHEUS_MULTIPROC_DIR）各工作进程把指标写入共享目录，
+/metrics 汇总所有进程的数据。
+"""
+
+import os
+import time
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from pymongo import monitoring
+
+# 字节大小的分桶：1KB ~ 64MB
+SIZE_BUCKETS = tuple(1024 * 4**i for i in range(9))
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP 请求耗时",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_SIZE = Histogram(
+    "http_request_size_bytes",
+    "HTTP 请求体大小",
+    ["method", "route"],
+    buckets=SIZE_BUCKETS,
+)
+HTTP_RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "HTTP 响应体大小",
+    ["method", "route"],
+    buckets=SIZE_BUCKETS,
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "正在处理的 HTTP 请求数",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+STORAGE_OPERATION_DURATION = Histogram(
+    "storage_operation_duration_seconds",
+    "MinIO 操作耗时",
+    ["operation", "outcome"],
+)
+MONGO_COMMAND_DURATION = Histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB 命令耗时",
+    ["command", "collection", "outcome"],
+)
+PROJECT_SB3_SIZE = Histogram(
+    "project_sb3_size_bytes",
+    "保存项目时上传的 sb3 大小",
+    buckets=SIZE_BUCKETS,
+)
+
+# 不统计的路径（指标和健康检查本身）
+_EXCLUDED_PATHS = ("/metrics", "/health")
+
+
+def route_template(scope: dict) -> Optional[str]:
+    """请求对应的路由模板（如 /api/projects/{project_id}），没有匹配的路由时返回 None
+
+    由实际路径和 path_params 还原，不依赖路由对象的内部结构
+    （新版 FastAPI 中 scope["route"].path 不包含 include_router 的前缀）。
+    """
+    if scope.get("route") is None:
+        return None
+    path = scope.get("path", "")
+    params = scope.get("path_params")
+    if not params:
+        return path
+    names = {str(value): name for name, value in params.items()}
+    return "/".join(
+        f"{{{names[segment]}}}" if segment in names else segment for segment in path.split("/")
+    )
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """生成 /metrics 的响应内容和 Content-Type"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """工作进程退出时清理其 livesum 类型的指标"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class MetricsMiddleware:
+    """记录 HTTP 请求的耗时、大小和进行中的数量"""
+
+    def __init__(self, app):
+        self.app = app
+        # labels() 每次都要查找子指标，按 (method, route, status) 缓存以减少请求路径上的开销
+        self._children: dict[tuple[str, str, str], tuple] = {}
+
+    def _labels(self, method: str, route: str, status: str) -> tuple:
+        key = (method, route, status)
+        children = self._children.get(key)
+        if children is None:
+            children = (
+                HTTP_REQUEST_DURATION.labels(method, route, status),
+                HTTP_REQUEST_SIZE.labels(method, route),
+                HTTP_RESPONSE_SIZE.labels(method, route),
+            )
+            self._children[key] = children
+        return children
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(_EXCLUDED_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        request_size = response_size = 0
+        status = 500
+
+        async def receive_wrapper():
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                request_size += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            nonlocal response_size, status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            # 路由匹配后 scope 中有 route；未匹配的请求归为一类，避免标签数量失控
+            route = route_template(scope) or "unmatched"
+            duration, request_sizes, response_sizes = self._labels(method, route, str(status))
+            duration.observe(elapsed)
+            request_sizes.observe(request_size)
+            response_sizes.observe(response_size)
+
+
+class MongoMetricsListener(monitoring.CommandListener):
+    """按命令和集合统计 MongoDB 命令耗时"""
+
+    def __init__(self):
+        # (connection_id, request_id) -> (command, collection)
+        self._started: dict[tuple, tuple[str, str]] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        # getMore 的第一个字段是游标 id，集合名在 collection 字段
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = event.command.get("collection")
+        if not isinstance(collection, str):
+            collection = ""
+        self._started[(event.connection_id, event.request_id)] = (event.command_name, collection)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._observe(event, "success")
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._observe(event, "error")
+
+    def _observe(self, event, outcome: str) -> None:
+        entry = self._started.pop((event.connection_id, event.request_id), None)
+        if entry is not None:
+            command, collection = entry
+            MONGO_COMMAND_DURATION.labels(command, collection, outcome).observe(
+                event.duration_micros / 1_000_000
+            )
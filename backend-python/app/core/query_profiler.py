@@ -0,0 +1,172 @@
+"""慢查询与全表扫描报告（仅调试模式）
+
+通过 pymongo 的 CommandListener 记录请求中执行的读查询：
+- 耗时超过 slow_query_ms 的查询直接记录警告
+- 每种查询形状（集合 + 过滤/排序字段）在每个路由上 explain 一次，
+  执行计划中出现 COLLSCAN 时记录警告
+
+监听器在 Motor 的线程池中回调，只负责把查询放入队列；
+explain 由后台任务在事件循环中执行，不影响请求本身。
+"""
+
+import asyncio
+import logging
+import queue
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from pymongo.errors import PyMongoError
+
+from .cache import LRUCache
+from .metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+# 可以 explain 的读命令
+_EXPLAINABLE = {"find", "aggregate", "count", "distinct"}
+# explain 时需要去掉的会话 / 驱动字段
+_DRIVER_FIELDS = {"lsid", "txnNumber", "autocommit", "startTransaction"}
+
+# 当前请求的 ASGI scope，路由匹配后其中会有 route
+_current_scope: ContextVar[Optional[dict]] = ContextVar("query_profiler_scope", default=None)
+
+
+class QueryProfilerMiddleware:
+    """记录当前请求，供 QueryProfiler 关联查询和路由"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_scope.reset(token)
+
+
+class QueryProfiler(monitoring.CommandListener):
+    """慢查询和 COLLSCAN 报告"""
+
+    def __init__(self, slow_query_ms: float):
+        self.slow_query_ms = slow_query_ms
+        # (connection_id, request_id) -> (scope, database, command)
+        self._started: dict[tuple, tuple[dict, str, dict]] = {}
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._explained: LRUCache[str, bool] = LRUCache(max_items=10_000)
+        self._task: Optional[asyncio.Task] = None
+
+    # ===== CommandListener（在驱动线程中调用）=====
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if event.command_name not in _EXPLAINABLE:
+            return
+        scope = _current_scope.get()
+        if scope is None:
+            return
+        key = (event.connection_id, event.request_id)
+        self._started[key] = (scope, event.database_name, dict(event.command))
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        entry = self._started.pop((event.connection_id, event.request_id), None)
+        if entry is not None:
+            scope, database, command = entry
+            self._queue.put((_route_name(scope), database, command, event.duration_micros / 1000))
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._started.pop((event.connection_id, event.request_id), None)
+
+    # ===== 后台分析 =====
+
+    def start(self, client: AsyncIOMotorClient) -> None:
+        """启动后台分析任务"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(client))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, client: AsyncIOMotorClient) -> None:
+        while True:
+            await asyncio.sleep(1)
+            while not self._queue.empty():
+                route, database, command, duration_ms = self._queue.get_nowait()
+                try:
+                    await self._analyze(client, route, database, command, duration_ms)
+                except Exception as e:
+                    logger.warning(f"Query profiler failed: {e}")
+
+    async def _analyze(
+        self,
+        client: AsyncIOMotorClient,
+        route: str,
+        database: str,
+        command: dict,
+        duration_ms: float,
+    ) -> None:
+        name = next(iter(command))
+        summary = f"{name} {command[name]} {_shape(_query_part(command))}"
+
+        if duration_ms >= self.slow_query_ms:
+            logger.warning(f"Slow query ({duration_ms:.1f}ms) in {route}: {summary}")
+
+        key = f"{route}|{database}|{summary}"
+        if key in self._explained:
+            return
+        self._explained.set(key, True)
+
+        explain = {k: v for k, v in command.items() if not k.startswith("$") and k not in _DRIVER_FIELDS}
+        try:
+            plan = await client[database].command({"explain": explain, "verbosity": "queryPlanner"})
+        except PyMongoError as e:
+            logger.debug(f"Explain failed for {summary}: {e}")
+            return
+
+        if _has_stage(plan, "COLLSCAN"):
+            logger.warning(f"COLLSCAN in {route}: {summary}")
+
+
+def _route_name(scope: dict) -> str:
+    path = route_template(scope) or scope.get("path", "")
+    return f"{scope.get('method', '')} {path}"
+
+
+def _query_part(command: dict) -> dict:
+    """查询中决定执行计划的部分"""
+    return {
+        key: command[key]
+        for key in ("filter", "query", "sort", "key", "pipeline")
+        if key in command
+    }
+
+
+def _shape(value: Any) -> Any:
+    """去掉具体取值，只保留查询结构"""
+    if isinstance(value, dict):
+        return {key: _shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_shape(item) for item in value[:1]]
+    return "?"
+
+
+def _has_stage(plan: Any, stage: str) -> bool:
+    """递归查找执行计划中的某个阶段"""
+    if isinstance(plan, dict):
+        if plan.get("stage") == stage:
+            return True
+        return any(_has_stage(value, stage) for value in plan.values())
+    if isinstance(plan, list):
+        return any(_has_stage(item, stage) for item in plan)
+    return False
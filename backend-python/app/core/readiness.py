@@ -0,0 +1,131 @@
+"""启动阶段计时与就绪状态
+
+应用启动后立即开始接受连接，MongoDB、MinIO 等依赖在后台并发初始化：
+- 每个启动阶段的耗时记录在 readiness.phases 中，并写入日志
+- 初始化完成前状态为 starting，/api 请求直接返回 503，健康检查接口报告当前状态
+- 收到 SIGTERM 后先进入 draining：继续处理请求，但就绪检查失败，
+  负载均衡摘除本实例后再开始关闭
+- 关闭时状态变为 stopping
+"""
+
+import asyncio
+import logging
+import signal
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from starlette.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+STARTING = "starting"
+READY = "ready"
+DRAINING = "draining"
+STOPPING = "stopping"
+
+
+class Readiness:
+    """应用的就绪状态：starting → ready → draining → stopping"""
+
+    def __init__(self):
+        self.state = STARTING
+        self.error: Optional[str] = None
+        self.phases: dict[str, float] = {}
+        self.startup_ms: Optional[float] = None
+        self._started = time.perf_counter()
+
+    @property
+    def is_ready(self) -> bool:
+        return self.state == READY
+
+    def record(self, name: str, elapsed_ms: float) -> None:
+        self.phases[name] = round(elapsed_ms, 1)
+        logger.info(f"Startup phase {name}: {elapsed_ms:.1f}ms")
+
+    @asynccontextmanager
+    async def phase(self, name: str) -> AsyncIterator[None]:
+        """记录一个启动阶段的耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000)
+
+    def mark_ready(self) -> None:
+        self.startup_ms = round((time.perf_counter() - self._started) * 1000, 1)
+        self.state = READY
+        self.error = None
+        logger.info(f"Application ready in {self.startup_ms}ms")
+
+    def mark_failed(self, error: Exception) -> None:
+        """初始化失败（仍为 starting，等待重试）"""
+        self.error = str(error)
+
+    def mark_draining(self) -> None:
+        self.state = DRAINING
+
+    def mark_stopping(self) -> None:
+        self.state = STOPPING
+
+    def to_dict(self) -> dict:
+        result = {"status": self.state, "startupMs": self.startup_ms, "phases": self.phases}
+        if self.error:
+            result["error"] = self.error
+        return result
+
+
+readiness = Readiness()
+
+
+def install_drain_handler(drain_seconds: float) -> None:
+    """收到 SIGTERM 后先进入 draining，drain_seconds 秒后再交给 uvicorn 关闭
+
+    需要在 uvicorn 安装信号处理之后（lifespan 中）调用；再次收到 SIGTERM 时立即关闭。
+    """
+    if drain_seconds <= 0 or threading.current_thread() is not threading.main_thread():
+        return
+    previous = signal.getsignal(signal.SIGTERM)
+    if not callable(previous):
+        return
+    loop = asyncio.get_running_loop()
+
+    def handle_sigterm(signum, frame) -> None:
+        # 尚未就绪（没有流量需要摘除）或再次收到信号时立即关闭
+        if readiness.state != READY:
+            previous(signum, frame)
+            return
+        readiness.mark_draining()
+        logger.info(f"SIGTERM received, draining for {drain_seconds}s before shutdown")
+        loop.call_soon_threadsafe(loop.call_later, drain_seconds, previous, signum, frame)
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+
+class ReadinessMiddleware:
+    """初始化完成前（以及关闭过程中）API 请求快速返回 503
+
+    draining 期间仍正常处理请求。
+    """
+
+    def __init__(self, app, prefix: str = "/api"):
+        self.app = app
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] == "http"
+            and readiness.state in (STARTING, STOPPING)
+            and scope["path"].startswith(self.prefix)
+        ):
+            detail = "服务正在关闭" if readiness.state == STOPPING else "服务启动中，请稍后重试"
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": detail},
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
@@ -0,0 +1,51 @@
+"""共享的 Redis 客户端
+
+Redis 只作为缓存和辅助存储使用，不可用时调用方应降级而不是报错。
+连接出错后在 redis_retry_interval 秒内 get_redis() 返回 None，避免每个请求都等待超时。
+"""
+
+import logging
+import time
+from typing import Optional
+
+from redis.asyncio import Redis
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[Redis] = None
+_unavailable_until = 0.0
+
+
+def get_redis() -> Optional[Redis]:
+    """获取 Redis 客户端，未配置或暂时不可用时返回 None"""
+    global _client
+    settings = get_settings()
+    if not settings.redis_url:
+        return None
+    if time.monotonic() < _unavailable_until:
+        return None
+
+    if _client is None:
+        _client = Redis.from_url(
+            settings.redis_url,
+            socket_timeout=settings.redis_timeout,
+            socket_connect_timeout=settings.redis_timeout,
+        )
+    return _client
+
+
+def report_redis_error(error: Exception) -> None:
+    """记录 Redis 错误，并在一段时间内停止使用 Redis"""
+    global _unavailable_until
+    settings = get_settings()
+    _unavailable_until = time.monotonic() + settings.redis_retry_interval
+    logger.warning(f"Redis unavailable, retry in {settings.redis_retry_interval}s: {error}")
+
+
+async def close_redis() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,56 @@
+"""基于 n-gram 的文本搜索
+
+MongoDB 的文本索引按空白和标点分词，中文标题整句是一个词，无法按子串搜索。
+保存文档时把可搜索的字段切成单字和相邻两字（bigram），以空格连接后存入
+search_text 字段，再在该字段上建 language=none 的文本索引：
+- 搜索词同样切成 n-gram，每个 n-gram 作为一个短语，全部命中才算匹配（近似子串匹配）
+- 结果可以按 textScore 排序
+- 用户输入不会被当作正则表达式解释
+"""
+
+import re
+import unicodedata
+from typing import Optional
+
+# 每个字段参与索引的最大字符数，避免超长描述撑大索引
+MAX_INDEXED_CHARS = 500
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def _tokens(text: str) -> list[str]:
+    text = unicodedata.normalize("NFKC", text).lower()
+    return _TOKEN_RE.findall(text)
+
+
+def normalize_name(name: str) -> str:
+    """名称（角色名、扩展 id 等）统一为 NFKC 小写，存储和查询时同样处理"""
+    return unicodedata.normalize("NFKC", name).strip().lower()
+
+
+def build_search_text(*values: Optional[str]) -> str:
+    """生成存储用的 n-gram 文本"""
+    grams: dict[str, None] = {}
+    for value in values:
+        if not value:
+            continue
+        for token in _tokens(value[:MAX_INDEXED_CHARS]):
+            for char in token:
+                grams[char] = None
+            for i in range(len(token) - 1):
+                grams[token[i : i + 2]] = None
+    return " ".join(grams)
+
+
+def build_text_query(search: str) -> Optional[str]:
+    """把搜索词转为 $text 查询字符串，没有可搜索内容时返回 None"""
+    grams: dict[str, None] = {}
+    for token in _tokens(search):
+        if len(token) == 1:
+            grams[token] = None
+        for i in range(len(token) - 1):
+            grams[token[i : i + 2]] = None
+    if not grams:
+        return None
+    # 每个 n-gram 作为短语，要求全部出现
+    return " ".join(f'"{gram}"' for gram in grams)
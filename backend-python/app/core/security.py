@@ -1,30 +1,101 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Callable, Optional, TypeVar
 
 import bcrypt
 from jose import JWTError, jwt
 
+from .cache import LRUCache
 from .config import get_settings
+from .tracing import span
 
 settings = get_settings()
 
+T = TypeVar("T")
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """验证密码"""
+# bcrypt 每次计算耗时 100ms 以上，放到独立线程池执行，避免阻塞事件循环。
+# bcrypt 计算时会释放 GIL，多个线程可以并行。
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="bcrypt",
+)
+_password_in_flight = 0
+
+
+class PasswordHasherBusy(Exception):
+    """密码计算排队已满，应返回 503 让客户端稍后重试"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Password hasher is saturated")
+        self.retry_after = retry_after
+
+
+async def _run_password_task(func: Callable[..., T], *args) -> T:
+    """在密码线程池中执行，排队数超过上限时立即拒绝"""
+    global _password_in_flight
+    limit = settings.password_hash_workers + settings.password_hash_queue_size
+    if _password_in_flight >= limit:
+        raise PasswordHasherBusy(settings.password_hash_retry_after)
+
+    _password_in_flight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        with span(f"bcrypt.{func.__name__.lstrip('_')}"):
+            return await loop.run_in_executor(_password_executor, func, *args)
+    finally:
+        _password_in_flight -= 1
+
+
+def _checkpw(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(
         plain_password.encode("utf-8"),
         hashed_password.encode("utf-8"),
     )
 
 
-def hash_password(password: str) -> str:
-    """哈希密码"""
-    salt = bcrypt.gensalt()
+def _hashpw(password: str) -> str:
+    salt = bcrypt.gensalt(rounds=settings.bcrypt_rounds)
     return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
 
 
-def create_access_token(user_id: str, expires_delta: Optional[timedelta] = None) -> str:
-    """创建 JWT token"""
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """验证密码
+
+    Raises:
+        PasswordHasherBusy: 线程池排队已满
+    """
+    return await _run_password_task(_checkpw, plain_password, hashed_password)
+
+
+async def hash_password(password: str) -> str:
+    """哈希密码（cost 由 bcrypt_rounds 配置）
+
+    Raises:
+        PasswordHasherBusy: 线程池排队已满
+    """
+    return await _run_password_task(_hashpw, password)
+
+
+def create_access_token(
+    user_id: str,
+    expires_delta: Optional[timedelta] = None,
+    version: int = 0,
+) -> str:
+    """创建 JWT token
+
+    Args:
+        user_id: 用户 ID
+        expires_delta: 有效期，默认 jwt_expire_days 天
+        version: 用户的 token_version，用户被禁用等情况下递增以使旧 token 失效
+    """
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
@@ -34,18 +105,125 @@ def create_access_token(user_id: str, expires_delta: Optional[timedelta] = None)
         "sub": user_id,
         "exp": expire,
         "iat": datetime.now(timezone.utc),
+        "jti": secrets.token_urlsafe(12),
+        "ver": version,
     }
 
     return jwt.encode(to_encode, settings.jwt_secret, algorithm=settings.jwt_algorithm)
 
 
+@dataclass(frozen=True)
+class TokenClaims:
+    """已验证的 token 声明"""
+
+    user_id: str
+    expires_at: float  # exp，Unix 时间戳
+    # jti，用于吊销单个 token；旧 token 没有 jti 时为 token 摘要
+    token_id: str
+    # ver，与用户的 token_version 比较；旧 token 视为 0
+    version: int = 0
+    issued_at: Optional[float] = None
+
+
+# HMAC 签名算法直接用标准库校验，耗时约为 python-jose 的一半（见 benchmarks/jwt_decode.py）
+_HMAC_ALGORITHMS = {
+    "HS256": hashlib.sha256,
+    "HS384": hashlib.sha384,
+    "HS512": hashlib.sha512,
+}
+# 校验失败的 token 缓存时间（秒）
+_INVALID_TOKEN_TTL = 300
+_INVALID = object()
+
+# token 摘要 -> TokenClaims 或 _INVALID，有效 token 缓存到过期为止
+_token_cache: LRUCache[bytes, object] = LRUCache(max_items=settings.token_cache_max_items)
+
+
+def decode_token(token: str) -> Optional[TokenClaims]:
+    """校验 JWT token，返回声明；无效或已过期时返回 None
+
+    校验结果（包括失败）按 token 摘要缓存，同一个 token 只做一次签名校验。
+    """
+    key = hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+    now = time.time()
+
+    cached = _token_cache.get(key)
+    if cached is _INVALID:
+        return None
+    if cached is not None:
+        return cached if cached.expires_at > now else None
+
+    claims = _verify_token(token, key)
+    if claims is None or claims.expires_at <= now:
+        _token_cache.set(key, _INVALID, ttl=_INVALID_TOKEN_TTL)
+        return None
+
+    _token_cache.set(key, claims, ttl=claims.expires_at - now)
+    return claims
+
+
 def decode_access_token(token: str) -> Optional[str]:
     """解码 JWT token，返回 user_id"""
+    claims = decode_token(token)
+    return claims.user_id if claims else None
+
+
+def get_token_cache_stats() -> dict:
+    """token 缓存命中统计"""
+    return _token_cache.stats()
+
+
+def _verify_token(token: str, digest: bytes) -> Optional[TokenClaims]:
+    if settings.jwt_algorithm in _HMAC_ALGORITHMS:
+        payload = _verify_hmac_jwt(token)
+    else:
+        try:
+            payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
+        except JWTError:
+            payload = None
+
+    if not isinstance(payload, dict):
+        return None
+    user_id = payload.get("sub")
+    expires_at = payload.get("exp")
+    issued_at = payload.get("iat")
+    token_id = payload.get("jti") or digest.hex()
+    version = payload.get("ver", 0)
+    if not isinstance(user_id, str) or not isinstance(expires_at, (int, float)):
+        return None
+    if issued_at is not None and not isinstance(issued_at, (int, float)):
+        return None
+    if not isinstance(token_id, str) or not isinstance(version, int):
+        return None
+    return TokenClaims(
+        user_id=user_id,
+        expires_at=float(expires_at),
+        token_id=token_id,
+        version=version,
+        issued_at=issued_at,
+    )
+
+
+def _verify_hmac_jwt(token: str) -> Optional[dict]:
+    """用标准库校验 HMAC 签名的 JWT，返回 payload，不检查过期时间"""
     try:
-        payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
-        user_id: str = payload.get("sub")
-        if user_id is None:
+        signing_input, _, signature = token.rpartition(".")
+        header_segment, _, payload_segment = signing_input.partition(".")
+        header = json.loads(_b64decode(header_segment))
+        if not isinstance(header, dict) or header.get("alg") != settings.jwt_algorithm:
+            return None
+
+        expected = hmac.new(
+            settings.jwt_secret.encode("utf-8"),
+            signing_input.encode("ascii"),
+            _HMAC_ALGORITHMS[settings.jwt_algorithm],
+        ).digest()
+        if not hmac.compare_digest(expected, _b64decode(signature)):
             return None
-        return user_id
-    except JWTError:
+        return json.loads(_b64decode(payload_segment))
+    except (ValueError, UnicodeError):
         return None
+
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
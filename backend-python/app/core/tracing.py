@@ -0,0 +1,355 @@
+"""轻量请求追踪
+
+按 tracing_sample_rate 对请求采样，被采样的请求记录一棵 span 树：
+- 请求本身（TracingMiddleware）
+- 每个 MongoDB 命令（TracingCommandListener，对应每次 Beanie 调用）
+- 每个 MinIO 操作（StorageService._run）
+- bcrypt 计算（app.core.security）
+- 项目数据的解码、解包和响应构建、JSON 序列化
+
+请求结束后整棵树交给导出器：FileExporter 每行写一个 OTLP/JSON（ExportTraceServiceRequest），
+可以直接用 OpenTelemetry Collector 的 otlpjsonfile receiver 读取；InMemoryExporter 用于测试。
+每个响应都带 X-Trace-Id 头，未采样的请求同样有 id，便于和日志对应。
+"""
+
+import json
+import logging
+import os
+import queue
+import random
+import secrets
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional
+
+from pymongo import monitoring
+from starlette.responses import JSONResponse
+
+from .metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+TRACE_ID_HEADER = "X-Trace-Id"
+
+
+@dataclass
+class Span:
+    """一个计时区间"""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: Optional[int] = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1_000_000
+
+    def to_otlp(self) -> dict:
+        """OTLP/JSON 格式的 span"""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 2 if self.parent_id is None else 1,  # SERVER / INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()
+            ],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Trace:
+    """一个被采样请求的所有 span"""
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        # 驱动线程中的回调也会追加，list.append 在 GIL 下是原子的
+        self.spans: list[Span] = []
+
+    def new_span(self, name: str, parent_id: Optional[str], start_ns: Optional[int] = None) -> Span:
+        span = Span(
+            name=name,
+            trace_id=self.trace_id,
+            span_id=secrets.token_hex(8),
+            parent_id=parent_id,
+            start_ns=start_ns or time.time_ns(),
+        )
+        self.spans.append(span)
+        return span
+
+
+# 当前请求的 trace 和当前 span（未采样时为 None）
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("span", default=None)
+
+_NOOP = nullcontext()
+
+
+def span(name: str, **attributes: Any):
+    """在当前 span 下记录一个子 span；当前请求未被采样时几乎没有开销
+
+    用法:
+        with span("storage.put_object", object=name):
+            ...
+    """
+    if _current_trace.get() is None:
+        return _NOOP
+    return _child_span(name, attributes)
+
+
+@contextmanager
+def _child_span(name: str, attributes: dict[str, Any]) -> Iterator[Span]:
+    trace = _current_trace.get()
+    parent = _current_span.get()
+    child = trace.new_span(name, parent.span_id if parent else None)
+    child.attributes.update(attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        child.end_ns = time.time_ns()
+        _current_span.reset(token)
+
+
+# ===== 导出器 =====
+
+
+class InMemoryExporter:
+    """把 trace 保存在内存中（测试用）"""
+
+    def __init__(self):
+        self.traces: list[list[Span]] = []
+
+    def export(self, spans: list[Span]) -> None:
+        self.traces.append(spans)
+
+    def clear(self) -> None:
+        self.traces.clear()
+
+    def shutdown(self) -> None:
+        pass
+
+
+class FileExporter:
+    """每个 trace 写一行 OTLP/JSON，写文件在后台线程中进行"""
+
+    def __init__(self, path: str, service_name: str = "scratch-backend"):
+        # 多个工作进程追加同一个文件时长行可能交错，路径中的 {pid} 替换为进程号
+        self.path = path.replace("{pid}", str(os.getpid()))
+        self.resource = {
+            "attributes": [
+                {"key": "service.name", "value": {"stringValue": service_name}},
+                {"key": "process.pid", "value": {"intValue": str(os.getpid())}},
+            ]
+        }
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+
+    def export(self, spans: list[Span]) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._write_loop, name="trace-exporter", daemon=True)
+            self._thread.start()
+        self._queue.put(spans)
+
+    def shutdown(self) -> None:
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _write_loop(self) -> None:
+        with open(self.path, "a", encoding="utf-8") as file:
+            while True:
+                spans = self._queue.get()
+                if spans is None:
+                    return
+                try:
+                    file.write(json.dumps(self._to_otlp(spans), separators=(",", ":")) + "\n")
+                    file.flush()
+                except Exception as e:
+                    logger.warning(f"Failed to export trace: {e}")
+
+    def _to_otlp(self, spans: list[Span]) -> dict:
+        return {
+            "resourceSpans": [
+                {
+                    "resource": self.resource,
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": __name__},
+                            "spans": [span.to_otlp() for span in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+
+# ===== 请求追踪 =====
+
+
+class Tracer:
+    """采样决策和导出"""
+
+    def __init__(self, sample_rate: float, exporter=None):
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+
+    def should_sample(self) -> bool:
+        return self.exporter is not None and random.random() < self.sample_rate
+
+    def export(self, trace: Trace) -> None:
+        try:
+            self.exporter.export(trace.spans)
+        except Exception as e:
+            logger.warning(f"Failed to export trace {trace.trace_id}: {e}")
+
+
+tracer = Tracer(sample_rate=0.0)
+
+
+def configure_tracing(sample_rate: float, exporter: str, path: str) -> None:
+    """按配置设置采样率和导出器（exporter: file | memory）"""
+    tracer.sample_rate = sample_rate
+    if sample_rate <= 0:
+        tracer.exporter = None
+    elif exporter == "memory":
+        tracer.exporter = InMemoryExporter()
+    else:
+        tracer.exporter = FileExporter(path)
+
+
+def shutdown_tracing() -> None:
+    if tracer.exporter is not None:
+        tracer.exporter.shutdown()
+
+
+class TracingMiddleware:
+    """为每个请求分配 trace id（X-Trace-Id 响应头），被采样的请求记录 span 树"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = secrets.token_hex(16)
+        header = (TRACE_ID_HEADER.lower().encode("latin-1"), trace_id.encode("latin-1"))
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", []), header]
+            await send(message)
+
+        if not tracer.should_sample():
+            await self.app(scope, receive, send_wrapper)
+            return
+
+        trace = Trace(trace_id)
+        root = trace.new_span(f"{scope['method']} {scope['path']}", None)
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(root)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            root.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            root.end_ns = time.time_ns()
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+
+            # 路由匹配后用路由模板命名，便于按接口聚合
+            route = route_template(scope)
+            if route:
+                root.name = f"{scope['method']} {route}"
+            root.attributes.update(
+                {
+                    "http.method": scope["method"],
+                    "http.target": scope["path"],
+                    "http.status_code": status,
+                }
+            )
+            tracer.export(trace)
+
+
+class TracedJSONResponse(JSONResponse):
+    """记录 JSON 序列化耗时的响应类（应用的默认响应类）"""
+
+    def render(self, content: Any) -> bytes:
+        with span("response.serialize"):
+            return super().render(content)
+
+
+class TracingCommandListener(monitoring.CommandListener):
+    """把每个 MongoDB 命令记录为当前 span 的子 span
+
+    回调在驱动线程中执行；Motor 会把调用方的 contextvars 带到线程中，
+    因此可以取得发起命令的请求的 trace。
+    """
+
+    def __init__(self):
+        # (connection_id, request_id) -> (trace, parent span, span 名称, 开始时间)
+        self._started: dict[tuple, tuple[Trace, Optional[Span], str, int]] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        trace = _current_trace.get()
+        if trace is None:
+            return
+        target = event.command.get(event.command_name)
+        name = f"mongodb.{event.command_name}"
+        if isinstance(target, str):
+            name = f"{name} {target}"
+        self._started[(event.connection_id, event.request_id)] = (
+            trace,
+            _current_span.get(),
+            name,
+            time.time_ns(),
+        )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event, None)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, str(event.failure))
+
+    def _finish(self, event, error: Optional[str]) -> None:
+        entry = self._started.pop((event.connection_id, event.request_id), None)
+        if entry is None:
+            return
+        trace, parent, name, start_ns = entry
+        child = trace.new_span(name, parent.span_id if parent else None, start_ns=start_ns)
+        child.end_ns = start_ns + event.duration_micros * 1000
+        child.attributes["db.system"] = "mongodb"
+        child.error = error
@@ -1,62 +1,136 @@
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
+import logging
 from contextlib import asynccontextmanager
+from typing import Optional
 
-from beanie import init_beanie
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from motor.motor_asyncio import AsyncIOMotorClient
 
 from app.api import api_router
+from app.api.health import router as health_router
 from app.core.config import get_settings
-from app.core.security import hash_password
-from app.models import User, Project
-from app.services import get_storage_service
+from app.core.metrics import MetricsMiddleware, MongoMetricsListener, mark_process_dead, render_metrics
+from app.core.query_profiler import QueryProfiler, QueryProfilerMiddleware
+from app.core.readiness import ReadinessMiddleware, install_drain_handler, readiness
+from app.core.redis import close_redis
+from app.core.security import PasswordHasherBusy
+from app.core.tracing import (
+    TracedJSONResponse,
+    TracingCommandListener,
+    TracingMiddleware,
+    configure_tracing,
+    shutdown_tracing,
+)
+from app.models import init_database
+from app.services import get_storage_service, view_counter
+from app.startup import run_startup_tasks
 
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger(__name__)
 settings = get_settings()
+readiness.record("import", (time.perf_counter() - _import_started) * 1000)
+configure_tracing(settings.tracing_sample_rate, settings.tracing_exporter, settings.tracing_export_path)
+
+# 初始化失败后的重试间隔（秒）
+INIT_RETRY_DELAYS = (1, 2, 5, 10, 30)
+
+
+def _mongo_listeners(profiler: Optional[QueryProfiler]) -> list:
+    listeners = []
+    if settings.metrics_enabled:
+        listeners.append(MongoMetricsListener())
+    if settings.tracing_sample_rate > 0:
+        listeners.append(TracingCommandListener())
+    if profiler:
+        listeners.append(profiler)
+    return listeners
+
+
+async def _initialize(app: FastAPI, profiler: Optional[QueryProfiler]) -> None:
+    """后台初始化依赖，失败时按退避间隔重试，直到成功"""
+    attempt = 0
+    while True:
+        try:
+            await _initialize_once(app, profiler)
+            return
+        except Exception as e:
+            delay = INIT_RETRY_DELAYS[min(attempt, len(INIT_RETRY_DELAYS) - 1)]
+            attempt += 1
+            logger.exception(f"Startup failed (attempt {attempt}), retrying in {delay}s")
+            readiness.mark_failed(e)
+            await asyncio.sleep(delay)
+
+
+async def _initialize_once(app: FastAPI, profiler: Optional[QueryProfiler]) -> None:
+    async def connect_mongodb() -> AsyncIOMotorClient:
+        # 调试模式下报告慢查询和全表扫描
+        async with readiness.phase("mongodb"):
+            return await init_database(event_listeners=_mongo_listeners(profiler))
+
+    async def init_storage() -> None:
+        # 在线程中创建 MinIO 客户端（包括导入 minio）
+        async with readiness.phase("storage"):
+            await asyncio.to_thread(get_storage_service)
+
+    results = await asyncio.gather(connect_mongodb(), init_storage(), return_exceptions=True)
+    client = results[0] if isinstance(results[0], AsyncIOMotorClient) else None
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        if client is not None:
+            client.close()
+        raise errors[0]
+
+    try:
+        # 创建 bucket、初始化管理员账号（多进程模式下已由 run.py 主进程执行）
+        if settings.run_startup_tasks:
+            async with readiness.phase("startup_tasks"):
+                await run_startup_tasks(client)
+    except BaseException:
+        client.close()
+        raise
+
+    app.state.mongo_client = client
+    if profiler:
+        profiler.start(client)
+    view_counter.start()
+    readiness.mark_ready()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """应用生命周期管理"""
-    # 启动时
-    print("Starting application...")
-
-    # 初始化 MongoDB
-    client = AsyncIOMotorClient(settings.mongodb_url)
-    await init_beanie(
-        database=client[settings.mongodb_db_name],
-        document_models=[User, Project],
-    )
-    print(f"Connected to MongoDB: {settings.mongodb_db_name}")
-
-    # 初始化存储服务
-    get_storage_service()
-    print("Storage service initialized")
-
-    # 初始化默认管理员账号
-    admin_user = await User.find_one(User.username == "admin")
-    if admin_user is None:
-        admin_user = User(
-            username="admin",
-            password_hash=hash_password("admin"),
-            role="admin",
-            is_active=True,
-        )
-        await admin_user.insert()
-        print("Default admin user created: admin / admin")
-    elif admin_user.role != "admin":
-        # 升级旧的 admin 用户为管理员
-        admin_user.role = "admin"
-        admin_user.is_active = True
-        await admin_user.save()
-        print("Admin user upgraded to admin role")
-    else:
-        print("Admin user already exists")
+    """应用生命周期管理
+
+    不等待依赖初始化完成即开始接受连接；就绪前 API 请求返回 503（见 app.core.readiness）。
+    """
+    app.state.mongo_client = None
+    install_drain_handler(settings.shutdown_drain_seconds)
+    profiler = QueryProfiler(settings.slow_query_ms) if settings.debug else None
+    init_task = asyncio.create_task(_initialize(app, profiler))
 
     yield
 
-    # 关闭时
-    print("Shutting down application...")
-    client.close()
+    logger.info("Shutting down application...")
+    readiness.mark_stopping()
+    if not init_task.done():
+        init_task.cancel()
+        try:
+            await init_task
+        except asyncio.CancelledError:
+            pass
+    await view_counter.stop()
+    if profiler:
+        await profiler.stop()
+    await close_redis()
+    if app.state.mongo_client is not None:
+        app.state.mongo_client.close()
+    mark_process_dead()
+    shutdown_tracing()
 
 
 app = FastAPI(
@@ -64,6 +138,8 @@ app = FastAPI(
     description="Scratch 私有化部署后端服务",
     version="1.0.0",
     lifespan=lifespan,
+    # 被采样的请求记录 JSON 序列化耗时
+    default_response_class=TracedJSONResponse,
 )
 
 # CORS 配置
@@ -75,8 +151,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.debug:
+    app.add_middleware(QueryProfilerMiddleware)
+app.add_middleware(ReadinessMiddleware)
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+# 最外层：所有响应（包括 503）都带 X-Trace-Id
+app.add_middleware(TracingMiddleware)
+
 # 注册路由
 app.include_router(api_router, prefix="/api")
+app.include_router(health_router, prefix="/health", tags=["健康检查"])
+
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    """登录高峰时密码计算排队已满，快速返回 503"""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "服务繁忙，请稍后重试"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 
 @app.get("/")
@@ -89,7 +184,18 @@ async def root():
     }
 
 
+if settings.metrics_enabled:
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus 指标（仅内网访问，nginx 不代理）"""
+        content, content_type = render_metrics()
+        return Response(content=content, media_type=content_type)
+
+
 @app.get("/health")
 async def health_check():
-    """健康检查"""
-    return {"status": "ok"}
+    """健康检查：就绪前返回 503，并报告各启动阶段的耗时"""
+    if not readiness.is_ready:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=readiness.to_dict())
+    return {"status": "ok", "startupMs": readiness.startup_ms, "phases": readiness.phases}
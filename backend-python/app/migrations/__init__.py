@@ -0,0 +1 @@
+# 一次性数据迁移脚本，使用 python -m app.migrations.<name> 运行
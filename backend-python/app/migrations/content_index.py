@@ -0,0 +1,92 @@
+"""为已有项目生成内容索引和项目统计（管理后台按内容搜索、按统计字段排序）
+
+用法:
+    python -m app.migrations.content_index [--workers 8]
+
+可重复执行：每次都按 MinIO 中当前的项目数据重新生成。
+没有项目数据的项目不需要索引，但同样补齐统计字段的默认值（见 backfill_missing_stats）。
+项目通过有界队列分发给固定数量的 worker，同时处理的项目数和内存占用都有上限。
+"""
+
+import argparse
+import asyncio
+import logging
+from collections import Counter
+
+from beanie import PydanticObjectId
+
+from app.models import Project, init_database
+from app.services.content_index import analyze_project_json, upsert_content_index
+from app.services.project import read_project_source
+from app.services.project_stats import backfill_missing_stats
+
+logger = logging.getLogger(__name__)
+
+
+async def _worker(queue: asyncio.Queue, counts: Counter) -> None:
+    while True:
+        project_id = await queue.get()
+        try:
+            if project_id is None:
+                return
+            project = await Project.get(project_id)
+            source = await read_project_source(project) if project else None
+            if source is None:
+                counts["skipped"] += 1
+                continue
+            document, stats = await asyncio.to_thread(analyze_project_json, *source)
+            await upsert_content_index(project.id, project.owner_id, document)
+            # 只更新统计字段，不覆盖并发的其他修改
+            await Project.get_motor_collection().update_one({"_id": project.id}, {"$set": stats})
+            counts["indexed"] += 1
+        except Exception as e:
+            logger.warning(f"Project {project_id}: failed to index content: {e}")
+            counts["failed"] += 1
+        finally:
+            queue.task_done()
+
+
+async def build_content_index(workers: int) -> Counter:
+    """为所有有数据的项目生成内容索引，返回各结果的计数"""
+    counts: Counter = Counter()
+    queue: asyncio.Queue[PydanticObjectId | None] = asyncio.Queue(maxsize=workers * 2)
+    tasks = [asyncio.create_task(_worker(queue, counts)) for _ in range(workers)]
+
+    cursor = Project.get_motor_collection().find(
+        {"storage_path": {"$ne": None}},
+        projection={"_id": 1},
+        batch_size=500,
+    )
+    queued = 0
+    async for doc in cursor:
+        await queue.put(doc["_id"])
+        queued += 1
+        if queued % 1000 == 0:
+            logger.info(f"Queued {queued} projects: {dict(counts)}")
+
+    for _ in tasks:
+        await queue.put(None)
+    await asyncio.gather(*tasks)
+    return counts
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8, help="并发处理的项目数")
+    args = parser.parse_args()
+
+    client = await init_database()
+    try:
+        await backfill_missing_stats()
+        counts = await build_content_index(max(1, args.workers))
+        logger.info(
+            f"Content index built: {counts['indexed']} indexed, "
+            f"{counts['skipped']} skipped, {counts['failed']} failed"
+        )
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
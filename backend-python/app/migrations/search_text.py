@@ -0,0 +1,52 @@
+"""为已有的用户和项目生成 search_text 字段（管理后台搜索）
+
+用法:
+    python -m app.migrations.search_text
+
+可重复执行：每次都按当前标题、描述和用户名重新生成。
+"""
+
+import asyncio
+import logging
+
+from pymongo import UpdateOne
+
+from app.core.search import build_search_text
+from app.models import Project, User, init_database
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+
+async def _backfill(collection, fields: list[str]) -> int:
+    updated = 0
+    operations = []
+    cursor = collection.find({}, projection={field: 1 for field in fields}, batch_size=BATCH_SIZE)
+    async for doc in cursor:
+        search_text = build_search_text(*(doc.get(field) for field in fields))
+        operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"search_text": search_text}}))
+        if len(operations) >= BATCH_SIZE:
+            await collection.bulk_write(operations, ordered=False)
+            updated += len(operations)
+            operations = []
+
+    if operations:
+        await collection.bulk_write(operations, ordered=False)
+        updated += len(operations)
+    return updated
+
+
+async def main() -> None:
+    client = await init_database()
+    try:
+        users = await _backfill(User.get_motor_collection(), ["username"])
+        projects = await _backfill(Project.get_motor_collection(), ["title", "description"])
+        logger.info(f"search_text updated: {users} users, {projects} projects")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,60 @@
+"""把 MongoDB 中内联的 base64 缩略图迁移到 MinIO
+
+用法:
+    python -m app.migrations.thumbnails
+
+可重复执行：只处理仍带有内联缩略图的项目。
+"""
+
+import asyncio
+import hashlib
+import logging
+
+from app.models import Project, init_database
+from app.services.thumbnails import InvalidThumbnail, decode_data_url, store_thumbnail
+
+logger = logging.getLogger(__name__)
+
+
+async def migrate_thumbnails() -> tuple[int, int]:
+    """迁移所有内联缩略图，返回 (迁移数, 跳过数)"""
+    collection = Project.get_motor_collection()
+    migrated = skipped = 0
+
+    cursor = collection.find(
+        {"thumbnail": {"$ne": None}},
+        projection={"_id": 1, "thumbnail": 1},
+        batch_size=100,
+    )
+    async for doc in cursor:
+        data_url = doc["thumbnail"]
+        update = {"$unset": {"thumbnail": ""}}
+        try:
+            data = decode_data_url(data_url)
+        except InvalidThumbnail as e:
+            logger.warning(f"Project {doc['_id']}: dropping invalid thumbnail: {e}")
+            skipped += 1
+        else:
+            thumbnail_hash = hashlib.sha256(data).hexdigest()[:16]
+            await store_thumbnail(str(doc["_id"]), thumbnail_hash, data)
+            update["$set"] = {"thumbnail_hash": thumbnail_hash}
+            migrated += 1
+
+        # 只在缩略图未被并发修改时更新
+        await collection.update_one({"_id": doc["_id"], "thumbnail": data_url}, update)
+
+    return migrated, skipped
+
+
+async def main() -> None:
+    client = await init_database()
+    try:
+        migrated, skipped = await migrate_thumbnails()
+        logger.info(f"Thumbnails migrated: {migrated}, invalid dropped: {skipped}")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -1,4 +1,6 @@
 from .user import User
 from .project import Project
+from .content_index import ProjectContentIndex
+from .database import DOCUMENT_MODELS, init_database
 
-__all__ = ["User", "Project"]
+__all__ = ["User", "Project", "ProjectContentIndex", "DOCUMENT_MODELS", "init_database"]
@@ -0,0 +1,41 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from beanie import Document, PydanticObjectId
+from pydantic import Field
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+
+class ProjectContentIndex(Document):
+    """项目内容索引
+
+    保存项目时从 project.json 提取，每个项目一条，用于按内容搜索项目。
+    名称统一转为小写，按完全匹配查询。
+    """
+
+    project_id: PydanticObjectId
+    owner_id: Optional[PydanticObjectId] = None
+
+    # 角色和舞台名
+    targets: list[str] = Field(default_factory=list)
+    # 变量名、列表名
+    variables: list[str] = Field(default_factory=list)
+    lists: list[str] = Field(default_factory=list)
+    # 使用的扩展 id（如 pen、music）
+    extensions: list[str] = Field(default_factory=list)
+    # opcode -> 积木数量
+    opcodes: dict[str, int] = Field(default_factory=dict)
+    # opcodes 的键，单独存储以便建索引
+    opcode_names: list[str] = Field(default_factory=list)
+
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    class Settings:
+        name = "project_content_index"
+        indexes = [
+            IndexModel([("project_id", ASCENDING)], unique=True),
+        ] + [
+            # 按内容搜索，结果按 project_id 倒序（新项目在前）
+            IndexModel([(field, ASCENDING), ("project_id", DESCENDING)])
+            for field in ("targets", "variables", "lists", "extensions", "opcode_names")
+        ]
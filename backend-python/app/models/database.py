@@ -0,0 +1,30 @@
+from typing import Optional
+
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.monitoring import CommandListener
+
+from app.core.config import get_settings
+
+from .content_index import ProjectContentIndex
+from .project import Project
+from .user import User
+
+# 所有 Beanie 文档模型
+DOCUMENT_MODELS = [User, Project, ProjectContentIndex]
+
+
+async def init_database(
+    event_listeners: Optional[list[CommandListener]] = None,
+) -> AsyncIOMotorClient:
+    """连接 MongoDB 并初始化 Beanie，返回客户端（调用方负责关闭）
+
+    Beanie 会在这里创建模型 Settings 中声明的索引。
+    """
+    settings = get_settings()
+    client = AsyncIOMotorClient(settings.mongodb_url, event_listeners=event_listeners or [])
+    await init_beanie(
+        database=client[settings.mongodb_db_name],
+        document_models=DOCUMENT_MODELS,
+    )
+    return client
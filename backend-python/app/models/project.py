@@ -1,12 +1,20 @@
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Awaitable, Callable, Optional
+import hashlib
+import importlib.util
 import secrets
 
-from beanie import Document, Indexed, Link
-from pydantic import Field
+from beanie import Document, Insert, Link, PydanticObjectId, Replace, Save, SaveChanges, before_event
+from pydantic import Field, PrivateAttr
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+
+from app.core.search import build_search_text
 
 from .user import User
 
+# 缩小的缩略图变体由 Pillow 生成（见 app.services.thumbnails），未安装时只提供原图
+THUMBNAIL_VARIANTS_AVAILABLE = importlib.util.find_spec("PIL") is not None
+
 
 class Project(Document):
     """项目模型
@@ -20,19 +28,110 @@ class Project(Document):
 
     # MinIO 存储路径
     storage_path: Optional[str] = None
+    # 存储格式：'sb3' 整个文件一个对象（旧格式），'assets' 资源清单 + 内容寻址资源
+    storage_format: str = "sb3"
     # 文件大小（字节）
     file_size: int = 0
+    # 内容哈希（资源清单的 sha256），保存时计算，用于 ETag 和缓存版本
+    content_hash: Optional[str] = None
 
+    # 旧数据：base64 PNG data URL，迁移后为空
     thumbnail: Optional[str] = None
+    # 存储在 MinIO 中的缩略图内容哈希
+    thumbnail_hash: Optional[str] = None
     is_public: bool = False
-    share_token: Optional[Indexed(str, unique=True)] = None
+    share_token: Optional[str] = None
     view_count: int = 0
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+    # 项目统计，保存时从 project.json 提取（见 app.services.project_stats）
+    sprite_count: int = 0
+    block_count: int = 0
+    costume_count: int = 0
+    sound_count: int = 0
+    # 资源（造型、声音）总大小（字节）
+    asset_bytes: int = 0
+    extensions: list[str] = Field(default_factory=list)
+
+    # 标题和描述的 n-gram，保存时生成，用于管理后台搜索
+    search_text: str = ""
+
+    # 元数据保存后在后台执行的任务，如生成内容索引、删除旧版本对象（见 app.services.project.on_project_saved）
+    _post_save_tasks: list[Callable[[], Awaitable[None]]] = PrivateAttr(default_factory=list)
+
     class Settings:
         name = "projects"
         use_state_management = True
+        indexes = [
+            # 我的项目列表（按更新时间排序）、作者的项目计数和删除
+            IndexModel([("owner.$id", ASCENDING), ("updated_at", DESCENDING)]),
+            # 项目重名检查
+            IndexModel([("owner.$id", ASCENDING), ("title", ASCENDING)]),
+            # 分享链接；未分享的项目 share_token 为 null，不参与唯一约束
+            IndexModel(
+                [("share_token", ASCENDING)],
+                unique=True,
+                partialFilterExpression={"share_token": {"$type": "string"}},
+            ),
+        ] + [
+            # 管理后台搜索
+            IndexModel([("search_text", TEXT)], default_language="none"),
+            # 管理后台按扩展筛选，结果按更新时间排序
+            IndexModel([("extensions", ASCENDING), ("updated_at", DESCENDING), ("_id", DESCENDING)]),
+        ] + [
+            # 管理后台按 (排序字段, _id) 游标分页
+            IndexModel([(field, DESCENDING), ("_id", DESCENDING)])
+            for field in (
+                "updated_at",
+                "created_at",
+                "title",
+                "file_size",
+                "view_count",
+                "sprite_count",
+                "block_count",
+                "costume_count",
+                "sound_count",
+                "asset_bytes",
+            )
+        ]
+
+    @before_event(Insert, Replace, Save, SaveChanges)
+    def update_search_text(self) -> None:
+        """根据标题和描述更新搜索字段"""
+        self.search_text = build_search_text(self.title, self.description)
+
+    @property
+    def owner_id(self) -> Optional[PydanticObjectId]:
+        """owner 的 id，无需加载关联文档"""
+        if isinstance(self.owner, Link):
+            return self.owner.ref.id
+        return self.owner.id if self.owner else None
+
+    def get_content_version(self) -> Optional[str]:
+        """项目内容版本，没有内容时返回 None
+
+        优先使用保存时计算的 content_hash；旧格式项目退化为存储元数据的摘要。
+        """
+        if not self.storage_path:
+            return None
+        if self.content_hash:
+            return self.content_hash
+        legacy = f"{self.storage_path}:{self.file_size}:{self.updated_at.isoformat()}"
+        return hashlib.sha256(legacy.encode("utf-8")).hexdigest()
+
+    def get_thumbnail_url(self, size: Optional[str] = None) -> Optional[str]:
+        """获取缩略图 URL
+
+        URL 中带内容哈希，可长期缓存；尚未迁移的旧数据直接返回 data URL。
+
+        Args:
+            size: 缩小的变体（'sm' | 'md'），None 表示原图；没有 Pillow 时忽略
+        """
+        if self.thumbnail_hash:
+            url = f"/api/projects/{self.id}/thumbnail/{self.thumbnail_hash}"
+            return f"{url}?size={size}" if size and THUMBNAIL_VARIANTS_AVAILABLE else url
+        return self.thumbnail
 
     def generate_share_token(self) -> str:
         """生成分享 token"""
@@ -45,19 +144,35 @@ class Project(Document):
         self.share_token = None
         self.is_public = False
 
+    def get_storage_prefix(self) -> str:
+        """获取项目在 MinIO 中的对象前缀"""
+        return f"projects/{self.id}/"
+
     def get_storage_object_name(self) -> str:
-        """获取 MinIO 存储对象名称"""
+        """获取 MinIO 存储对象名称（旧的 sb3 整体存储格式）"""
         return f"projects/{self.id}/project.sb3"
 
+    def get_manifest_object_name(self, content_hash: str) -> str:
+        """获取资源清单的 MinIO 对象名称（按内容版本化，storage_path 指向当前版本）"""
+        return f"projects/{self.id}/manifest.{content_hash[:16]}.json"
+
+    def get_project_json_object_name(self, sha256: str) -> str:
+        """获取 project.json 的 MinIO 对象名称（按内容版本化）"""
+        return f"projects/{self.id}/project.{sha256[:16]}.json"
+
+    def get_packed_object_name(self, content_hash: str) -> str:
+        """获取重新打包的 sb3 缓存的 MinIO 对象名称（按内容版本化）"""
+        return f"projects/{self.id}/packed.{content_hash[:16]}.sb3"
+
     def to_response(self) -> dict:
         """转换为响应格式"""
         return {
             "_id": str(self.id),
             "title": self.title,
             "description": self.description,
-            "owner": str(self.owner.id) if self.owner else None,
+            "owner": str(self.owner_id) if self.owner else None,
             "storagePath": self.storage_path,
-            "thumbnail": self.thumbnail,
+            "thumbnail": self.get_thumbnail_url(),
             "isPublic": self.is_public,
             "shareToken": self.share_token,
             "viewCount": self.view_count,
@@ -71,7 +186,7 @@ class Project(Document):
             "_id": str(self.id),
             "title": self.title,
             "description": self.description,
-            "thumbnail": self.thumbnail,
+            "thumbnail": self.get_thumbnail_url("md"),
             "isPublic": self.is_public,
             "viewCount": self.view_count,
             "createdAt": self.created_at.isoformat(),
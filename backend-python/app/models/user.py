@@ -1,8 +1,11 @@
 from datetime import datetime, timezone
 from typing import Optional
 
-from beanie import Document, Indexed
+from beanie import Document, Indexed, Insert, Replace, Save, before_event
 from pydantic import Field
+from pymongo import DESCENDING, TEXT, IndexModel
+
+from app.core.search import build_search_text
 
 
 class User(Document):
@@ -13,12 +16,31 @@ class User(Document):
     avatar: Optional[str] = None
     role: str = "user"  # 'user' | 'admin'
     is_active: bool = True  # 账号是否启用
+    token_version: int = 0  # 递增后该用户之前签发的所有 token 失效
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+    # 用户名的 n-gram，保存时生成，用于管理后台搜索
+    search_text: str = ""
+
     class Settings:
         name = "users"
         use_state_management = True
+        indexes = [
+            # 管理后台按 (created_at, _id) 游标分页
+            IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)]),
+            # 管理后台搜索
+            IndexModel([("search_text", TEXT)], default_language="none"),
+        ]
+
+    @before_event(Insert, Replace, Save)
+    def update_search_text(self) -> None:
+        """根据用户名更新搜索字段"""
+        self.search_text = build_search_text(self.username)
+
+    def revoke_tokens(self) -> None:
+        """使该用户已签发的所有 token 失效（需要调用方保存）"""
+        self.token_version += 1
 
     def to_response(self) -> dict:
         """转换为响应格式（不包含密码）"""
@@ -10,6 +10,8 @@ from .project import (
     ProjectResponse,
     ProjectListResponse,
     ShareResponse,
+    MissingAssetsRequest,
+    MissingAssetsResponse,
 )
 
 __all__ = [
@@ -22,4 +24,6 @@ __all__ = [
     "ProjectResponse",
     "ProjectListResponse",
     "ShareResponse",
+    "MissingAssetsRequest",
+    "MissingAssetsResponse",
 ]
@@ -61,10 +61,13 @@ class PaginatedUsers(BaseModel):
     """分页用户列表响应"""
 
     items: list[UserListItem]
-    total: int
+    # include_total=false 时为空；无过滤条件时为估计值
+    total: Optional[int] = None
     page: int
     page_size: int = Field(..., alias="pageSize")
-    total_pages: int = Field(..., alias="totalPages")
+    total_pages: Optional[int] = Field(None, alias="totalPages")
+    # 下一页游标，没有更多数据时为空
+    next_cursor: Optional[str] = Field(None, alias="nextCursor")
 
     class Config:
         populate_by_name = True
@@ -80,6 +83,12 @@ class AdminProjectItem(BaseModel):
     file_size: int = Field(..., alias="fileSize")
     is_public: bool = Field(..., alias="isPublic")
     view_count: int = Field(..., alias="viewCount")
+    sprite_count: int = Field(0, alias="spriteCount")
+    block_count: int = Field(0, alias="blockCount")
+    costume_count: int = Field(0, alias="costumeCount")
+    sound_count: int = Field(0, alias="soundCount")
+    asset_bytes: int = Field(0, alias="assetBytes")
+    extensions: list[str] = []
     owner_id: str = Field(..., alias="ownerId")
     owner_name: str = Field(..., alias="ownerName")
     created_at: datetime = Field(..., alias="createdAt")
@@ -93,10 +102,13 @@ class PaginatedProjects(BaseModel):
     """分页项目列表响应"""
 
     items: list[AdminProjectItem]
-    total: int
+    # include_total=false 时为空；无过滤条件时为估计值
+    total: Optional[int] = None
     page: int
     page_size: int = Field(..., alias="pageSize")
-    total_pages: int = Field(..., alias="totalPages")
+    total_pages: Optional[int] = Field(None, alias="totalPages")
+    # 下一页游标，没有更多数据时为空
+    next_cursor: Optional[str] = Field(None, alias="nextCursor")
 
     class Config:
         populate_by_name = True
@@ -62,3 +62,15 @@ class ShareResponse(BaseModel):
 
     shareToken: str
     shareUrl: str
+
+
+class MissingAssetsRequest(BaseModel):
+    """查询缺失资源请求"""
+
+    assets: list[str] = Field(..., max_length=10000)  # md5ext 列表
+
+
+class MissingAssetsResponse(BaseModel):
+    """缺失资源响应"""
+
+    missing: list[str]
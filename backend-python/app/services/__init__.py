@@ -1,10 +1,68 @@
 from .storage import StorageService, get_storage_service
-from .project import save_project_data, load_project_data, delete_project_data
+from .assets import InvalidProjectData, store_named_asset
+from .project import (
+    ProjectContent,
+    decode_project_data,
+    save_project_data,
+    save_project_stream,
+    commit_project_json,
+    find_missing_assets,
+    load_project_data,
+    open_project_content,
+    sb3_data_url,
+    read_project_source,
+    delete_project_data,
+    on_project_saved,
+)
+from .content_index import analyze_project_content, delete_content_index
+from .thumbnails import InvalidThumbnail, decode_data_url, save_thumbnail, load_thumbnail
+from .views import ViewCounter, view_counter
+from .share_cache import (
+    open_shared_content,
+    invalidate_cached_content,
+    get_share_cache_stats,
+)
+from .user_cache import (
+    get_cached_user,
+    set_cached_user,
+    invalidate_cached_user,
+    get_user_cache_stats,
+)
+from .revocation import revoke_token, is_token_revoked, get_revocation_stats
 
 __all__ = [
     "StorageService",
     "get_storage_service",
+    "InvalidProjectData",
+    "store_named_asset",
+    "ProjectContent",
+    "decode_project_data",
     "save_project_data",
+    "save_project_stream",
+    "commit_project_json",
+    "find_missing_assets",
     "load_project_data",
+    "open_project_content",
+    "sb3_data_url",
+    "read_project_source",
     "delete_project_data",
+    "on_project_saved",
+    "analyze_project_content",
+    "delete_content_index",
+    "open_shared_content",
+    "invalidate_cached_content",
+    "get_share_cache_stats",
+    "InvalidThumbnail",
+    "decode_data_url",
+    "save_thumbnail",
+    "load_thumbnail",
+    "ViewCounter",
+    "view_counter",
+    "get_cached_user",
+    "set_cached_user",
+    "invalidate_cached_user",
+    "get_user_cache_stats",
+    "revoke_token",
+    "is_token_revoked",
+    "get_revocation_stats",
 ]
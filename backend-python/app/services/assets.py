@@ -0,0 +1,320 @@
+"""内容寻址资源存储
+
+sb3 文件拆开存储：造型、声音等资源按 md5 只存一份（assets/{md5}.{ext}），
+不同项目之间共享；每个项目只保存 project.json 和一份资源清单（manifest）。
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import mimetypes
+import re
+import tempfile
+import zipfile
+from typing import Any, BinaryIO, Optional
+
+from app.core.config import get_settings
+from app.services.storage import get_storage_service
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+ASSET_PREFIX = "assets/"
+PROJECT_JSON_NAME = "project.json"
+MANIFEST_FORMAT = 1
+
+# 重新打包时使用固定时间戳，同一版本每次打包的字节完全相同（强 ETag / Range 依赖这一点）
+_ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+# 已经压缩过的格式在 zip 中直接存储，避免重复压缩
+_STORED_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "mp3"}
+_EXT_RE = re.compile(r"^[a-z0-9]{1,8}$")
+_MD5EXT_RE = re.compile(r"^([0-9a-f]{32})\.([a-z0-9]{1,8})$")
+
+# 已确认存在于 MinIO 的资源，避免每次保存都逐个 stat
+_known_assets: set[str] = set()
+_KNOWN_ASSETS_MAX = 100_000
+
+
+class InvalidProjectData(ValueError):
+    """上传的项目文件不是有效的 sb3"""
+
+
+def asset_object_name(md5: str, ext: str) -> str:
+    """获取资源的 MinIO 对象名称"""
+    return f"{ASSET_PREFIX}{md5}.{ext}"
+
+
+def _asset_extension(name: str) -> str:
+    ext = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+    return ext if _EXT_RE.match(ext) else "bin"
+
+
+async def asset_exists(object_name: str) -> bool:
+    """检查资源是否已存储（带进程内缓存）"""
+    if object_name in _known_assets:
+        return True
+
+    storage = get_storage_service()
+    if not await storage.file_exists(object_name):
+        return False
+
+    _remember_asset(object_name)
+    return True
+
+
+def _remember_asset(object_name: str) -> None:
+    if len(_known_assets) >= _KNOWN_ASSETS_MAX:
+        _known_assets.clear()
+    _known_assets.add(object_name)
+
+
+async def store_asset(name: str, data: bytes) -> dict[str, Any]:
+    """按内容存储单个资源，已存在时跳过上传
+
+    Args:
+        name: 资源在 sb3 中的文件名（如 83a9787d4cb6f3b7632b4ddfebf74367.wav）
+        data: 资源内容
+
+    Returns:
+        manifest 中的资源条目
+    """
+    md5 = hashlib.md5(data).hexdigest()
+    object_name = asset_object_name(md5, _asset_extension(name))
+
+    if not await asset_exists(object_name):
+        storage = get_storage_service()
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        await storage.upload_file(data, object_name, content_type=content_type)
+        _remember_asset(object_name)
+
+    return {"name": name, "key": object_name, "size": len(data)}
+
+
+def parse_md5ext(md5ext: str) -> tuple[str, str]:
+    """解析 "{md5}.{ext}" 形式的资源名
+
+    Raises:
+        InvalidProjectData: 资源名格式不正确
+    """
+    match = _MD5EXT_RE.match(md5ext.lower())
+    if match is None:
+        raise InvalidProjectData(f"Invalid asset name: {md5ext}")
+    return match.group(1), match.group(2)
+
+
+async def store_named_asset(md5ext: str, data: bytes) -> dict[str, Any]:
+    """存储客户端按 md5ext 上传的资源，校验内容与名称一致
+
+    Raises:
+        InvalidProjectData: 名称格式不正确或内容 md5 不匹配
+    """
+    md5, _ = parse_md5ext(md5ext)
+    if hashlib.md5(data).hexdigest() != md5:
+        raise InvalidProjectData(f"Asset content does not match {md5ext}")
+    return await store_asset(md5ext.lower(), data)
+
+
+def referenced_assets(project_json: dict[str, Any]) -> list[str]:
+    """从 project.json 中提取引用的资源名（md5ext），保持首次出现的顺序
+
+    Raises:
+        InvalidProjectData: project.json 结构不正确
+    """
+    targets = project_json.get("targets")
+    if not isinstance(targets, list):
+        raise InvalidProjectData("project.json has no targets")
+
+    names: dict[str, None] = {}
+    for target in targets:
+        if not isinstance(target, dict):
+            raise InvalidProjectData("Invalid target in project.json")
+        for field in ("costumes", "sounds"):
+            items = target.get(field, [])
+            if not isinstance(items, list):
+                raise InvalidProjectData(f"Invalid {field} in project.json")
+            for item in items:
+                if not isinstance(item, dict):
+                    raise InvalidProjectData(f"Invalid {field} item in project.json")
+                md5ext = item.get("md5ext")
+                if not md5ext and item.get("assetId") and item.get("dataFormat"):
+                    md5ext = f"{item['assetId']}.{item['dataFormat']}"
+                if not isinstance(md5ext, str) or not md5ext:
+                    raise InvalidProjectData("Asset without md5ext in project.json")
+                parse_md5ext(md5ext)
+                names[md5ext] = None
+    return list(names)
+
+
+async def resolve_assets(
+    names: list[str],
+    known: dict[str, dict[str, Any]],
+) -> tuple[list[dict[str, Any]], list[str]]:
+    """为资源名生成 manifest 条目，并找出资源库中缺失的资源
+
+    Args:
+        names: 资源名（md5ext）列表
+        known: 上一版本 manifest 中的条目（按名称索引），这些资源无需再检查
+
+    Returns:
+        (manifest 资源条目列表, 缺失的资源名列表)
+    """
+    storage = get_storage_service()
+    semaphore = asyncio.Semaphore(settings.storage_max_concurrency)
+
+    async def _resolve(name: str) -> Optional[dict[str, Any]]:
+        if name in known:
+            return known[name]
+        md5, ext = parse_md5ext(name)
+        object_name = asset_object_name(md5, ext)
+        async with semaphore:
+            size = await storage.get_file_size(object_name)
+        if size is None:
+            return None
+        _remember_asset(object_name)
+        return {"name": name, "key": object_name, "size": size}
+
+    resolved = await asyncio.gather(*(_resolve(name) for name in names))
+    entries = [entry for entry in resolved if entry is not None]
+    missing = [name for name, entry in zip(names, resolved) if entry is None]
+    return entries, missing
+
+
+async def unpack_sb3(stream: BinaryIO) -> tuple[bytes, list[dict[str, Any]]]:
+    """拆开 sb3，把资源存入资源库
+
+    资源逐个解压、上传，同时在途的资源数不超过 storage_max_concurrency，
+    内存占用与项目大小无关。
+
+    Returns:
+        (project.json 内容, 资源条目列表)
+
+    Raises:
+        InvalidProjectData: 不是有效的 zip 或缺少 project.json
+    """
+    try:
+        archive = await asyncio.to_thread(zipfile.ZipFile, stream)
+    except zipfile.BadZipFile as e:
+        raise InvalidProjectData(f"Invalid sb3 archive: {e}")
+
+    with archive:
+        infos = [info for info in archive.infolist() if not info.is_dir()]
+        if sum(info.file_size for info in infos) > settings.project_max_unpacked_size:
+            raise InvalidProjectData("sb3 archive is too large when unpacked")
+
+        project_json = None
+        semaphore = asyncio.Semaphore(settings.storage_max_concurrency)
+        tasks = []
+
+        async def _store(name: str, data: bytes) -> dict[str, Any]:
+            try:
+                return await store_asset(name, data)
+            finally:
+                semaphore.release()
+
+        try:
+            for info in infos:
+                if info.filename == PROJECT_JSON_NAME:
+                    project_json = await asyncio.to_thread(archive.read, info)
+                    continue
+
+                await semaphore.acquire()
+                try:
+                    data = await asyncio.to_thread(archive.read, info)
+                except BaseException:
+                    semaphore.release()
+                    raise
+                tasks.append(asyncio.create_task(_store(info.filename, data)))
+
+            assets = list(await asyncio.gather(*tasks))
+        except zipfile.BadZipFile as e:
+            raise InvalidProjectData(f"Invalid sb3 archive: {e}")
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    if project_json is None:
+        raise InvalidProjectData("sb3 archive has no project.json")
+
+    return project_json, assets
+
+
+def build_manifest(
+    project_json_key: str,
+    project_json: bytes,
+    project_json_sha256: str,
+    assets: list[dict[str, Any]],
+) -> dict[str, Any]:
+    """构建项目资源清单"""
+    return {
+        "format": MANIFEST_FORMAT,
+        "projectJson": {
+            "key": project_json_key,
+            "size": len(project_json),
+            "sha256": project_json_sha256,
+        },
+        "assets": assets,
+    }
+
+
+def dump_manifest(manifest: dict[str, Any]) -> bytes:
+    return json.dumps(manifest, separators=(",", ":")).encode("utf-8")
+
+
+def load_manifest(data: bytes) -> dict[str, Any]:
+    return json.loads(data)
+
+
+def _zip_info(name: str, compression: int) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(name, date_time=_ZIP_DATE_TIME)
+    info.compress_type = compression
+    info.external_attr = 0o644 << 16
+    return info
+
+
+async def pack_sb3(manifest: dict[str, Any]) -> tuple[BinaryIO, int]:
+    """根据资源清单重新打包 sb3
+
+    资源逐个从 MinIO 下载写入临时文件（超过 upload_spool_max_memory 后落盘）。
+
+    Returns:
+        (读取位置在开头的 sb3 文件, 文件大小)
+
+    Raises:
+        FileNotFoundError: project.json 或某个资源在 MinIO 中不存在
+    """
+    storage = get_storage_service()
+    spool = tempfile.SpooledTemporaryFile(max_size=settings.upload_spool_max_memory)
+    try:
+        with zipfile.ZipFile(spool, "w") as archive:
+            project_json_key = manifest["projectJson"]["key"]
+            project_json = await storage.download_file(project_json_key)
+            if project_json is None:
+                raise FileNotFoundError(project_json_key)
+            await asyncio.to_thread(
+                archive.writestr,
+                _zip_info(PROJECT_JSON_NAME, zipfile.ZIP_DEFLATED),
+                project_json,
+            )
+            del project_json
+
+            for asset in manifest["assets"]:
+                data = await storage.download_file(asset["key"])
+                if data is None:
+                    raise FileNotFoundError(asset["key"])
+                compression = (
+                    zipfile.ZIP_STORED
+                    if _asset_extension(asset["name"]) in _STORED_EXTENSIONS
+                    else zipfile.ZIP_DEFLATED
+                )
+                await asyncio.to_thread(
+                    archive.writestr, _zip_info(asset["name"], compression), data
+                )
+
+        size = spool.tell()
+        spool.seek(0)
+        return spool, size
+    except BaseException:
+        spool.close()
+        raise
@@ -0,0 +1,156 @@
+"""项目内容索引
+
+保存项目后（在后台）从 project.json 提取一份精简的搜索文档，存入 project_content_index 集合：
+角色 / 舞台名、变量名、列表名、扩展 id 和积木 opcode 直方图。
+管理员可以按这些内容搜索项目（如“用了画笔扩展的项目”、“有名为 Cat2 的角色的项目”），
+不需要从 MinIO 下载 sb3。
+
+同一次解析也生成项目统计（见 app.services.project_stats）。
+"""
+
+import asyncio
+import json
+import logging
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from beanie import PydanticObjectId
+
+from app.core.search import normalize_name
+from app.models import Project, ProjectContentIndex
+from app.services.project_stats import extract_project_stats
+
+logger = logging.getLogger(__name__)
+
+# 每类名称最多保存的数量，避免异常项目撑大索引
+MAX_NAMES = 500
+
+
+def extract_content_index(project_json: dict[str, Any]) -> dict[str, Any]:
+    """从 project.json 提取搜索文档"""
+    targets: set[str] = set()
+    variables: set[str] = set()
+    lists: set[str] = set()
+    opcodes: Counter[str] = Counter()
+
+    for target in project_json.get("targets") or []:
+        if not isinstance(target, dict):
+            continue
+        if isinstance(target.get("name"), str):
+            targets.add(normalize_name(target["name"]))
+        variables.update(_entry_names(target.get("variables")))
+        lists.update(_entry_names(target.get("lists")))
+
+        blocks = target.get("blocks")
+        if not isinstance(blocks, dict):
+            continue
+        for block in blocks.values():
+            # 顶层的变量 / 列表积木是数组形式，没有 opcode
+            if isinstance(block, dict) and isinstance(block.get("opcode"), str):
+                opcodes[block["opcode"]] += 1
+
+    extensions = {
+        normalize_name(extension)
+        for extension in project_json.get("extensions") or []
+        if isinstance(extension, str)
+    }
+    # MongoDB 字段名不能以 $ 开头或包含 .
+    opcodes = Counter(
+        {opcode: count for opcode, count in opcodes.items() if "." not in opcode and not opcode.startswith("$")}
+    )
+
+    return {
+        "targets": sorted(targets)[:MAX_NAMES],
+        "variables": sorted(variables)[:MAX_NAMES],
+        "lists": sorted(lists)[:MAX_NAMES],
+        "extensions": sorted(extensions)[:MAX_NAMES],
+        "opcodes": dict(opcodes.most_common(MAX_NAMES)),
+        "opcode_names": sorted(opcode for opcode, _ in opcodes.most_common(MAX_NAMES)),
+    }
+
+
+def _entry_names(entries: Any) -> set[str]:
+    """变量 / 列表的格式为 {id: [name, value, ...]}"""
+    if not isinstance(entries, dict):
+        return set()
+    return {
+        normalize_name(entry[0])
+        for entry in entries.values()
+        if isinstance(entry, list) and entry and isinstance(entry[0], str)
+    }
+
+
+def analyze_project_json(
+    project_json: bytes,
+    assets: list[dict[str, Any]],
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    """解析 project.json，返回 (内容索引, 项目统计)
+
+    CPU 密集，应在线程中调用。
+    """
+    parsed = json.loads(project_json)
+    if not isinstance(parsed, dict):
+        raise ValueError("project.json is not an object")
+    return analyze_parsed_project(parsed, assets)
+
+
+def analyze_parsed_project(
+    project_json: dict[str, Any],
+    assets: list[dict[str, Any]],
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    """从已解析的 project.json 生成 (内容索引, 项目统计)"""
+    return extract_content_index(project_json), extract_project_stats(project_json, assets)
+
+
+async def analyze_project_content(
+    project_id: PydanticObjectId,
+    owner_id: Optional[PydanticObjectId],
+    content_hash: Optional[str],
+    project_json: bytes | dict[str, Any],
+    assets: list[dict[str, Any]],
+) -> None:
+    """生成并写入项目统计和内容索引（项目保存后在后台执行）
+
+    project_json 为原始内容或已解析的对象；分析在线程中进行。
+    只有项目仍是 content_hash 这个版本时才写入，较慢的旧分析不会覆盖新版本的结果。
+    失败只记录日志，不影响项目保存。
+    """
+    try:
+        if isinstance(project_json, dict):
+            document, stats = await asyncio.to_thread(analyze_parsed_project, project_json, assets)
+        else:
+            document, stats = await asyncio.to_thread(analyze_project_json, project_json, assets)
+        # 只更新统计字段，不覆盖并发的其他修改
+        result = await Project.get_motor_collection().update_one(
+            {"_id": project_id, "content_hash": content_hash},
+            {"$set": stats},
+        )
+        if result.matched_count:
+            await upsert_content_index(project_id, owner_id, document)
+    except Exception as e:
+        logger.warning(f"Project {project_id}: failed to analyze content: {e}")
+
+
+async def upsert_content_index(
+    project_id: PydanticObjectId,
+    owner_id: PydanticObjectId,
+    document: dict[str, Any],
+) -> None:
+    """写入（或替换）项目的内容索引"""
+    document = {
+        **document,
+        "project_id": project_id,
+        "owner_id": owner_id,
+        "updated_at": datetime.now(timezone.utc),
+    }
+    await ProjectContentIndex.get_motor_collection().replace_one(
+        {"project_id": project_id},
+        document,
+        upsert=True,
+    )
+
+
+async def delete_content_index(project_id: PydanticObjectId) -> None:
+    """删除项目的内容索引"""
+    await ProjectContentIndex.get_motor_collection().delete_one({"project_id": project_id})
@@ -1,36 +1,113 @@
 """项目服务层
 
 所有项目数据统一存储到 MinIO，MongoDB 只保存元数据。
+
+项目以资源清单格式存储（见 app.services.assets）：
+- projects/{id}/manifest.{hash}.json  按内容版本化的资源清单，storage_path 指向当前版本
+- projects/{id}/project.{hash}.json  按内容版本化的 project.json
+- projects/{id}/packed.{hash}.sb3    重新打包的 sb3 缓存，第一次下载时生成
+- assets/{md5}.{ext}               跨项目共享的造型、声音
+
+旧项目仍是 projects/{id}/project.sb3 单个对象，下次保存时迁移到新格式。
+
+MinIO 中的对象写入后不再修改，保存 MongoDB 元数据（storage_path、content_hash）才切换版本，
+元数据保存失败或并发保存时，元数据和 MinIO 中的内容不会不一致。
 """
 
+import asyncio
 import base64
+import binascii
+import hashlib
+import io
+import json
 import logging
-from typing import Any, Optional
+import tempfile
+import zipfile
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, AsyncIterator, BinaryIO, Optional
 
+from app.core.config import get_settings
+from app.core.metrics import PROJECT_SB3_SIZE
+from app.core.tracing import span
 from app.models import Project
+from app.services.assets import (
+    PROJECT_JSON_NAME,
+    InvalidProjectData,
+    build_manifest,
+    dump_manifest,
+    load_manifest,
+    pack_sb3,
+    parse_md5ext,
+    referenced_assets,
+    resolve_assets,
+    unpack_sb3,
+)
+from app.services.content_index import analyze_project_content, delete_content_index
 from app.services.storage import get_storage_service
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 
-async def save_project_data(
-    project: Project,
-    project_json: Optional[dict[str, Any]],
-) -> None:
-    """保存项目数据到 MinIO
+@dataclass
+class ProjectContent:
+    """可按范围分块读取的项目 sb3 内容
 
-    Args:
-        project: 项目实例（必须已经有 id）
-        project_json: 项目数据，包含 sb3 字段
+    旧格式和已缓存的打包结果直接从 MinIO 对象读取；资源清单格式第一次读取时先重新打包到临时文件。
+    使用完毕后需要调用 close()。
+    """
+
+    size: int
+    object_name: Optional[str] = None
+    file: Optional[BinaryIO] = None
+
+    async def iter_range(self, offset: int = 0, length: int = 0) -> AsyncIterator[bytes]:
+        """分块读取 [offset, offset + length)，length 为 0 表示读到末尾"""
+        chunk_size = settings.upload_chunk_size
+
+        if self.file is None:
+            storage = get_storage_service()
+            async for chunk in storage.stream_file(
+                self.object_name, offset=offset, length=length, chunk_size=chunk_size
+            ):
+                yield chunk
+            return
+
+        remaining = length or self.size - offset
+        self.file.seek(offset)
+        while remaining > 0:
+            chunk = self.file.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+    async def read_all(self) -> bytes:
+        return b"".join([chunk async for chunk in self.iter_range()])
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+
+
+def decode_project_data(project_json: Optional[dict[str, Any]]) -> Optional[bytes]:
+    """解码兼容旧客户端的 projectJson（包含 base64 data URL 的 sb3 字段）
+
+    新客户端应使用 save_project_stream 直接上传二进制。
+
+    Returns:
+        sb3 内容，没有项目数据时返回 None
+
+    Raises:
+        InvalidProjectData: base64 数据无效
     """
     if not project_json:
-        project.storage_path = None
-        return
+        return None
 
     sb3_data = project_json.get("sb3", "")
     if not sb3_data:
-        project.storage_path = None
-        return
+        return None
 
     # 去掉 data URL 前缀（如果有）
     # 格式: data:application/x.scratch.sb3;base64,XXXX
@@ -38,20 +115,321 @@ async def save_project_data(
         # 提取 base64 部分
         sb3_data = sb3_data.split(",", 1)[1]
 
-    # 解码 base64 数据并上传到 MinIO
-    file_data = base64.b64decode(sb3_data)
-    object_name = project.get_storage_object_name()
+    try:
+        with span("project.decode_base64", size=len(sb3_data)):
+            return base64.b64decode(sb3_data)
+    except binascii.Error as e:
+        raise InvalidProjectData(f"Invalid base64 sb3 data: {e}")
+
+
+async def save_project_data(project: Project, sb3: Optional[bytes]) -> None:
+    """保存 decode_project_data 解码后的 sb3，为 None 时清除项目数据
+
+    Args:
+        project: 项目实例（必须已经有 id）
+        sb3: sb3 内容
+
+    Raises:
+        InvalidProjectData: sb3 数据无效
+    """
+    if not sb3:
+        project.storage_path = None
+        project.content_hash = None
+        return
+    await save_project_stream(project, io.BytesIO(sb3), len(sb3))
+
+
+async def save_project_stream(
+    project: Project,
+    stream: BinaryIO,
+    length: int,
+) -> None:
+    """以流的方式保存 sb3 文件到 MinIO
+
+    sb3 被拆开：资源按内容去重存储，只有 project.json 和资源清单按项目保存。
+
+    Args:
+        project: 项目实例（必须已经有 id）
+        stream: sb3 文件流（可 seek），读取位置应在文件开头
+        length: 文件大小（字节）
+
+    Raises:
+        InvalidProjectData: sb3 数据无效
+    """
+    PROJECT_SB3_SIZE.observe(length)
+    with span("project.unpack_sb3", size=length):
+        project_json, assets = await unpack_sb3(stream)
+    previous = await _read_current_manifest(project)
+    with span("project.commit_manifest", assets=len(assets)):
+        await _commit_manifest(project, project_json, assets, previous)
+
+    project.file_size = length
+    logger.info(
+        f"Project {project.id}: stored in MinIO "
+        f"({length} bytes, {len(assets)} assets)"
+    )
+
+
+async def commit_project_json(project: Project, project_json: bytes) -> list[str]:
+    """增量保存：只提交新的 project.json
+
+    引用的资源必须已经在资源库中（上一版本已有，或已通过 store_named_asset 上传）。
+
+    Args:
+        project: 项目实例
+        project_json: project.json 原始内容
+
+    Returns:
+        资源库中缺失的资源名；非空时不做任何修改，客户端上传这些资源后重新提交
+
+    Raises:
+        InvalidProjectData: project.json 无效
+    """
+    parsed = await _parse_project_json(project_json)
+    names = referenced_assets(parsed)
+    previous = await _read_current_manifest(project)
+    known = {asset["name"]: asset for asset in previous["assets"]} if previous else {}
+
+    assets, missing = await resolve_assets(names, known)
+    if missing:
+        return missing
+
+    await _commit_manifest(project, project_json, assets, previous, parsed)
+    # 没有完整的 sb3，以内容总大小近似
+    project.file_size = len(project_json) + sum(asset["size"] for asset in assets)
+    logger.info(
+        f"Project {project.id}: committed project.json "
+        f"({len(project_json)} bytes, {len(assets)} assets)"
+    )
+    return []
+
+
+async def find_missing_assets(project: Project, names: list[str]) -> list[str]:
+    """找出资源库中缺失的资源，客户端据此只上传缺失部分
+
+    Raises:
+        InvalidProjectData: 资源名格式不正确
+    """
+    for name in names:
+        parse_md5ext(name)
+    previous = await _read_current_manifest(project)
+    known = {asset["name"]: asset for asset in previous["assets"]} if previous else {}
+    _, missing = await resolve_assets(names, known)
+    return missing
+
+
+async def _parse_project_json(project_json: bytes) -> dict[str, Any]:
+    try:
+        parsed = await asyncio.to_thread(json.loads, project_json)
+    except ValueError as e:
+        raise InvalidProjectData(f"Invalid project.json: {e}")
+    if not isinstance(parsed, dict):
+        raise InvalidProjectData("Invalid project.json: not an object")
+    return parsed
+
+
+async def _read_current_manifest(project: Project) -> Optional[dict[str, Any]]:
+    """读取项目当前版本的资源清单，旧格式或没有数据时返回 None"""
+    if not project.storage_path or project.storage_format != "assets":
+        return None
+    return await _read_manifest(project.storage_path)
+
+
+async def _commit_manifest(
+    project: Project,
+    project_json: bytes,
+    assets: list[dict[str, Any]],
+    previous: Optional[dict[str, Any]],
+    parsed: Optional[dict[str, Any]] = None,
+) -> None:
+    """写入 project.json 和资源清单，并把项目指向新版本
 
+    两者都按内容版本化，写入不影响当前版本；调用方保存元数据后才切换。
+    以下工作不在保存路径上，记录在项目上，由 on_project_saved 在元数据保存后执行：
+    - 生成项目统计和内容索引（parsed 为已解析的 project.json 时不再重复解析）
+    - 延迟删除旧版本的资源清单、project.json、打包缓存和旧格式的 sb3
+    """
     storage = get_storage_service()
-    storage.upload_file(
-        file_data=file_data,
-        object_name=object_name,
-        content_type="application/x-scratch-project",
+    previous_json_key = previous["projectJson"]["key"] if previous else None
+    previous_packed_key = (
+        project.get_packed_object_name(project.content_hash) if previous and project.content_hash else None
+    )
+    previous_path = project.storage_path
+
+    project_json_sha256 = hashlib.sha256(project_json).hexdigest()
+    project_json_key = project.get_project_json_object_name(project_json_sha256)
+    manifest = build_manifest(project_json_key, project_json, project_json_sha256, assets)
+
+    await storage.upload_file(project_json, project_json_key, content_type="application/json")
+    manifest_data = dump_manifest(manifest)
+    content_hash = hashlib.sha256(manifest_data).hexdigest()
+    manifest_key = project.get_manifest_object_name(content_hash)
+    await storage.upload_file(manifest_data, manifest_key, content_type="application/json")
+
+    project.storage_path = manifest_key
+    project.storage_format = "assets"
+    project.content_hash = content_hash
+
+    project._post_save_tasks.append(
+        partial(
+            analyze_project_content,
+            project.id,
+            project.owner_id,
+            project.content_hash,
+            parsed if parsed is not None else project_json,
+            assets,
+        )
     )
 
-    project.storage_path = object_name
-    project.file_size = len(file_data)
-    logger.info(f"Project {project.id}: stored in MinIO ({len(file_data)} bytes)")
+    replaced = []
+    if previous_json_key and previous_json_key != project_json_key:
+        replaced.append(previous_json_key)
+    if previous_packed_key and previous_packed_key != project.get_packed_object_name(project.content_hash):
+        replaced.append(previous_packed_key)
+    if previous_path and previous_path != manifest_key:
+        replaced.append(previous_path)
+    if replaced:
+        project._post_save_tasks.append(partial(_delete_replaced_objects, project, replaced))
+
+
+def on_project_saved(project: Project) -> None:
+    """项目元数据保存后调用：在后台执行保存过程中记录的任务（见 _commit_manifest、save_thumbnail）
+
+    这些任务失败只记录日志，不影响保存结果。
+    """
+    tasks, project._post_save_tasks = project._post_save_tasks, []
+    for func in tasks:
+        task = asyncio.create_task(func())
+        _post_save_tasks.add(task)
+        task.add_done_callback(_post_save_tasks.discard)
+
+
+# 正在执行的保存后任务（保持引用，避免任务被垃圾回收）
+_post_save_tasks: set[asyncio.Task] = set()
+
+
+async def _delete_replaced_objects(project: Project, names: list[str]) -> None:
+    """删除被替换的旧版本对象
+
+    已经读到旧资源清单的请求（分享页、打包下载）可能还在读取旧的 project.json，
+    因此保留 replaced_object_grace_seconds 秒后再删除。
+    """
+    await asyncio.sleep(settings.replaced_object_grace_seconds)
+    try:
+        # 期间再次保存可能又切换回同样的内容，当前版本引用的对象不删除
+        current_keys = await _current_object_names(project)
+        storage = get_storage_service()
+        for name in names:
+            if name not in current_keys:
+                await storage.delete_file(name)
+    except Exception as e:
+        logger.warning(f"Project {project.id}: failed to delete replaced objects {names}: {e}")
+
+
+async def _current_object_names(project: Project) -> set[str]:
+    """项目当前版本（以 MongoDB 中的元数据为准）引用的项目对象"""
+    current = await Project.get(project.id)
+    if current is None or not current.storage_path:
+        return set()
+    names = {current.storage_path}
+    if current.content_hash:
+        names.add(current.get_packed_object_name(current.content_hash))
+    manifest = await _read_current_manifest(current)
+    if manifest:
+        names.add(manifest["projectJson"]["key"])
+    return names
+
+
+async def _read_manifest(object_name: str) -> Optional[dict[str, Any]]:
+    storage = get_storage_service()
+    data = await storage.download_file(object_name)
+    return load_manifest(data) if data else None
+
+
+async def open_project_content(project: Project) -> Optional[ProjectContent]:
+    """打开项目 sb3 内容，项目没有数据时返回 None"""
+    if not project.storage_path:
+        return None
+
+    if project.storage_format != "assets":
+        size = project.file_size or None
+        if size is None:
+            storage = get_storage_service()
+            size = await storage.get_file_size(project.storage_path)
+        if size is None:
+            return None
+        return ProjectContent(size=size, object_name=project.storage_path)
+
+    # 打包结果只取决于内容版本，缓存在 MinIO 中，之后的下载和 Range 请求直接读取
+    storage = get_storage_service()
+    packed_key = project.get_packed_object_name(project.get_content_version())
+    size = await storage.get_file_size(packed_key)
+    if size is not None:
+        return ProjectContent(size=size, object_name=packed_key)
+
+    manifest = await _read_manifest(project.storage_path)
+    if manifest is None:
+        return None
+
+    try:
+        with span("project.pack_sb3", assets=len(manifest["assets"])):
+            file, size = await pack_sb3(manifest)
+    except FileNotFoundError as e:
+        logger.warning(f"Project {project.id}: missing object {e}")
+        return None
+
+    try:
+        await storage.upload_stream(file, packed_key, length=size, content_type="application/x.scratch.sb3")
+    except Exception as e:
+        logger.warning(f"Project {project.id}: failed to cache packed sb3: {e}")
+    file.seek(0)
+    return ProjectContent(size=size, file=file)
+
+
+async def read_project_source(
+    project: Project,
+) -> Optional[tuple[bytes, list[dict[str, Any]]]]:
+    """读取项目的 project.json 和资源列表（{name, size}），项目没有数据时返回 None
+
+    资源清单格式直接读取 project.json 对象；旧格式把 sb3 分块写入临时文件
+    （超过 upload_spool_max_memory 后落盘）再从中解压，内存占用有界。
+    """
+    if not project.storage_path:
+        return None
+
+    storage = get_storage_service()
+    if project.storage_format == "assets":
+        manifest = await _read_manifest(project.storage_path)
+        if manifest is None:
+            return None
+        project_json = await storage.download_file(manifest["projectJson"]["key"])
+        if project_json is None:
+            return None
+        return project_json, manifest["assets"]
+
+    if await storage.get_file_size(project.storage_path) is None:
+        return None
+
+    with tempfile.SpooledTemporaryFile(max_size=settings.upload_spool_max_memory) as spool:
+        async for chunk in storage.stream_file(
+            project.storage_path, chunk_size=settings.upload_chunk_size
+        ):
+            spool.write(chunk)
+        spool.seek(0)
+        try:
+            return await asyncio.to_thread(_read_sb3_source, spool)
+        except (zipfile.BadZipFile, KeyError) as e:
+            raise InvalidProjectData(f"Invalid sb3 archive: {e}")
+
+
+def _read_sb3_source(file: BinaryIO) -> tuple[bytes, list[dict[str, Any]]]:
+    with zipfile.ZipFile(file) as archive:
+        assets = [
+            {"name": info.filename, "size": info.file_size}
+            for info in archive.infolist()
+            if info.filename != PROJECT_JSON_NAME and not info.is_dir()
+        ]
+        return archive.read(PROJECT_JSON_NAME), assets
 
 
 async def load_project_data(project: Project) -> Optional[dict[str, Any]]:
@@ -66,13 +444,28 @@ async def load_project_data(project: Project) -> Optional[dict[str, Any]]:
     if not project.storage_path:
         return None
 
-    storage = get_storage_service()
-    file_data = storage.download_file(project.storage_path)
+    if project.storage_format == "assets":
+        content = await open_project_content(project)
+        if content is None:
+            file_data = None
+        else:
+            try:
+                file_data = await content.read_all()
+            finally:
+                content.close()
+    else:
+        storage = get_storage_service()
+        file_data = await storage.download_file(project.storage_path)
 
     if not file_data:
         logger.warning(f"Project {project.id}: file not found: {project.storage_path}")
         return None
 
+    return sb3_data_url(file_data)
+
+
+def sb3_data_url(file_data: bytes) -> dict[str, Any]:
+    """把 sb3 内容转换为 projectJson 格式"""
     sb3_base64 = base64.b64encode(file_data).decode("utf-8")
     # 返回 data URL 格式，前端需要这个格式来加载项目
     return {"sb3": f"data:application/x.scratch.sb3;base64,{sb3_base64}"}
@@ -81,10 +474,14 @@ async def load_project_data(project: Project) -> Optional[dict[str, Any]]:
 async def delete_project_data(project: Project) -> None:
     """删除 MinIO 中的项目数据
 
+    共享资源（assets/）可能被其他项目引用，不在这里删除。
+    没有项目数据的项目也可能有缩略图，因此总是删除整个前缀。
+
     Args:
         project: 项目实例
     """
-    if project.storage_path:
-        storage = get_storage_service()
-        storage.delete_file(project.storage_path)
-        logger.info(f"Project {project.id}: deleted from MinIO")
+    await delete_content_index(project.id)
+    storage = get_storage_service()
+    deleted = await storage.delete_prefix(project.get_storage_prefix())
+    if deleted:
+        logger.info(f"Project {project.id}: deleted {deleted} objects from MinIO")
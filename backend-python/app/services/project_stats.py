@@ -0,0 +1,93 @@
+"""项目统计
+
+保存项目后从 project.json 统计角色、积木、造型、声音数量，资源总大小和使用的扩展，
+作为元数据存入 Project 文档（见 app.services.content_index.analyze_project_content），
+管理后台可以直接按这些字段排序和筛选。
+"""
+
+import logging
+from typing import Any
+
+from app.core.search import normalize_name
+from app.models import Project
+
+logger = logging.getLogger(__name__)
+
+# Project 上的统计字段
+STATS_FIELDS = (
+    "sprite_count",
+    "block_count",
+    "costume_count",
+    "sound_count",
+    "asset_bytes",
+    "extensions",
+)
+
+
+async def backfill_missing_stats() -> int:
+    """为缺少统计字段的旧项目写入默认值，返回更新的字段数
+
+    Beanie 加载文档时用默认值补齐缺少的字段，游标因此记录的是 0；
+    而 {field: {"$lt": 0}}、{field: 0} 都不匹配缺少该字段的文档，按统计字段游标翻页会漏掉它们。
+    """
+    collection = Project.get_motor_collection()
+    updated = 0
+    for field in STATS_FIELDS:
+        default = Project.model_fields[field].get_default(call_default_factory=True)
+        result = await collection.update_many({field: {"$exists": False}}, {"$set": {field: default}})
+        updated += result.modified_count
+    if updated:
+        logger.info(f"Backfilled {updated} missing project stats fields")
+    return updated
+
+
+def extract_project_stats(
+    project_json: dict[str, Any],
+    assets: list[dict[str, Any]],
+) -> dict[str, Any]:
+    """统计项目内容
+
+    Args:
+        project_json: 解析后的 project.json
+        assets: 项目的资源列表（资源清单中的 {name, size, ...}）
+    """
+    sprite_count = block_count = costume_count = sound_count = 0
+
+    for target in project_json.get("targets") or []:
+        if not isinstance(target, dict):
+            continue
+        if not target.get("isStage"):
+            sprite_count += 1
+        costume_count += _count_list(target.get("costumes"))
+        sound_count += _count_list(target.get("sounds"))
+
+        blocks = target.get("blocks")
+        if isinstance(blocks, dict):
+            # 不计入菜单等影子积木和顶层的变量 / 列表积木（数组形式）
+            block_count += sum(
+                1
+                for block in blocks.values()
+                if isinstance(block, dict) and not block.get("shadow")
+            )
+
+    extensions = sorted(
+        {
+            normalize_name(extension)
+            for extension in project_json.get("extensions") or []
+            if isinstance(extension, str)
+        }
+    )
+    asset_sizes = {asset["name"]: asset.get("size", 0) for asset in assets}
+
+    return {
+        "sprite_count": sprite_count,
+        "block_count": block_count,
+        "costume_count": costume_count,
+        "sound_count": sound_count,
+        "asset_bytes": sum(asset_sizes.values()),
+        "extensions": extensions,
+    }
+
+
+def _count_list(value: Any) -> int:
+    return len(value) if isinstance(value, list) else 0
@@ -0,0 +1,85 @@
+"""token 吊销
+
+退出登录时把 token 的 jti 写入 Redis（revoked:{jti}），在 token 过期时自动删除。
+每次请求都查 Redis 代价太高，因此在进程内缓存两类结果：
+- 已吊销：缓存到 token 过期
+- 未吊销：缓存 token_revocation_cache_ttl 秒，其他实例上的退出登录最迟在此时间后生效
+
+Redis 不可用时只依赖进程内的吊销记录。
+禁用、删除用户等需要吊销某个用户全部 token 的场景使用 User.token_version。
+"""
+
+import logging
+import time
+
+from redis.exceptions import RedisError
+
+from app.core.cache import LRUCache
+from app.core.config import get_settings
+from app.core.redis import get_redis, report_redis_error
+from app.core.security import TokenClaims
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_revoked: LRUCache[str, bool] = LRUCache(max_items=100_000)
+_not_revoked: LRUCache[str, bool] = LRUCache(
+    max_items=100_000,
+    ttl=settings.token_revocation_cache_ttl,
+)
+_stats = {"redisChecks": 0, "redisErrors": 0}
+
+
+def _redis_key(token_id: str) -> str:
+    return f"revoked:{token_id}"
+
+
+async def revoke_token(claims: TokenClaims) -> None:
+    """吊销单个 token，直到它过期"""
+    ttl = claims.expires_at - time.time()
+    if ttl <= 0:
+        return
+
+    _revoked.set(claims.token_id, True, ttl=ttl)
+    _not_revoked.delete(claims.token_id)
+
+    redis = get_redis()
+    if redis is None:
+        return
+
+    try:
+        await redis.set(_redis_key(claims.token_id), 1, exat=int(claims.expires_at) + 1)
+    except (RedisError, OSError) as e:
+        _stats["redisErrors"] += 1
+        report_redis_error(e)
+
+
+async def is_token_revoked(claims: TokenClaims) -> bool:
+    """检查 token 是否已吊销，大多数情况下不需要访问 Redis"""
+    if _revoked.get(claims.token_id):
+        return True
+    if _not_revoked.get(claims.token_id):
+        return False
+
+    redis = get_redis()
+    if redis is None:
+        return False
+
+    _stats["redisChecks"] += 1
+    try:
+        revoked = await redis.exists(_redis_key(claims.token_id))
+    except (RedisError, OSError) as e:
+        _stats["redisErrors"] += 1
+        report_redis_error(e)
+        return False
+
+    if revoked:
+        _revoked.set(claims.token_id, True, ttl=max(claims.expires_at - time.time(), 1))
+        return True
+    _not_revoked.set(claims.token_id, True)
+    return False
+
+
+def get_revocation_stats() -> dict:
+    """吊销检查统计"""
+    return {"revoked": _revoked.stats(), "notRevoked": _not_revoked.stats(), **_stats}
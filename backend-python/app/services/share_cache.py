@@ -0,0 +1,138 @@
+"""分享项目缓存
+
+热门分享项目被大量重复访问，sb3 内容缓存在两级：
+- 进程内 LRU，按字节数限制
+- Redis（share:sb3:{project_id}），多个 worker / 实例共享
+
+缓存按项目 id 存储，并记录内容版本（content_hash）；版本不一致视为未命中，
+项目更新、取消分享和删除时显式失效。
+"""
+
+import io
+import logging
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from app.core.cache import LRUCache
+from app.core.config import get_settings
+from app.core.redis import get_redis, report_redis_error
+from app.models import Project
+from app.services.project import ProjectContent, open_project_content
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_local: LRUCache[str, tuple[str, bytes]] = LRUCache(
+    max_bytes=settings.share_cache_max_bytes,
+    ttl=settings.share_cache_ttl,
+    sizeof=lambda value: len(value[1]),
+)
+_stats = {"redisHits": 0, "redisMisses": 0, "redisErrors": 0}
+
+
+def _redis_key(project_id: str) -> str:
+    return f"share:sb3:{project_id}"
+
+
+def cache_version(project: Project) -> str:
+    """项目内容版本，用于判断缓存是否过期"""
+    return project.get_content_version() or ""
+
+
+async def get_cached_content(project: Project) -> Optional[bytes]:
+    """读取缓存的 sb3 内容，未命中返回 None"""
+    if not settings.share_cache_enabled:
+        return None
+
+    project_id = str(project.id)
+    version = cache_version(project)
+
+    entry = _local.get(project_id, validate=lambda value: value[0] == version)
+    if entry is not None:
+        return entry[1]
+
+    redis = get_redis()
+    if redis is None:
+        return None
+
+    try:
+        cached_version, data = await redis.hmget(_redis_key(project_id), "version", "data")
+    except (RedisError, OSError) as e:
+        _stats["redisErrors"] += 1
+        report_redis_error(e)
+        return None
+
+    if data is None or cached_version is None or cached_version.decode() != version:
+        _stats["redisMisses"] += 1
+        return None
+
+    _stats["redisHits"] += 1
+    _local.set(project_id, (version, data))
+    return data
+
+
+async def set_cached_content(project: Project, data: bytes) -> None:
+    """写入缓存，超过 share_cache_max_entry_bytes 的项目不缓存"""
+    if not settings.share_cache_enabled or len(data) > settings.share_cache_max_entry_bytes:
+        return
+
+    project_id = str(project.id)
+    version = cache_version(project)
+    _local.set(project_id, (version, data))
+
+    redis = get_redis()
+    if redis is None:
+        return
+
+    key = _redis_key(project_id)
+    try:
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={"version": version, "data": data})
+            pipe.expire(key, settings.share_cache_ttl)
+            await pipe.execute()
+    except (RedisError, OSError) as e:
+        _stats["redisErrors"] += 1
+        report_redis_error(e)
+
+
+async def invalidate_cached_content(project: Project) -> None:
+    """使项目的缓存失效（更新、取消分享、删除时调用）"""
+    project_id = str(project.id)
+    _local.delete(project_id)
+
+    redis = get_redis()
+    if redis is None:
+        return
+
+    try:
+        await redis.delete(_redis_key(project_id))
+    except (RedisError, OSError) as e:
+        _stats["redisErrors"] += 1
+        report_redis_error(e)
+
+
+async def open_shared_content(project: Project) -> Optional[ProjectContent]:
+    """打开分享项目的 sb3 内容，优先从缓存读取
+
+    可缓存大小以内的项目读入内存并写入缓存；更大的项目直接流式读取。
+    """
+    data = await get_cached_content(project)
+    if data is not None:
+        return ProjectContent(size=len(data), file=io.BytesIO(data))
+
+    content = await open_project_content(project)
+    if content is None or content.size > settings.share_cache_max_entry_bytes:
+        return content
+
+    try:
+        data = await content.read_all()
+    finally:
+        content.close()
+    await set_cached_content(project, data)
+    return ProjectContent(size=len(data), file=io.BytesIO(data))
+
+
+def get_share_cache_stats() -> dict:
+    """缓存命中统计"""
+    return {"local": _local.stats(), **_stats}
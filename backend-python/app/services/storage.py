@@ -1,97 +1,280 @@
+import asyncio
 import io
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from functools import lru_cache
-from typing import Optional
-
-from minio import Minio
-from minio.error import S3Error
+from typing import AsyncIterator, BinaryIO, Callable, Optional, TypeVar
 
 from app.core.config import get_settings
+from app.core.metrics import STORAGE_OPERATION_DURATION
+from app.core.tracing import span
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 就绪检查的线程数（见 StorageService.ping）
+PROBE_WORKERS = 2
+
+
+class StorageError(Exception):
+    """MinIO 返回的错误（包装 minio.error.S3Error）"""
 
 
 class StorageService:
-    """MinIO 存储服务"""
+    """MinIO 存储服务
+
+    minio-py 是同步客户端，所有网络调用都在有界线程池中执行，
+    避免大文件传输阻塞事件循环。线程数即 MinIO 请求并发上限。
+
+    minio 及其依赖的导入需要约 0.2 秒，在第一次创建服务时才导入，不拖慢应用启动。
+    """
 
     def __init__(self):
+        from minio.error import S3Error
+
         settings = get_settings()
-        self.client = Minio(
+        self.client = self._make_client(
+            timeout=settings.minio_timeout,
+            pool_size=settings.minio_pool_size,
+            retries=5,
+        )
+        # 就绪检查使用单独的客户端和线程池：超时短、不重试，挂起的 MinIO 最多占用
+        # 探测线程 health_check_timeout 秒，不会占满存储线程池
+        self._probe_client = self._make_client(
+            timeout=settings.health_check_timeout,
+            pool_size=PROBE_WORKERS,
+            retries=0,
+        )
+        self._s3_error = S3Error
+        self.bucket = settings.minio_bucket
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.storage_max_concurrency,
+            thread_name_prefix="storage",
+        )
+        self._probe_executor = ThreadPoolExecutor(
+            max_workers=PROBE_WORKERS,
+            thread_name_prefix="storage-probe",
+        )
+
+    @staticmethod
+    def _make_client(timeout: float, pool_size: int, retries: int):
+        import certifi
+        import urllib3
+        from minio import Minio
+
+        settings = get_settings()
+        return Minio(
             settings.minio_endpoint,
             access_key=settings.minio_access_key,
             secret_key=settings.minio_secret_key,
             secure=settings.minio_secure,
+            http_client=urllib3.PoolManager(
+                timeout=urllib3.Timeout(connect=timeout, read=timeout),
+                maxsize=pool_size,
+                cert_reqs="CERT_REQUIRED",
+                ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+                retries=urllib3.Retry(
+                    total=retries,
+                    backoff_factor=0.2,
+                    status_forcelist=[500, 502, 503, 504],
+                ),
+            ),
         )
-        self.bucket = settings.minio_bucket
-        self._ensure_bucket()
+
+    async def ensure_bucket(self) -> None:
+        """确保 bucket 存在（启动任务，见 app.startup）"""
+        await self._run(self._ensure_bucket)
 
     def _ensure_bucket(self):
-        """确保 bucket 存在"""
         try:
             if not self.client.bucket_exists(self.bucket):
                 self.client.make_bucket(self.bucket)
-                print(f'Bucket "{self.bucket}" created successfully')
-            else:
-                print(f'Bucket "{self.bucket}" already exists')
-        except S3Error as e:
-            print(f"Error creating bucket: {e}")
+                logger.info(f'Bucket "{self.bucket}" created')
+        except self._s3_error as e:
+            logger.error(f"Error creating bucket: {e}")
+
+    async def ping(self) -> bool:
+        """检查 MinIO 是否可访问、bucket 是否存在（就绪检查）
+
+        Raises:
+            StorageError: MinIO 返回错误
+        """
+        return await self._run_in(self._probe_executor, self._probe_client.bucket_exists, self.bucket)
+
+    async def _run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """在存储线程池中执行阻塞调用，S3Error 转为 StorageError"""
+        return await self._run_in(self._executor, func, *args, **kwargs)
+
+    async def _run_in(self, executor: ThreadPoolExecutor, func: Callable[..., T], *args, **kwargs) -> T:
+        """在指定线程池中执行阻塞调用，S3Error 转为 StorageError
+
+        按函数名（put_object、stat_object 等）记录耗时，不包括在线程池中排队的时间。
+        """
+        operation = getattr(func, "__name__", "call").lstrip("_")
 
-    def upload_file(
+        def _call() -> T:
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                result = func(*args, **kwargs)
+                outcome = "success"
+                return result
+            except self._s3_error as e:
+                raise StorageError(str(e)) from e
+            finally:
+                STORAGE_OPERATION_DURATION.labels(operation, outcome).observe(
+                    time.perf_counter() - start
+                )
+
+        loop = asyncio.get_running_loop()
+        with span(f"storage.{operation}"):
+            return await loop.run_in_executor(executor, _call)
+
+    async def upload_file(
         self,
         file_data: bytes,
         object_name: str,
         content_type: str = "application/octet-stream",
     ) -> str:
         """上传文件"""
+        return await self.upload_stream(
+            io.BytesIO(file_data),
+            object_name,
+            length=len(file_data),
+            content_type=content_type,
+        )
+
+    async def upload_stream(
+        self,
+        stream: BinaryIO,
+        object_name: str,
+        length: int,
+        content_type: str = "application/octet-stream",
+    ) -> str:
+        """流式上传文件
+
+        minio 按分片从 stream 中读取数据，不会一次性把整个文件读入内存。
+        """
         try:
-            self.client.put_object(
+            await self._run(
+                self.client.put_object,
                 self.bucket,
                 object_name,
-                io.BytesIO(file_data),
-                length=len(file_data),
+                stream,
+                length=length,
                 content_type=content_type,
             )
             return f"{self.bucket}/{object_name}"
-        except S3Error as e:
+        except StorageError as e:
             raise Exception(f"Failed to upload file: {e}")
 
-    def download_file(self, object_name: str) -> Optional[bytes]:
+    async def download_file(self, object_name: str) -> Optional[bytes]:
         """下载文件"""
-        try:
+
+        def _download() -> bytes:
             response = self.client.get_object(self.bucket, object_name)
-            return response.read()
-        except S3Error:
-            return None
-        finally:
-            if 'response' in locals():
+            try:
+                return response.read()
+            finally:
                 response.close()
                 response.release_conn()
 
-    def delete_file(self, object_name: str) -> bool:
+        try:
+            return await self._run(_download)
+        except StorageError:
+            return None
+
+    async def stream_file(
+        self,
+        object_name: str,
+        offset: int = 0,
+        length: int = 0,
+        chunk_size: int = 1024 * 1024,
+    ) -> AsyncIterator[bytes]:
+        """按固定大小分块读取文件
+
+        每块的读取都在存储线程池中执行，两块之间不占用线程。
+
+        Args:
+            object_name: 对象名称
+            offset: 起始字节
+            length: 读取长度，0 表示读到文件末尾
+            chunk_size: 每块大小（字节）
+        """
+        response = await self._run(
+            self.client.get_object,
+            self.bucket,
+            object_name,
+            offset=offset,
+            length=length,
+        )
+        try:
+            while True:
+                chunk = await self._run(response.read, chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            response.close()
+            response.release_conn()
+
+    async def get_file_size(self, object_name: str) -> Optional[int]:
+        """获取文件大小，文件不存在时返回 None"""
+        try:
+            stat = await self._run(self.client.stat_object, self.bucket, object_name)
+            return stat.size
+        except StorageError:
+            return None
+
+    async def delete_file(self, object_name: str) -> bool:
         """删除文件"""
         try:
-            self.client.remove_object(self.bucket, object_name)
+            await self._run(self.client.remove_object, self.bucket, object_name)
             return True
-        except S3Error:
+        except StorageError:
             return False
 
-    def get_presigned_url(self, object_name: str, expires_hours: int = 1) -> str:
-        """获取预签名 URL"""
-        from datetime import timedelta
+    async def delete_prefix(self, prefix: str) -> int:
+        """删除指定前缀下的所有文件，返回删除数量"""
 
+        def _delete() -> int:
+            from minio.deleteobjects import DeleteObject
+
+            names = [
+                obj.object_name
+                for obj in self.client.list_objects(self.bucket, prefix=prefix, recursive=True)
+            ]
+            errors = self.client.remove_objects(
+                self.bucket, (DeleteObject(name) for name in names)
+            )
+            # remove_objects 是惰性的，必须消费结果才会真正执行删除
+            failed = sum(1 for _ in errors)
+            return len(names) - failed
+
+        try:
+            return await self._run(_delete)
+        except StorageError:
+            return 0
+
+    async def get_presigned_url(self, object_name: str, expires_hours: int = 1) -> str:
+        """获取预签名 URL"""
         try:
-            return self.client.presigned_get_object(
+            return await self._run(
+                self.client.presigned_get_object,
                 self.bucket,
                 object_name,
                 expires=timedelta(hours=expires_hours),
             )
-        except S3Error as e:
+        except StorageError as e:
             raise Exception(f"Failed to generate presigned URL: {e}")
 
-    def file_exists(self, object_name: str) -> bool:
+    async def file_exists(self, object_name: str) -> bool:
         """检查文件是否存在"""
-        try:
-            self.client.stat_object(self.bucket, object_name)
-            return True
-        except S3Error:
-            return False
+        return await self.get_file_size(object_name) is not None
 
 
 @lru_cache
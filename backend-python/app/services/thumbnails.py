@@ -0,0 +1,178 @@
+"""项目缩略图存储
+
+缩略图不再以 base64 存在 MongoDB 文档中，而是解码后存入 MinIO：
+- projects/{id}/thumbnail.{hash}.png        原图（PNG，旧数据也可能是 JPEG）
+- projects/{id}/thumbnail.{hash}.{size}.webp  缩小的变体（需要安装 Pillow）
+
+URL 中带内容哈希，内容变化即换 URL，因此可以长期缓存。
+"""
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import io
+import logging
+import re
+from functools import partial
+from typing import Optional
+
+from app.models import Project
+from app.services.storage import get_storage_service
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow 是可选依赖，没有时只保存原图
+    Image = None
+
+# 变体名称 -> 最大宽度
+THUMBNAIL_SIZES = {"sm": 160, "md": 480}
+THUMBNAIL_MAX_BYTES = 2 * 1024 * 1024
+
+_HASH_RE = re.compile(r"^[0-9a-f]{16}$")
+_OBJECT_ID_RE = re.compile(r"^[0-9a-f]{24}$")
+
+# 允许的原图格式：文件头签名 -> Content-Type
+_IMAGE_SIGNATURES = {
+    b"\x89PNG\r\n\x1a\n": "image/png",
+    b"\xff\xd8\xff": "image/jpeg",
+}
+
+
+class InvalidThumbnail(ValueError):
+    """缩略图数据无效"""
+
+
+def thumbnail_object_name(project_id: str, thumbnail_hash: str, size: Optional[str] = None) -> str:
+    """获取缩略图的 MinIO 对象名称"""
+    if size is None:
+        return f"projects/{project_id}/thumbnail.{thumbnail_hash}.png"
+    return f"projects/{project_id}/thumbnail.{thumbnail_hash}.{size}.webp"
+
+
+def image_media_type(data: bytes) -> Optional[str]:
+    """按文件头识别图片格式，不是 PNG / JPEG 时返回 None"""
+    for signature, media_type in _IMAGE_SIGNATURES.items():
+        if data.startswith(signature):
+            return media_type
+    return None
+
+
+def decode_data_url(data_url: str) -> bytes:
+    """解码 data:image/png;base64,XXXX 格式的缩略图
+
+    缩略图公开访问并永久缓存，内容必须是 PNG 或 JPEG 图片。
+
+    Raises:
+        InvalidThumbnail: 格式不正确、不是图片或超过大小上限
+    """
+    if data_url.startswith("data:"):
+        data_url = data_url.split(",", 1)[-1]
+    try:
+        data = base64.b64decode(data_url, validate=True)
+    except binascii.Error as e:
+        raise InvalidThumbnail(f"Invalid thumbnail data: {e}")
+    if not data or len(data) > THUMBNAIL_MAX_BYTES:
+        raise InvalidThumbnail("Thumbnail is empty or too large")
+    if image_media_type(data) is None:
+        raise InvalidThumbnail("Thumbnail is not a PNG or JPEG image")
+    return data
+
+
+def _make_variants(data: bytes) -> dict[str, bytes]:
+    """生成缩小的 WebP 变体，Pillow 不可用或图片无法解析时返回空"""
+    if Image is None:
+        return {}
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.load()
+            variants = {}
+            for size, max_width in THUMBNAIL_SIZES.items():
+                variant = image.copy()
+                variant.thumbnail((max_width, max_width * 4))
+                output = io.BytesIO()
+                variant.save(output, format="WEBP", quality=80)
+                variants[size] = output.getvalue()
+            return variants
+    except Exception as e:
+        logger.warning(f"Failed to transcode thumbnail: {e}")
+        return {}
+
+
+async def save_thumbnail(project: Project, data: Optional[bytes]) -> None:
+    """保存缩略图到 MinIO，data 为空时清除缩略图
+
+    旧缩略图在元数据保存后才删除（见 app.services.project.on_project_saved）。
+
+    Args:
+        project: 项目实例（必须已经有 id）
+        data: decode_data_url 解码后的图片
+    """
+    previous_hash = project.thumbnail_hash
+
+    if not data:
+        project.thumbnail = None
+        project.thumbnail_hash = None
+    else:
+        thumbnail_hash = hashlib.sha256(data).hexdigest()[:16]
+        if thumbnail_hash != previous_hash:
+            await store_thumbnail(str(project.id), thumbnail_hash, data)
+        project.thumbnail = None
+        project.thumbnail_hash = thumbnail_hash
+
+    if previous_hash and previous_hash != project.thumbnail_hash:
+        storage = get_storage_service()
+        project._post_save_tasks.append(
+            partial(storage.delete_prefix, f"projects/{project.id}/thumbnail.{previous_hash}.")
+        )
+
+
+async def store_thumbnail(project_id: str, thumbnail_hash: str, data: bytes) -> None:
+    """上传缩略图原图及其缩小变体"""
+    storage = get_storage_service()
+    await storage.upload_file(
+        data,
+        thumbnail_object_name(project_id, thumbnail_hash),
+        content_type=image_media_type(data) or "image/png",
+    )
+
+    variants = await asyncio.to_thread(_make_variants, data)
+    for size, variant in variants.items():
+        await storage.upload_file(
+            variant,
+            thumbnail_object_name(project_id, thumbnail_hash, size),
+            content_type="image/webp",
+        )
+
+
+async def load_thumbnail(
+    project_id: str,
+    thumbnail_hash: str,
+    size: Optional[str] = None,
+) -> Optional[tuple[bytes, str]]:
+    """读取缩略图，返回 (内容, Content-Type)
+
+    请求的变体不存在（未安装 Pillow）时退回原图。不需要查询 MongoDB：
+    对象名中的哈希只有拿到项目信息的客户端才知道。
+    """
+    if not _OBJECT_ID_RE.match(project_id) or not _HASH_RE.match(thumbnail_hash):
+        return None
+
+    storage = get_storage_service()
+    if size is not None:
+        data = await storage.download_file(thumbnail_object_name(project_id, thumbnail_hash, size))
+        if data is not None:
+            return data, "image/webp"
+
+    data = await storage.download_file(thumbnail_object_name(project_id, thumbnail_hash))
+    if data is None:
+        return None
+    # 校验加入前上传的对象可能不是图片，不对外提供
+    media_type = image_media_type(data)
+    if media_type is None:
+        logger.warning(f"Project {project_id}: thumbnail {thumbnail_hash} is not an image")
+        return None
+    return data, media_type
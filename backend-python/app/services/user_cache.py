@@ -0,0 +1,114 @@
+"""登录用户缓存
+
+每个需要认证的请求都要加载当前用户。用户文档缓存在两级：
+- 进程内 LRU（user_cache_ttl 秒过期）
+- Redis（user:{user_id}），多个 worker / 实例共享
+
+缓存的是序列化后的文档，每次命中都构造新的 User 实例，调用方修改不会污染缓存。
+缓存中不包含密码哈希：认证不需要它，登录和修改密码都从数据库读取用户；
+因此缓存得到的 User 不能用来保存。
+管理员修改、禁用、删除用户或重置密码时显式失效；其他 worker 的进程内缓存
+最迟在 user_cache_ttl 秒后过期。
+"""
+
+import json
+import logging
+from typing import Optional
+
+from beanie import PydanticObjectId
+from redis.exceptions import RedisError
+
+from app.core.cache import LRUCache
+from app.core.config import get_settings
+from app.core.redis import get_redis, report_redis_error
+from app.models import User
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_local: LRUCache[str, bytes] = LRUCache(
+    max_items=settings.user_cache_max_items,
+    ttl=settings.user_cache_ttl,
+)
+_stats = {"redisHits": 0, "redisMisses": 0, "redisErrors": 0}
+
+
+def _redis_key(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
+async def get_cached_user(user_id: PydanticObjectId) -> Optional[User]:
+    """读取缓存的用户，未命中返回 None"""
+    if not settings.user_cache_enabled:
+        return None
+
+    key = str(user_id)
+    data = _local.get(key)
+    if data is None:
+        data = await _get_redis_user(key)
+        if data is None:
+            return None
+        _local.set(key, data)
+
+    return User.model_validate({**json.loads(data), "password_hash": ""})
+
+
+async def set_cached_user(user: User) -> None:
+    """写入缓存"""
+    if not settings.user_cache_enabled:
+        return
+
+    key = str(user.id)
+    data = user.model_dump_json(exclude={"password_hash"}).encode("utf-8")
+    _local.set(key, data)
+
+    redis = get_redis()
+    if redis is None:
+        return
+
+    try:
+        await redis.set(_redis_key(key), data, ex=settings.user_cache_ttl)
+    except (RedisError, OSError) as e:
+        _stats["redisErrors"] += 1
+        report_redis_error(e)
+
+
+async def invalidate_cached_user(user_id: PydanticObjectId) -> None:
+    """使用户缓存失效（修改、禁用、删除用户和重置密码时调用）"""
+    key = str(user_id)
+    _local.delete(key)
+
+    redis = get_redis()
+    if redis is None:
+        return
+
+    try:
+        await redis.delete(_redis_key(key))
+    except (RedisError, OSError) as e:
+        _stats["redisErrors"] += 1
+        report_redis_error(e)
+
+
+def get_user_cache_stats() -> dict:
+    """缓存命中统计"""
+    return {"enabled": settings.user_cache_enabled, "local": _local.stats(), **_stats}
+
+
+async def _get_redis_user(key: str) -> Optional[bytes]:
+    redis = get_redis()
+    if redis is None:
+        return None
+
+    try:
+        data = await redis.get(_redis_key(key))
+    except (RedisError, OSError) as e:
+        _stats["redisErrors"] += 1
+        report_redis_error(e)
+        return None
+
+    if data is None:
+        _stats["redisMisses"] += 1
+        return None
+
+    _stats["redisHits"] += 1
+    return data
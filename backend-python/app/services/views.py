@@ -0,0 +1,92 @@
+"""分享项目浏览次数统计
+
+浏览不再同步写 MongoDB：计数先累积在内存中，由后台任务定期用
+bulk_write + $inc 批量落库，关闭应用时再刷新一次。
+同一访客在 view_dedup_window 秒内重复刷新只计一次。
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Optional
+
+from beanie import PydanticObjectId
+from pymongo import UpdateOne
+
+from app.core.cache import LRUCache
+from app.core.config import get_settings
+from app.models import Project
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class ViewCounter:
+    """浏览次数缓冲区"""
+
+    def __init__(self):
+        self._pending: defaultdict[PydanticObjectId, int] = defaultdict(int)
+        self._recent: LRUCache[tuple[PydanticObjectId, str], bool] = LRUCache(
+            max_items=settings.view_dedup_max_entries,
+            ttl=settings.view_dedup_window,
+        )
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, project_id: PydanticObjectId, visitor: Optional[str]) -> bool:
+        """记录一次浏览，返回是否计数（窗口内重复访问不计数）"""
+        if visitor:
+            key = (project_id, visitor)
+            if key in self._recent:
+                return False
+            self._recent.set(key, True)
+
+        self._pending[project_id] += 1
+        return True
+
+    def pending(self, project_id: PydanticObjectId) -> int:
+        """尚未落库的浏览次数"""
+        return self._pending.get(project_id, 0)
+
+    async def flush(self) -> int:
+        """把缓冲的浏览次数批量写入 MongoDB，返回更新的项目数"""
+        if not self._pending:
+            return 0
+
+        pending, self._pending = self._pending, defaultdict(int)
+        operations = [
+            UpdateOne({"_id": project_id}, {"$inc": {"view_count": count}})
+            for project_id, count in pending.items()
+        ]
+        try:
+            await Project.get_motor_collection().bulk_write(operations, ordered=False)
+        except Exception as e:
+            # 写入失败时放回缓冲区，下次再试
+            for project_id, count in pending.items():
+                self._pending[project_id] += count
+            logger.warning(f"Failed to flush view counts: {e}")
+            return 0
+        return len(operations)
+
+    def start(self) -> None:
+        """启动定期刷新任务"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止定期刷新任务并刷新剩余计数"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.view_flush_interval)
+            await self.flush()
+
+
+view_counter = ViewCounter()
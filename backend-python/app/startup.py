@@ -0,0 +1,58 @@
+"""启动任务：创建 MinIO bucket、初始化默认管理员账号、补齐旧项目的统计字段
+
+每次部署只需要执行一次。run.py 的多进程模式在启动工作进程前由主进程执行，
+工作进程不再重复；直接用 uvicorn 启动时在 lifespan 中执行。
+多个实例同时启动时通过 MongoDB 锁串行执行，任务本身可重复执行。
+"""
+
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import get_settings
+from app.core.locks import LockTimeout, mongo_lock
+from app.core.security import hash_password
+from app.models import User
+from app.services import get_storage_service
+from app.services.project_stats import backfill_missing_stats
+
+logger = logging.getLogger(__name__)
+
+
+async def run_startup_tasks(client: AsyncIOMotorClient) -> None:
+    """在启动锁内执行启动任务（数据库须已初始化）"""
+    settings = get_settings()
+    database = client[settings.mongodb_db_name]
+    try:
+        async with mongo_lock(
+            database,
+            "startup",
+            ttl=settings.startup_lock_ttl,
+            timeout=settings.startup_lock_ttl,
+        ):
+            await get_storage_service().ensure_bucket()
+            await ensure_admin_user()
+            await backfill_missing_stats()
+    except LockTimeout:
+        # 其他实例正在执行，本实例不再重复
+        logger.warning("Startup tasks are running in another process, skipped")
+
+
+async def ensure_admin_user() -> None:
+    """初始化默认管理员账号"""
+    admin_user = await User.find_one(User.username == "admin")
+    if admin_user is None:
+        admin_user = User(
+            username="admin",
+            password_hash=await hash_password("admin"),
+            role="admin",
+            is_active=True,
+        )
+        await admin_user.insert()
+        logger.info("Default admin user created: admin / admin")
+    elif admin_user.role != "admin":
+        # 升级旧的 admin 用户为管理员
+        admin_user.role = "admin"
+        admin_user.is_active = True
+        await admin_user.save()
+        logger.info("Admin user upgraded to admin role")
@@ -0,0 +1,98 @@
+"""登录风暴压测
+
+模拟一个班级的学生同时登录，同时持续请求一个与登录无关的接口，
+统计该接口在登录高峰期间的延迟分布。bcrypt 阻塞事件循环时，
+无关接口的 p99 会上升到数百毫秒甚至秒级。
+
+使用方法（需要先启动后端并创建测试账号）:
+    python benchmarks/login_storm.py --base-url http://localhost:3001 \\
+        --username student --password secret --clients 40 --rounds 3
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def report(name: str, latencies: list[float]) -> None:
+    if not latencies:
+        print(f"{name:<8} no samples")
+        return
+    print(
+        f"{name:<8} n={len(latencies):<5} "
+        f"p50={percentile(latencies, 50) * 1000:7.1f}ms "
+        f"p99={percentile(latencies, 99) * 1000:7.1f}ms "
+        f"max={max(latencies) * 1000:7.1f}ms "
+        f"mean={statistics.mean(latencies) * 1000:7.1f}ms"
+    )
+
+
+async def login_client(client: httpx.AsyncClient, args, latencies: list[float], statuses: dict) -> None:
+    for _ in range(args.rounds):
+        start = time.perf_counter()
+        response = await client.post(
+            "/api/auth/login",
+            json={"username": args.username, "password": args.password},
+        )
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+
+async def probe(client: httpx.AsyncClient, path: str, latencies: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get(path)
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+
+
+async def main(args) -> None:
+    limits = httpx.Limits(max_connections=args.clients + 2)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30) as client:
+        # 空闲时的基线
+        baseline: list[float] = []
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(client, args.probe_path, baseline, stop))
+        await asyncio.sleep(1)
+        stop.set()
+        await task
+
+        login_latencies: list[float] = []
+        storm_latencies: list[float] = []
+        statuses: dict[int, int] = {}
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(client, args.probe_path, storm_latencies, stop))
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(login_client(client, args, login_latencies, statuses) for _ in range(args.clients))
+        )
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await task
+
+    print(f"{args.clients} clients x {args.rounds} logins in {elapsed:.2f}s, status codes: {statuses}")
+    report("idle", baseline)
+    report("storm", storm_latencies)
+    report("login", login_latencies)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="登录风暴压测")
+    parser.add_argument("--base-url", default="http://localhost:3001")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--clients", type=int, default=40, help="同时登录的客户端数")
+    parser.add_argument("--rounds", type=int, default=3, help="每个客户端登录次数")
+    parser.add_argument("--probe-path", default="/health", help="观察延迟的无关接口")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,92 @@
+"""吞吐量压测
+
+多个客户端进程用 keep-alive 连接持续请求同一接口，统计每秒请求数和延迟分布。
+用于对比不同启动方式（单进程 / 多进程、asyncio / uvloop、h11 / httptools）。
+压测客户端本身也消耗 CPU，最好在另一台机器上运行。
+
+使用方法:
+    # 当前启动方式
+    DEBUG=false WORKERS=4 python run.py
+    # 单进程、默认事件循环和 HTTP 解析器（对比基线）
+    uvicorn app.main:app --port 3001 --loop asyncio --http h11
+
+    python benchmarks/throughput.py --base-url http://localhost:3001 \\
+        --path /health --processes 4 --connections 32 --duration 10
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import statistics
+import time
+
+import httpx
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+async def worker(client: httpx.AsyncClient, path: str, headers: dict, deadline: float,
+                 latencies: list[float], errors: list[int]) -> None:
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await client.get(path, headers=headers)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+        except httpx.HTTPError:
+            errors.append(0)
+        latencies.append(time.perf_counter() - start)
+
+
+async def run_client(args) -> tuple[list[float], list[int]]:
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    latencies: list[float] = []
+    errors: list[int] = []
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30) as client:
+        # 预热：建立连接
+        await asyncio.gather(*(client.get(args.path, headers=headers) for _ in range(args.connections)))
+        deadline = time.perf_counter() + args.duration
+        await asyncio.gather(
+            *(worker(client, args.path, headers, deadline, latencies, errors) for _ in range(args.connections))
+        )
+    return latencies, errors
+
+
+def client_process(args) -> tuple[list[float], list[int]]:
+    return asyncio.run(run_client(args))
+
+
+def main(args) -> None:
+    with multiprocessing.Pool(args.processes) as pool:
+        results = pool.map(client_process, [args] * args.processes)
+
+    latencies = [latency for result, _ in results for latency in result]
+    errors = [error for _, result in results for error in result]
+    print(
+        f"{args.path}: {args.processes} processes x {args.connections} connections, "
+        f"{args.duration}s"
+    )
+    print(
+        f"requests={len(latencies)} rps={len(latencies) / args.duration:.0f} errors={len(errors)} "
+        f"p50={percentile(latencies, 50) * 1000:.1f}ms "
+        f"p99={percentile(latencies, 99) * 1000:.1f}ms "
+        f"mean={statistics.mean(latencies) * 1000 if latencies else 0:.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="吞吐量压测")
+    parser.add_argument("--base-url", default="http://localhost:3001")
+    parser.add_argument("--path", default="/health", help="压测的接口")
+    parser.add_argument("--token", default="", help="需要登录的接口使用的 access token")
+    parser.add_argument("--processes", type=int, default=4, help="客户端进程数")
+    parser.add_argument("--connections", type=int, default=32, help="每个进程的并发连接数")
+    parser.add_argument("--duration", type=float, default=10, help="压测时长（秒）")
+    main(parser.parse_args())
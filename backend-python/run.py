@@ -1,16 +1,82 @@
 #!/usr/bin/env python3
-"""启动脚本"""
+"""启动脚本
+
+- 开发模式（DEBUG=true）：单进程，代码修改后自动重载
+- 生产模式：多个工作进程（WORKERS，默认 CPU 核数），使用 uvloop 和 httptools；
+  启动任务（创建 bucket、初始化管理员）在启动工作进程前由主进程执行一次
+"""
+
+import asyncio
+import importlib.util
+import os
+import shutil
+import tempfile
 
 import uvicorn
 
 from app.core.config import get_settings
 
-if __name__ == "__main__":
+
+def _prefer(module: str, fallback: str) -> str:
+    """可选依赖已安装时使用，否则退回 uvicorn 的默认实现"""
+    return module if importlib.util.find_spec(module) else fallback
+
+
+async def _run_startup_tasks() -> None:
+    from app.models import init_database
+    from app.startup import run_startup_tasks
+
+    client = await init_database()
+    try:
+        await run_startup_tasks(client)
+    finally:
+        client.close()
+
+
+def _prepare_metrics_dir() -> None:
+    """多进程模式下各工作进程把指标写入共享目录，由 /metrics 汇总
+
+    必须在导入 prometheus_client 之前设置；每次启动清空上次运行留下的文件。
+    """
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.path.join(
+        tempfile.gettempdir(), "scratch-backend-metrics"
+    )
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+
+
+def main() -> None:
     settings = get_settings()
 
+    if settings.debug:
+        uvicorn.run(
+            "app.main:app",
+            host=settings.host,
+            port=settings.port,
+            reload=True,
+        )
+        return
+
+    workers = settings.workers or os.cpu_count() or 1
+    if workers > 1 and settings.metrics_enabled:
+        _prepare_metrics_dir()
+    if workers > 1 and settings.run_startup_tasks:
+        asyncio.run(_run_startup_tasks())
+        # 工作进程继承环境变量，跳过启动任务
+        os.environ["RUN_STARTUP_TASKS"] = "false"
+
     uvicorn.run(
         "app.main:app",
         host=settings.host,
         port=settings.port,
-        reload=settings.debug,
+        workers=workers,
+        loop=_prefer("uvloop", "asyncio"),
+        http=_prefer("httptools", "h11"),
+        backlog=settings.backlog,
+        timeout_keep_alive=settings.keep_alive_timeout,
     )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""测试公共 fixture
+
+- MongoDB：mongomock-motor；mongomock 不产生命令监控事件，由 _publish_command_events 按调用补发，
+  使 CommandListener（指标、追踪）和真实驱动下一样收到 started / succeeded
+- MinIO：FakeMinio 替换 minio.Minio，使用真实的 StorageService
+- Redis：关闭（REDIS_URL 为空），缓存按降级路径工作
+"""
+
+import os
+
+# 必须在导入 app 之前设置
+os.environ["REDIS_URL"] = ""
+os.environ["RUN_STARTUP_TASKS"] = "false"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["TRACING_SAMPLE_RATE"] = "0"
+os.environ["REPLACED_OBJECT_GRACE_SECONDS"] = "0"
+
+import itertools
+import time
+from datetime import timedelta
+from functools import wraps
+
+import minio
+import mongomock.filtering
+import pytest
+from beanie import init_beanie
+from bson import DBRef
+from httpx import ASGITransport, AsyncClient
+from mongomock_motor import AsyncMongoMockClient, AsyncMongoMockCollection
+from pymongo import monitoring
+
+from app.core.config import get_settings
+from app.core.metrics import MongoMetricsListener
+from app.core.readiness import READY, readiness
+from app.core.security import create_access_token, hash_password
+from app.main import app
+from app.models import User
+from app.models.database import DOCUMENT_MODELS
+from app.services.storage import get_storage_service
+
+from .fakes import FakeMinio
+
+# Motor 集合方法 -> MongoDB 命令名
+_COMMANDS = {
+    "find": "find",
+    "find_one": "find",
+    "insert_one": "insert",
+    "insert_many": "insert",
+    "replace_one": "update",
+    "update_one": "update",
+    "update_many": "update",
+    "delete_one": "delete",
+    "delete_many": "delete",
+    "count_documents": "aggregate",
+    "find_one_and_update": "findAndModify",
+}
+_ADDRESS = ("mongomock", 27017)
+_request_ids = itertools.count(1)
+
+
+def _started(listeners: list, command_name: str, collection: str) -> tuple[int, float]:
+    request_id = next(_request_ids)
+    event = monitoring.CommandStartedEvent({command_name: collection}, "test", request_id, _ADDRESS, None)
+    for listener in listeners:
+        listener.started(event)
+    return request_id, time.perf_counter()
+
+
+def _succeeded(listeners: list, command_name: str, request_id: int, start: float) -> None:
+    duration = timedelta(seconds=time.perf_counter() - start)
+    event = monitoring.CommandSucceededEvent(duration, {"ok": 1}, command_name, request_id, _ADDRESS, None)
+    for listener in listeners:
+        listener.succeeded(event)
+
+
+def _publish_command_events(monkeypatch: pytest.MonkeyPatch, listeners: list) -> None:
+    """让 mongomock 的集合操作像真实驱动一样通知 CommandListener"""
+    for method, command_name in _COMMANDS.items():
+        original = getattr(AsyncMongoMockCollection, method)
+
+        if method == "find":
+            # find 返回游标，mongomock 在创建游标时就完成查询
+            def wrapper(self, *args, _original=original, _command=command_name, **kwargs):
+                request_id, start = _started(listeners, _command, self.name)
+                try:
+                    return _original(self, *args, **kwargs)
+                finally:
+                    _succeeded(listeners, _command, request_id, start)
+
+        else:
+
+            async def wrapper(self, *args, _original=original, _command=command_name, **kwargs):
+                request_id, start = _started(listeners, _command, self.name)
+                try:
+                    return await _original(self, *args, **kwargs)
+                finally:
+                    _succeeded(listeners, _command, request_id, start)
+
+        monkeypatch.setattr(AsyncMongoMockCollection, method, wraps(original)(wrapper))
+
+
+def _resolve_dbref_keys(monkeypatch: pytest.MonkeyPatch) -> None:
+    """mongomock 不支持 {"owner.$id": ...} 这样穿过 DBRef 的查询，按 MongoDB 的行为把 DBRef 视为子文档"""
+    original = mongomock.filtering.iter_key_candidates
+
+    def iter_key_candidates(key, doc):
+        if isinstance(doc, DBRef):
+            doc = dict(doc.as_doc())
+        return original(key, doc)
+
+    monkeypatch.setattr(mongomock.filtering, "iter_key_candidates", iter_key_candidates)
+
+
+@pytest.fixture
+def mongo_listeners() -> list:
+    """MongoDB 命令监听器，测试可以追加（如 TracingCommandListener）"""
+    return [MongoMetricsListener()]
+
+
+@pytest.fixture
+async def mongo(monkeypatch, mongo_listeners):
+    """每个测试一个空的 mongomock 数据库，已初始化 Beanie
+
+    不创建索引：mongomock 不支持 partialFilterExpression，share_token 的唯一索引会把所有 null 视为重复。
+    """
+    _publish_command_events(monkeypatch, mongo_listeners)
+    _resolve_dbref_keys(monkeypatch)
+    client = AsyncMongoMockClient()
+    await init_beanie(database=client["test"], document_models=DOCUMENT_MODELS, skip_indexes=True)
+    yield client["test"]
+
+
+@pytest.fixture
+def minio_client(monkeypatch) -> FakeMinio:
+    """内存中的 MinIO；get_storage_service() 返回使用它的 StorageService"""
+    fake = FakeMinio()
+    fake.make_bucket(get_settings().minio_bucket)
+    monkeypatch.setattr(minio, "Minio", lambda *args, **kwargs: fake)
+    get_storage_service.cache_clear()
+    yield fake
+    storage = get_storage_service()
+    storage._executor.shutdown(wait=False, cancel_futures=True)
+    storage._probe_executor.shutdown(wait=False, cancel_futures=True)
+    get_storage_service.cache_clear()
+
+
+@pytest.fixture
+def ready():
+    """应用处于就绪状态（测试不运行 lifespan，依赖由 fixture 提供）"""
+    state = readiness.state
+    readiness.state = READY
+    yield
+    readiness.state = state
+
+
+@pytest.fixture
+async def client(mongo, minio_client, ready):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http:
+        yield http
+
+
+@pytest.fixture
+async def user(mongo) -> User:
+    user = User(username="student", password_hash=await hash_password("secret123"))
+    await user.insert()
+    return user
+
+
+@pytest.fixture
+def auth_headers(user) -> dict[str, str]:
+    return {"Authorization": f"Bearer {create_access_token(str(user.id), version=user.token_version)}"}
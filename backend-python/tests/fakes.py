@@ -0,0 +1,112 @@
+"""测试用的替身
+
+- FakeMinio：内存中的 minio.Minio，StorageService 的线程池、耗时统计和错误转换照常工作
+- make_sb3：构造 sb3 文件
+"""
+
+import io
+import json
+import threading
+import time
+import zipfile
+from types import SimpleNamespace
+from typing import Any, Optional
+
+from minio.error import S3Error
+
+
+class FakeResponse:
+    """get_object 返回的响应（urllib3.BaseHTTPResponse 的子集）"""
+
+    def __init__(self, data: bytes):
+        self._stream = io.BytesIO(data)
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        return self._stream.read(amt)
+
+    def close(self) -> None:
+        pass
+
+    def release_conn(self) -> None:
+        pass
+
+
+class FakeMinio:
+    """内存中的 MinIO 客户端，只实现 StorageService 用到的方法"""
+
+    def __init__(self, *args, **kwargs):
+        self.objects: dict[str, bytes] = {}
+        self.buckets: set[str] = set()
+        # 模拟慢速的 MinIO：每次调用前等待的秒数
+        self.latency = 0.0
+        # 模拟挂起的 MinIO：设置后调用阻塞到该 Event 被 set
+        self.hang: Optional[threading.Event] = None
+
+    def _wait(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        if self.hang is not None:
+            self.hang.wait()
+
+    def _missing(self, bucket_name: str, object_name: str) -> S3Error:
+        return S3Error(
+            None,
+            "NoSuchKey",
+            "Object does not exist",
+            f"/{bucket_name}/{object_name}",
+            None,
+            None,
+            bucket_name=bucket_name,
+            object_name=object_name,
+        )
+
+    def bucket_exists(self, bucket_name: str) -> bool:
+        self._wait()
+        return bucket_name in self.buckets
+
+    def make_bucket(self, bucket_name: str) -> None:
+        self.buckets.add(bucket_name)
+
+    def put_object(self, bucket_name: str, object_name: str, data, length: int, **kwargs) -> None:
+        self._wait()
+        self.objects[object_name] = data.read(length)
+
+    def get_object(self, bucket_name: str, object_name: str, offset: int = 0, length: int = 0, **kwargs):
+        self._wait()
+        if object_name not in self.objects:
+            raise self._missing(bucket_name, object_name)
+        data = self.objects[object_name][offset:]
+        return FakeResponse(data[:length] if length else data)
+
+    def stat_object(self, bucket_name: str, object_name: str, **kwargs):
+        self._wait()
+        if object_name not in self.objects:
+            raise self._missing(bucket_name, object_name)
+        return SimpleNamespace(object_name=object_name, size=len(self.objects[object_name]))
+
+    def remove_object(self, bucket_name: str, object_name: str, **kwargs) -> None:
+        self.objects.pop(object_name, None)
+
+    def list_objects(self, bucket_name: str, prefix: str = "", recursive: bool = False, **kwargs):
+        for name in sorted(self.objects):
+            if name.startswith(prefix):
+                yield SimpleNamespace(object_name=name)
+
+    def remove_objects(self, bucket_name: str, delete_object_list, **kwargs):
+        # 与 minio 一样是惰性的：消费返回的迭代器时才删除
+        for obj in delete_object_list:
+            self.objects.pop(obj.name, None)
+        yield from ()
+
+    def presigned_get_object(self, bucket_name: str, object_name: str, **kwargs) -> str:
+        return f"http://minio.test/{bucket_name}/{object_name}"
+
+
+def make_sb3(project_json: dict[str, Any], assets: Optional[dict[str, bytes]] = None) -> bytes:
+    """构造 sb3（zip）文件"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("project.json", json.dumps(project_json))
+        for name, data in (assets or {}).items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
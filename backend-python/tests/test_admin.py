@@ -0,0 +1,97 @@
+"""管理后台接口"""
+
+import pytest
+from beanie import PydanticObjectId
+
+from app.core.security import create_access_token, hash_password
+from app.models import Project, ProjectContentIndex, User
+from app.services.project_stats import STATS_FIELDS, backfill_missing_stats
+
+from .test_projects import PROJECT_JSON, _create_project, _upload, _wait_post_save_tasks
+
+
+@pytest.fixture
+async def admin_headers(mongo) -> dict[str, str]:
+    admin = User(username="admin", password_hash=await hash_password("admin123"), role="admin")
+    await admin.insert()
+    return {"Authorization": f"Bearer {create_access_token(str(admin.id))}"}
+
+
+@pytest.mark.parametrize("params", [{"search": "!!!"}, {"owner": "？？"}])
+async def test_punctuation_only_project_search_matches_nothing(client, auth_headers, admin_headers, params):
+    await _create_project(client, auth_headers)
+
+    response = await client.get("/api/admin/projects", params=params, headers=admin_headers)
+
+    assert response.status_code == 200
+    assert response.json()["items"] == []
+    assert response.json()["total"] == 0
+
+
+async def test_punctuation_only_user_search_matches_nothing(client, user, admin_headers):
+    response = await client.get("/api/admin/users", params={"search": "..."}, headers=admin_headers)
+
+    assert response.status_code == 200
+    assert response.json()["items"] == []
+    assert response.json()["total"] == 0
+
+
+async def test_blank_search_is_no_filter(client, user, admin_headers):
+    response = await client.get("/api/admin/users", params={"search": " "}, headers=admin_headers)
+
+    assert response.status_code == 200
+    assert response.json()["total"] == 2
+
+
+async def test_delete_user_removes_project_data(client, user, auth_headers, admin_headers, minio_client):
+    project_ids = [await _create_project(client, auth_headers) for _ in range(2)]
+    for project_id in project_ids:
+        await _upload(client, auth_headers, project_id, PROJECT_JSON)
+    await _wait_post_save_tasks()
+    assert await ProjectContentIndex.find().count() == 2
+
+    response = await client.delete(f"/api/admin/users/{user.id}", headers=admin_headers)
+
+    assert response.status_code == 204
+    assert await Project.find().count() == 0
+    assert await ProjectContentIndex.find().count() == 0
+    assert not [name for name in minio_client.objects if name.startswith("projects/")]
+
+
+async def test_extension_filter_normalizes_ids(client, auth_headers, admin_headers):
+    project_id = await _create_project(client, auth_headers)
+    await _upload(client, auth_headers, project_id, {**PROJECT_JSON, "extensions": ["Pen", "ｍｕｓｉｃ"]})
+    await _wait_post_save_tasks()
+
+    project = await Project.get(project_id)
+    assert project.extensions == ["music", "pen"]
+    for extension in ("pen", "PEN", " Ｐｅｎ "):
+        response = await client.get("/api/admin/projects", params={"extension": extension}, headers=admin_headers)
+        assert [item["_id"] for item in response.json()["items"]] == [project_id]
+
+
+async def _page_through(client, admin_headers, sort_by: str) -> list[str]:
+    ids, cursor = [], None
+    while True:
+        params = {"sort_by": sort_by, "page_size": 2, **({"cursor": cursor} if cursor else {})}
+        response = await client.get("/api/admin/projects", params=params, headers=admin_headers)
+        assert response.status_code == 200
+        body = response.json()
+        ids += [item["_id"] for item in body["items"]]
+        cursor = body["nextCursor"]
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("sort_by", ["spriteCount", "blockCount", "assetBytes", "updatedAt"])
+async def test_cursor_pagination_includes_projects_without_stats(client, user, auth_headers, admin_headers, sort_by):
+    project_ids = [await _create_project(client, auth_headers) for _ in range(4)]
+    # 统计字段加入前创建的项目
+    collection = Project.get_motor_collection()
+    for project_id in project_ids[:3]:
+        await collection.update_one({"_id": PydanticObjectId(project_id)}, {"$unset": dict.fromkeys(STATS_FIELDS, "")})
+
+    await backfill_missing_stats()
+
+    assert sorted(await _page_through(client, admin_headers, sort_by)) == sorted(project_ids)
+    assert await collection.count_documents({"sprite_count": 0, "extensions": []}) == 4
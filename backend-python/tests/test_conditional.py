@@ -0,0 +1,37 @@
+"""项目详情和分享页的条件请求"""
+
+import pytest
+
+from .test_projects import PROJECT_JSON, _create_project, _upload
+
+
+@pytest.mark.parametrize("cached, requested", [(False, True), (True, False)])
+async def test_etag_differs_by_include_data(client, auth_headers, cached, requested):
+    project_id = await _create_project(client, auth_headers)
+    await _upload(client, auth_headers, project_id, PROJECT_JSON)
+    url = f"/api/projects/{project_id}"
+
+    first = await client.get(url, params={"include_data": cached}, headers=auth_headers)
+    etag = first.headers["etag"]
+    assert (first.json()["projectJson"] is not None) == cached
+
+    # 同一变体可以 304，另一个变体必须返回完整响应
+    same = await client.get(url, params={"include_data": cached}, headers={**auth_headers, "If-None-Match": etag})
+    assert same.status_code == 304
+    other = await client.get(
+        url, params={"include_data": requested}, headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert other.status_code == 200
+    assert (other.json()["projectJson"] is not None) == requested
+
+
+async def test_shared_etag_differs_by_include_data(client, auth_headers):
+    project_id = await _create_project(client, auth_headers)
+    await _upload(client, auth_headers, project_id, PROJECT_JSON)
+    token = (await client.post(f"/api/projects/{project_id}/share", headers=auth_headers)).json()["shareToken"]
+
+    metadata = await client.get(f"/api/share/{token}", params={"include_data": False})
+    response = await client.get(f"/api/share/{token}", headers={"If-None-Match": metadata.headers["etag"]})
+
+    assert response.status_code == 200
+    assert response.json()["projectJson"]["sb3"].startswith("data:application/x.scratch.sb3;base64,")
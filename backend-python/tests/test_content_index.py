@@ -0,0 +1,93 @@
+"""项目统计和内容索引（保存后在后台生成）"""
+
+import json
+import threading
+
+from app.models import Project, ProjectContentIndex
+from app.services import content_index
+
+from .test_projects import _create_project, _upload, _wait_post_save_tasks
+
+PEN_PROJECT = {
+    "targets": [
+        {"isStage": True, "name": "Stage", "blocks": {}, "costumes": [], "sounds": []},
+        {
+            "isStage": False,
+            "name": "Cat",
+            "blocks": {
+                "a": {"opcode": "pen_penDown", "topLevel": True},
+                "b": {"opcode": "motion_movesteps"},
+            },
+            "costumes": [],
+            "sounds": [],
+        },
+    ],
+    "extensions": ["pen"],
+}
+
+
+async def test_stats_and_index_written_after_save(client, auth_headers):
+    project_id = await _create_project(client, auth_headers)
+
+    await _upload(client, auth_headers, project_id, PEN_PROJECT)
+    await _wait_post_save_tasks()
+
+    project = await Project.get(project_id)
+    assert (project.sprite_count, project.block_count, project.extensions) == (1, 2, ["pen"])
+    index = await ProjectContentIndex.find_one(ProjectContentIndex.project_id == project.id)
+    assert index.targets == ["cat", "stage"]
+    assert index.opcodes == {"pen_penDown": 1, "motion_movesteps": 1}
+
+
+async def test_save_does_not_wait_for_analysis(client, auth_headers, monkeypatch):
+    release = threading.Event()
+    original = content_index.extract_content_index
+
+    def slow_extract(project_json):
+        release.wait(5)
+        return original(project_json)
+
+    monkeypatch.setattr(content_index, "extract_content_index", slow_extract)
+    project_id = await _create_project(client, auth_headers)
+
+    await _upload(client, auth_headers, project_id, PEN_PROJECT)
+    assert await ProjectContentIndex.find().count() == 0
+
+    release.set()
+    await _wait_post_save_tasks()
+    assert await ProjectContentIndex.find().count() == 1
+
+
+async def test_analysis_failure_does_not_fail_save(client, auth_headers, monkeypatch):
+    def broken(project_json):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(content_index, "extract_content_index", broken)
+    project_id = await _create_project(client, auth_headers)
+
+    await _upload(client, auth_headers, project_id, PEN_PROJECT)
+    await _wait_post_save_tasks()
+
+    project = await Project.get(project_id)
+    assert project.storage_path
+    assert await ProjectContentIndex.find().count() == 0
+
+
+async def test_incremental_commit_parses_project_json_once(client, auth_headers, monkeypatch):
+    def parse_again(project_json, assets):
+        raise AssertionError("project.json parsed twice")
+
+    monkeypatch.setattr(content_index, "analyze_project_json", parse_again)
+    project_id = await _create_project(client, auth_headers)
+
+    response = await client.put(
+        f"/api/projects/{project_id}/project-json",
+        content=json.dumps(PEN_PROJECT),
+        headers={**auth_headers, "Content-Type": "application/json"},
+    )
+    assert response.status_code == 200
+    await _wait_post_save_tasks()
+
+    project = await Project.get(project_id)
+    assert project.block_count == 2
+    assert await ProjectContentIndex.find().count() == 1
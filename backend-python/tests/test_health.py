@@ -0,0 +1,52 @@
+"""就绪检查"""
+
+import asyncio
+import threading
+
+import minio
+
+from app.core.config import get_settings
+from app.services.storage import get_storage_service
+
+from .test_projects import PROJECT_JSON, _create_project, _upload
+
+
+async def test_hung_storage_probe_does_not_block_storage(client, auth_headers, minio_client, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "health_check_ttl", 0)
+    monkeypatch.setattr(settings, "health_check_timeout", 0.05)
+    monkeypatch.setattr(settings, "storage_max_concurrency", 2)
+    release = threading.Event()
+
+    def bucket_exists(bucket_name: str) -> bool:
+        release.wait()
+        return True
+
+    monkeypatch.setattr(minio_client, "bucket_exists", bucket_exists)
+    try:
+        # 挂起的探测多于存储线程数
+        for _ in range(4):
+            response = await client.get("/health/ready")
+            assert response.status_code == 503
+            assert response.json()["checks"]["storage"]["error"] == "timed out after 0.05s"
+
+        project_id = await _create_project(client, auth_headers)
+        await asyncio.wait_for(_upload(client, auth_headers, project_id, PROJECT_JSON), 2)
+    finally:
+        release.set()
+
+
+def test_probe_client_has_short_timeout_and_no_retries(monkeypatch):
+    monkeypatch.setattr(get_settings(), "health_check_timeout", 1.5)
+    clients = []
+    monkeypatch.setattr(minio, "Minio", lambda *args, **kwargs: clients.append(kwargs) or object())
+    get_storage_service.cache_clear()
+    try:
+        storage = get_storage_service()
+        probe = clients[-1]["http_client"]
+        assert probe.connection_pool_kw["timeout"].read_timeout == 1.5
+        assert probe.connection_pool_kw["retries"].total == 0
+        storage._executor.shutdown()
+        storage._probe_executor.shutdown()
+    finally:
+        get_storage_service.cache_clear()
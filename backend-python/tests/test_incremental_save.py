@@ -0,0 +1,114 @@
+"""增量保存：查询缺失资源、上传资源、提交 project.json"""
+
+import hashlib
+import json
+
+import pytest
+
+from app.models import Project
+
+from .test_projects import _create_project
+
+SOUND = b"RIFF" + b"\x00" * 60
+SOUND_NAME = f"{hashlib.md5(SOUND).hexdigest()}.wav"
+
+
+def _project_json(*sounds: str) -> dict:
+    return {
+        "targets": [
+            {
+                "isStage": True,
+                "name": "Stage",
+                "blocks": {},
+                "costumes": [],
+                "sounds": [{"name": "pop", "md5ext": name} for name in sounds],
+            }
+        ],
+        "extensions": [],
+    }
+
+
+async def _commit(client, auth_headers, project_id: str, project_json) -> object:
+    body = project_json if isinstance(project_json, bytes) else json.dumps(project_json).encode()
+    return await client.put(
+        f"/api/projects/{project_id}/project-json",
+        content=body,
+        headers={**auth_headers, "Content-Type": "application/json"},
+    )
+
+
+async def test_incremental_save(client, auth_headers, minio_client):
+    project_id = await _create_project(client, auth_headers)
+
+    missing = await client.post(
+        f"/api/projects/{project_id}/assets/missing", json={"assets": [SOUND_NAME]}, headers=auth_headers
+    )
+    assert missing.json() == {"missing": [SOUND_NAME]}
+
+    # 资源未上传时提交返回 409 和缺失列表，项目保持不变
+    response = await _commit(client, auth_headers, project_id, _project_json(SOUND_NAME))
+    assert response.status_code == 409
+    assert response.json()["detail"]["missing"] == [SOUND_NAME]
+    project = await Project.get(project_id)
+    assert project.storage_path is None
+
+    uploaded = await client.put(
+        f"/api/projects/{project_id}/assets/{SOUND_NAME}", content=SOUND, headers=auth_headers
+    )
+    assert uploaded.status_code == 204
+    assert minio_client.objects[f"assets/{SOUND_NAME}"] == SOUND
+
+    response = await _commit(client, auth_headers, project_id, _project_json(SOUND_NAME))
+    assert response.status_code == 200
+    project = await Project.get(project_id)
+    assert project.storage_path and project.content_hash
+
+    downloaded = await client.get(f"/api/projects/{project_id}/content", headers=auth_headers)
+    assert downloaded.status_code == 200
+    assert downloaded.content[:4] == b"PK\x03\x04"
+
+
+async def test_asset_upload_md5_mismatch(client, auth_headers, minio_client):
+    project_id = await _create_project(client, auth_headers)
+
+    response = await client.put(
+        f"/api/projects/{project_id}/assets/{SOUND_NAME}", content=SOUND + b"!", headers=auth_headers
+    )
+
+    assert response.status_code == 400
+    assert f"assets/{SOUND_NAME}" not in minio_client.objects
+
+
+async def test_missing_assets_rejects_invalid_names(client, auth_headers):
+    project_id = await _create_project(client, auth_headers)
+
+    response = await client.post(
+        f"/api/projects/{project_id}/assets/missing", json={"assets": ["../x.wav"]}, headers=auth_headers
+    )
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "project_json",
+    [
+        b"not json",
+        b"[]",
+        {"targets": None},
+        {"targets": [1]},
+        {"targets": [{"costumes": None}]},
+        {"targets": [{"sounds": {"md5ext": SOUND_NAME}}]},
+        {"targets": [{"costumes": [1]}]},
+        {"targets": [{"sounds": [{"md5ext": 1}]}]},
+        {"targets": [{"sounds": [{"name": "pop"}]}]},
+        {"targets": [{"sounds": [{"md5ext": "../../etc/passwd"}]}]},
+    ],
+)
+async def test_commit_malformed_project_json(client, auth_headers, project_json):
+    project_id = await _create_project(client, auth_headers)
+
+    response = await _commit(client, auth_headers, project_id, project_json)
+
+    assert response.status_code == 400
+    project = await Project.get(project_id)
+    assert project.storage_path is None
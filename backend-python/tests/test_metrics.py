@@ -0,0 +1,60 @@
+"""/metrics 导出的 Prometheus 指标"""
+
+from prometheus_client.parser import text_string_to_metric_families
+
+from .fakes import make_sb3
+from .test_projects import PROJECT_JSON, _create_project
+
+
+async def _scrape(client) -> dict[tuple, float]:
+    """抓取 /metrics，返回 {(样本名, 排序后的标签): 值}"""
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(response.text)
+        for sample in family.samples
+    }
+
+
+def _delta(before: dict, after: dict, name: str, **labels) -> float:
+    key = (name, tuple(sorted(labels.items())))
+    return after.get(key, 0) - before.get(key, 0)
+
+
+async def test_metrics_after_upload(client, auth_headers):
+    project_id = await _create_project(client, auth_headers)
+    sb3 = make_sb3(PROJECT_JSON)
+    before = await _scrape(client)
+
+    response = await client.put(
+        f"/api/projects/{project_id}/content",
+        content=sb3,
+        headers={**auth_headers, "Content-Type": "application/x.scratch.sb3"},
+    )
+    assert response.status_code == 200
+    after = await _scrape(client)
+
+    # HTTP：按路由模板记录，不包含项目 id
+    route = {"method": "PUT", "route": "/api/projects/{project_id}/content"}
+    assert _delta(before, after, "http_request_duration_seconds_count", **route, status="200") == 1
+    assert _delta(before, after, "http_request_size_bytes_sum", **route) == len(sb3)
+    assert _delta(before, after, "http_response_size_bytes_count", **route) == 1
+    assert not any(project_id in str(labels) for _, labels in after)
+    assert after[("http_requests_in_progress", (("method", "PUT"),))] == 0
+
+    # MinIO
+    storage = {"operation": "put_object", "outcome": "success"}
+    assert _delta(before, after, "storage_operation_duration_seconds_count", **storage) >= 2
+
+    # MongoDB
+    mongo = {"command": "find", "collection": "projects", "outcome": "success"}
+    assert _delta(before, after, "mongodb_command_duration_seconds_count", **mongo) >= 1
+    # save_changes 使用 findAndModify
+    mongo = {"command": "findAndModify", "collection": "projects", "outcome": "success"}
+    assert _delta(before, after, "mongodb_command_duration_seconds_count", **mongo) >= 1
+
+    assert _delta(before, after, "project_sb3_size_bytes_sum") == len(sb3)
+    # /metrics 本身不统计
+    assert not any(dict(labels).get("route") == "/metrics" for _, labels in after)
@@ -0,0 +1,230 @@
+"""项目接口"""
+
+import asyncio
+import base64
+import hashlib
+
+from app.core.config import get_settings
+from app.core.search import build_search_text
+from app.models import Project
+from app.services import project as project_service
+from app.services import view_counter
+
+from .fakes import make_sb3
+
+PROJECT_JSON = {
+    "targets": [{"isStage": True, "name": "Stage", "blocks": {}, "costumes": [], "sounds": []}],
+    "extensions": [],
+}
+
+
+async def _create_project(client, auth_headers) -> str:
+    response = await client.post("/api/projects", json={"title": "作品"}, headers=auth_headers)
+    assert response.status_code == 201
+    return response.json()["_id"]
+
+
+async def test_upload_content_raw_body(client, auth_headers):
+    project_id = await _create_project(client, auth_headers)
+
+    response = await client.put(
+        f"/api/projects/{project_id}/content",
+        content=make_sb3(PROJECT_JSON),
+        headers={**auth_headers, "Content-Type": "application/x.scratch.sb3"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["storagePath"]
+
+
+async def test_upload_content_multipart(client, auth_headers):
+    project_id = await _create_project(client, auth_headers)
+    sb3 = make_sb3(PROJECT_JSON)
+
+    response = await client.put(
+        f"/api/projects/{project_id}/content",
+        files={"file": ("project.sb3", sb3, "application/x.scratch.sb3")},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    project = await Project.get(project_id)
+    assert project.storage_path
+    assert project.file_size == len(sb3)
+
+    downloaded = await client.get(f"/api/projects/{project_id}/content", headers=auth_headers)
+    assert downloaded.status_code == 200
+    assert downloaded.content[:4] == b"PK\x03\x04"
+
+
+async def test_upload_content_multipart_without_file(client, auth_headers):
+    project_id = await _create_project(client, auth_headers)
+
+    response = await client.put(
+        f"/api/projects/{project_id}/content",
+        files={"other": ("project.sb3", b"PK\x03\x04", "application/octet-stream")},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 400
+
+
+async def test_create_with_invalid_sb3_leaves_no_project(client, auth_headers):
+    response = await client.post(
+        "/api/projects",
+        json={"title": "坏文件", "projectJson": {"sb3": "data:application/x.scratch.sb3;base64,bm90IGEgemlw"}},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 400
+    assert await Project.find().count() == 0
+    listed = await client.get("/api/projects", headers=auth_headers)
+    assert listed.json() == []
+
+
+async def test_create_with_sb3(client, auth_headers):
+    sb3 = base64.b64encode(make_sb3(PROJECT_JSON)).decode()
+
+    response = await client.post(
+        "/api/projects",
+        json={"title": "作品", "projectJson": {"sb3": f"data:application/x.scratch.sb3;base64,{sb3}"}},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 201
+    project = await Project.get(response.json()["_id"])
+    assert project.storage_path and project.content_hash
+
+
+async def _wait_post_save_tasks() -> None:
+    """等待保存后的后台任务（内容索引、删除旧版本对象）完成"""
+    await asyncio.gather(*list(project_service._post_save_tasks))
+
+
+async def _upload(client, auth_headers, project_id: str, project_json: dict):
+    response = await client.put(
+        f"/api/projects/{project_id}/content",
+        content=make_sb3(project_json),
+        headers={**auth_headers, "Content-Type": "application/x.scratch.sb3"},
+    )
+    assert response.status_code == 200
+
+
+def _project_json_keys(minio_client, project_id: str) -> set[str]:
+    prefix = f"projects/{project_id}/project."
+    return {name for name in minio_client.objects if name.startswith(prefix)}
+
+
+async def test_replaced_project_json_kept_for_grace_period(client, auth_headers, minio_client, monkeypatch):
+    monkeypatch.setattr(get_settings(), "replaced_object_grace_seconds", 0.05)
+    project_id = await _create_project(client, auth_headers)
+    await _upload(client, auth_headers, project_id, PROJECT_JSON)
+    (old_key,) = _project_json_keys(minio_client, project_id)
+
+    await _upload(client, auth_headers, project_id, {**PROJECT_JSON, "meta": {"v": 2}})
+
+    # 刚切换时旧版本仍可读取
+    assert old_key in _project_json_keys(minio_client, project_id)
+    await asyncio.sleep(0.1)
+    keys = _project_json_keys(minio_client, project_id)
+    assert old_key not in keys
+    assert len(keys) == 1
+
+
+async def test_replaced_object_not_deleted_when_saved_again(client, auth_headers, minio_client, monkeypatch):
+    monkeypatch.setattr(get_settings(), "replaced_object_grace_seconds", 0.05)
+    project_id = await _create_project(client, auth_headers)
+    await _upload(client, auth_headers, project_id, PROJECT_JSON)
+    (first_key,) = _project_json_keys(minio_client, project_id)
+
+    # A -> B -> A：第二次保存替换掉的是 B，第一次保存计划删除的 A 又成为当前版本
+    await _upload(client, auth_headers, project_id, {**PROJECT_JSON, "meta": {"v": 2}})
+    await _upload(client, auth_headers, project_id, PROJECT_JSON)
+    await asyncio.sleep(0.1)
+
+    assert _project_json_keys(minio_client, project_id) == {first_key}
+    downloaded = await client.get(f"/api/projects/{project_id}/content", headers=auth_headers)
+    assert downloaded.status_code == 200
+
+
+async def test_concurrent_saves_keep_metadata_and_content_consistent(client, auth_headers, minio_client):
+    project_id = await _create_project(client, auth_headers)
+    minio_client.latency = 0.05
+
+    await asyncio.gather(
+        *(_upload(client, auth_headers, project_id, {**PROJECT_JSON, "meta": {"v": v}}) for v in range(3))
+    )
+
+    # storage_path 指向的资源清单正是 content_hash 对应的版本
+    project = await Project.get(project_id)
+    manifest = minio_client.objects[project.storage_path]
+    assert hashlib.sha256(manifest).hexdigest() == project.content_hash
+    assert project.storage_path == project.get_manifest_object_name(project.content_hash)
+
+
+async def test_save_does_not_overwrite_flushed_view_counts(client, auth_headers, minio_client):
+    project_id = await _create_project(client, auth_headers)
+    minio_client.latency = 0.2
+
+    # 上传过程中（项目已加载、尚未保存）浏览计数落库
+    upload = asyncio.create_task(_upload(client, auth_headers, project_id, PROJECT_JSON))
+    await asyncio.sleep(0.05)
+    project = await Project.get(project_id)
+    for visitor in ("a", "b", "c"):
+        view_counter.record(project.id, visitor)
+    await view_counter.flush()
+    await upload
+
+    project = await Project.get(project_id)
+    assert project.view_count == 3
+    assert project.storage_path
+
+
+async def test_update_title_refreshes_search_text(client, auth_headers):
+    project_id = await _create_project(client, auth_headers)
+
+    response = await client.put(f"/api/projects/{project_id}", json={"title": "太空探险"}, headers=auth_headers)
+
+    assert response.status_code == 200
+    project = await Project.get(project_id)
+    assert project.search_text == build_search_text("太空探险", None)
+
+
+async def test_packed_sb3_cached_per_content_version(client, auth_headers, minio_client, monkeypatch):
+    project_id = await _create_project(client, auth_headers)
+    sb3 = make_sb3(PROJECT_JSON, {"0123456789abcdef0123456789abcdef.wav": b"RIFF" * 1000})
+    response = await client.put(
+        f"/api/projects/{project_id}/content",
+        content=sb3,
+        headers={**auth_headers, "Content-Type": "application/x.scratch.sb3"},
+    )
+    assert response.status_code == 200
+    url = f"/api/projects/{project_id}/content"
+
+    first = await client.get(url, headers=auth_headers)
+    assert first.status_code == 200
+    project = await Project.get(project_id)
+    packed_key = project.get_packed_object_name(project.content_hash)
+    assert minio_client.objects[packed_key] == first.content
+
+    # 之后的下载和 Range 请求直接读取缓存的打包结果
+    pack_calls = []
+    pack_sb3 = project_service.pack_sb3
+
+    async def counting_pack_sb3(manifest):
+        pack_calls.append(manifest)
+        return await pack_sb3(manifest)
+
+    monkeypatch.setattr(project_service, "pack_sb3", counting_pack_sb3)
+    second = await client.get(url, headers=auth_headers)
+    assert second.content == first.content
+    assert second.headers["etag"] == first.headers["etag"]
+    partial = await client.get(url, headers={**auth_headers, "Range": "bytes=0-3"})
+    assert partial.status_code == 206
+    assert partial.content == first.content[:4]
+    assert pack_calls == []
+
+    # 新版本保存后，旧版本的缓存被删除
+    await _upload(client, auth_headers, project_id, {**PROJECT_JSON, "meta": {"v": 2}})
+    await _wait_post_save_tasks()
+    assert packed_key not in minio_client.objects
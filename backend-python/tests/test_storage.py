@@ -0,0 +1,42 @@
+"""MinIO 调用在存储线程池中执行，不阻塞事件循环"""
+
+import asyncio
+import os
+import time
+
+from .fakes import make_sb3
+from .test_projects import PROJECT_JSON, _create_project
+
+
+async def test_health_latency_flat_during_large_uploads(client, auth_headers, minio_client):
+    # 每个 MinIO 调用耗时 0.5 秒，相当于慢速网络上的大文件
+    minio_client.latency = 0.5
+    sb3 = make_sb3(PROJECT_JSON, {"0123456789abcdef0123456789abcdef.wav": os.urandom(4 * 1024 * 1024)})
+    project_ids = [await _create_project(client, auth_headers) for _ in range(4)]
+
+    uploads = [
+        asyncio.create_task(
+            client.put(
+                f"/api/projects/{project_id}/content",
+                content=sb3,
+                headers={**auth_headers, "Content-Type": "application/x.scratch.sb3"},
+            )
+        )
+        for project_id in project_ids
+    ]
+    await asyncio.sleep(0.05)
+
+    latencies = []
+    for _ in range(20):
+        start = time.perf_counter()
+        response = await client.get("/health")
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200
+        await asyncio.sleep(0.01)
+
+    # 上传仍在进行，/health 不受影响
+    assert not all(upload.done() for upload in uploads)
+    assert max(latencies) < 0.1
+
+    responses = await asyncio.gather(*uploads)
+    assert [response.status_code for response in responses] == [200] * 4
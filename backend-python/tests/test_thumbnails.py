@@ -0,0 +1,103 @@
+"""项目缩略图"""
+
+import base64
+
+from app.models import project as project_model
+
+from .fakes import make_sb3
+from .test_projects import PROJECT_JSON, _create_project, _upload, _wait_post_save_tasks
+
+# 4x3 的 PNG
+PNG_DATA_URL = (
+    "data:image/png;base64,"
+    "iVBORw0KGgoAAAANSUhEUgAAAAQAAAADCAIAAAA7ljmRAAAAFElEQVR4nGM8YWTEAANMDEgAhQMALI4BMuWTJ7wAAAAASUVORK5CYII="
+)
+
+
+async def test_png_thumbnail_served_as_image(client, auth_headers):
+    project_id = await _create_project(client, auth_headers)
+
+    response = await client.put(
+        f"/api/projects/{project_id}", json={"thumbnail": PNG_DATA_URL}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    url = response.json()["thumbnail"]
+
+    thumbnail = await client.get(url)
+    assert thumbnail.status_code == 200
+    assert thumbnail.headers["content-type"] == "image/png"
+    assert thumbnail.content == base64.b64decode(PNG_DATA_URL.split(",", 1)[1])
+
+
+async def test_non_image_thumbnail_rejected(client, auth_headers, minio_client):
+    project_id = await _create_project(client, auth_headers)
+    html = base64.b64encode(b"<html><script>alert(1)</script></html>").decode()
+
+    response = await client.put(
+        f"/api/projects/{project_id}",
+        json={"thumbnail": f"data:image/png;base64,{html}"},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 400
+    assert not [name for name in minio_client.objects if "thumbnail" in name]
+
+
+async def test_delete_project_with_only_thumbnail(client, auth_headers, minio_client):
+    project_id = await _create_project(client, auth_headers)
+    await client.put(f"/api/projects/{project_id}", json={"thumbnail": PNG_DATA_URL}, headers=auth_headers)
+    assert any(name.startswith(f"projects/{project_id}/") for name in minio_client.objects)
+
+    response = await client.delete(f"/api/projects/{project_id}", headers=auth_headers)
+
+    assert response.status_code == 204
+    assert not any(name.startswith(f"projects/{project_id}/") for name in minio_client.objects)
+
+
+async def test_invalid_thumbnail_does_not_change_project_data(client, auth_headers, minio_client):
+    project_id = await _create_project(client, auth_headers)
+    await _upload(client, auth_headers, project_id, PROJECT_JSON)
+    before = await client.get(f"/api/projects/{project_id}/content", headers=auth_headers)
+    objects = dict(minio_client.objects)
+
+    new_sb3 = base64.b64encode(make_sb3({**PROJECT_JSON, "meta": {"v": 2}})).decode()
+    response = await client.put(
+        f"/api/projects/{project_id}",
+        json={
+            "projectJson": {"sb3": f"data:application/x.scratch.sb3;base64,{new_sb3}"},
+            "thumbnail": "data:image/png;base64,PGh0bWw+",
+        },
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 400
+    assert minio_client.objects == objects
+    after = await client.get(f"/api/projects/{project_id}/content", headers=auth_headers)
+    assert after.headers["etag"] == before.headers["etag"]
+    assert after.content == before.content
+
+
+async def test_replaced_thumbnail_deleted_after_save(client, auth_headers, minio_client):
+    project_id = await _create_project(client, auth_headers)
+    first = await client.put(f"/api/projects/{project_id}", json={"thumbnail": PNG_DATA_URL}, headers=auth_headers)
+
+    response = await client.put(f"/api/projects/{project_id}", json={"thumbnail": None}, headers=auth_headers)
+    assert response.status_code == 200
+    await _wait_post_save_tasks()
+
+    assert response.json()["thumbnail"] is None
+    assert (await client.get(first.json()["thumbnail"])).status_code == 404
+
+
+async def test_list_thumbnail_variant_only_with_pillow(client, auth_headers, monkeypatch):
+    project_id = await _create_project(client, auth_headers)
+    await client.put(f"/api/projects/{project_id}", json={"thumbnail": PNG_DATA_URL}, headers=auth_headers)
+
+    (item,) = (await client.get("/api/projects", headers=auth_headers)).json()
+    assert item["thumbnail"].endswith("?size=md")
+    variant = await client.get(item["thumbnail"])
+    assert variant.headers["content-type"] == "image/webp"
+
+    monkeypatch.setattr(project_model, "THUMBNAIL_VARIANTS_AVAILABLE", False)
+    (item,) = (await client.get("/api/projects", headers=auth_headers)).json()
+    assert "?size=" not in item["thumbnail"]
@@ -0,0 +1,54 @@
+"""请求追踪的 span 树"""
+
+import pytest
+
+from app.core.tracing import TRACE_ID_HEADER, TracingCommandListener, configure_tracing, tracer
+
+from .fakes import make_sb3
+from .test_projects import PROJECT_JSON, _create_project
+
+
+@pytest.fixture
+def exporter(mongo_listeners):
+    """采样所有请求，trace 保存在内存中"""
+    mongo_listeners.append(TracingCommandListener())
+    configure_tracing(1.0, "memory", "")
+    yield tracer.exporter
+    configure_tracing(0.0, "memory", "")
+
+
+async def test_upload_span_tree(client, auth_headers, exporter):
+    project_id = await _create_project(client, auth_headers)
+    exporter.clear()
+
+    response = await client.put(
+        f"/api/projects/{project_id}/content",
+        content=make_sb3(PROJECT_JSON),
+        headers={**auth_headers, "Content-Type": "application/x.scratch.sb3"},
+    )
+    assert response.status_code == 200
+
+    (spans,) = exporter.traces
+    (root,) = [span for span in spans if span.parent_id is None]
+    assert root.name == "PUT /api/projects/{project_id}/content"
+    assert root.attributes["http.status_code"] == 200
+    assert root.trace_id == response.headers[TRACE_ID_HEADER]
+    assert all(span.trace_id == root.trace_id and span.end_ns for span in spans)
+
+    # 每个 span 的父 span 都在同一棵树中，且都能追溯到根 span
+    by_id = {span.span_id: span for span in spans}
+    assert len(by_id) == len(spans)
+    for span in spans:
+        ancestor = span
+        while ancestor.parent_id is not None:
+            ancestor = by_id[ancestor.parent_id]
+            assert ancestor.start_ns <= span.start_ns
+        assert ancestor is root
+
+    names = [span.name for span in spans]
+    assert "mongodb.find projects" in names
+    assert "mongodb.findAndModify projects" in names
+    assert "storage.put_object" in names
+    mongo_spans = [span for span in spans if span.name.startswith("mongodb.")]
+    assert all(span.attributes["db.system"] == "mongodb" for span in mongo_spans)
+
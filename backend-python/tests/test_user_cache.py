@@ -0,0 +1,23 @@
+"""登录用户缓存"""
+
+from app.services import get_cached_user
+from app.services.user_cache import _local
+
+
+async def test_cached_user_has_no_password_hash(client, auth_headers, user):
+    response = await client.get("/api/auth/me", headers=auth_headers)
+    assert response.status_code == 200
+
+    data = _local.get(str(user.id))
+    assert data is not None
+    assert b"password_hash" not in data
+    assert user.password_hash.encode() not in data
+
+    cached = await get_cached_user(user.id)
+    assert cached.username == user.username
+    assert cached.password_hash == ""
+
+    # 第二次请求命中缓存
+    response = await client.get("/api/auth/me", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["username"] == user.username
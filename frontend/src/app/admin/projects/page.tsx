@@ -140,6 +140,12 @@ export default function AdminProjectsPage() {
               >
                 大小 {getSortIcon('fileSize')}
               </th>
+              <th
+                className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider cursor-pointer hover:bg-gray-100"
+                onClick={() => handleSort('blockCount')}
+              >
+                积木 {getSortIcon('blockCount')}
+              </th>
               <th className="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">
                 所有者
               </th>
@@ -163,13 +169,13 @@ export default function AdminProjectsPage() {
           <tbody className="bg-white divide-y divide-gray-200">
             {projectsLoading ? (
               <tr>
-                <td colSpan={6} className="px-6 py-12 text-center text-gray-500">
+                <td colSpan={7} className="px-6 py-12 text-center text-gray-500">
                   加载中...
                 </td>
               </tr>
             ) : projects.length === 0 ? (
               <tr>
-                <td colSpan={6} className="px-6 py-12 text-center text-gray-500">
+                <td colSpan={7} className="px-6 py-12 text-center text-gray-500">
                   暂无项目
                 </td>
               </tr>
@@ -202,6 +208,12 @@ export default function AdminProjectsPage() {
                   <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
                     {formatFileSize(project.fileSize)}
                   </td>
+                  <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
+                    {project.blockCount ?? 0}
+                    <span className="text-xs text-gray-400 ml-1">
+                      / {project.spriteCount ?? 0} 个角色
+                    </span>
+                  </td>
                   <td className="px-6 py-4 whitespace-nowrap">
                     <span className="text-sm text-gray-900">{project.ownerName}</span>
                   </td>
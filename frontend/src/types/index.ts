@@ -61,6 +61,7 @@ export interface PaginatedUsers {
   page: number;
   pageSize: number;
   totalPages: number;
+  nextCursor?: string | null;
 }
 
 export interface UserCreateData {
@@ -85,6 +86,12 @@ export interface AdminProject {
   fileSize: number;
   isPublic: boolean;
   viewCount: number;
+  spriteCount?: number;
+  blockCount?: number;
+  costumeCount?: number;
+  soundCount?: number;
+  assetBytes?: number;
+  extensions?: string[];
   ownerId: string;
   ownerName: string;
   createdAt: string;
@@ -97,4 +104,5 @@ export interface PaginatedProjects {
   page: number;
   pageSize: number;
   totalPages: number;
+  nextCursor?: string | null;
 }